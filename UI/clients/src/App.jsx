@@ -19,6 +19,7 @@ function App() {
     v3Data,
     balances,
     sendV3Command,
+    setV3Subscriptions,
   } = useWebSocketController();
 
   const [allExchanges, setAllExchanges] = React.useState([]);
@@ -54,6 +55,7 @@ function App() {
             <Top20DetailedPage 
               v3Data={v3Data}
               sendV3Command={sendV3Command}
+              setV3Subscriptions={setV3Subscriptions}
             />
           } />
           <Route path="datos" element={<DataViewPage />} />
@@ -67,6 +69,7 @@ function App() {
             <TrainingPage
               v3Data={v3Data}
               sendV3Command={sendV3Command}
+              setV3Subscriptions={setV3Subscriptions}
             />
           } />
           <Route path="config-data" element={<ConfigDataPage />} />
@@ -22,7 +22,7 @@ const deepEqual = (obj1, obj2) => {
   return true;
 };
 
-const Top20DetailedPage = ({ v3Data, sendV3Command }) => {
+const Top20DetailedPage = ({ v3Data, sendV3Command, setV3Subscriptions }) => {
   const [opportunities, setOpportunities] = useState([]);
   const [tradingStatus, setTradingStatus] = useState('inactive');
   const [selectedOpportunity, setSelectedOpportunity] = useState(null);
@@ -33,6 +33,13 @@ const Top20DetailedPage = ({ v3Data, sendV3Command }) => {
     fixed_investment_usdt: 100
   });
   
+  // Esta página no necesita el progreso de entrenamiento ni los pasos de simulación
+  useEffect(() => {
+    if (!setV3Subscriptions) return undefined;
+    setV3Subscriptions(['top20', 'balances', 'trading', 'system']);
+    return () => setV3Subscriptions(null);
+  }, [setV3Subscriptions]);
+
   // Refs to store previous values for comparison
   const prevTop20DataRef = useRef();
   const prevSystemStatusRef = useRef();
@@ -2,7 +2,7 @@ import React, { useState, useEffect } from 'react';
 import TrainingVisualization from './TrainingVisualization.jsx';
 import './TrainingPage.css';
 
-const TrainingPage = ({ sendV3Command, v3Data }) => {
+const TrainingPage = ({ sendV3Command, v3Data, setV3Subscriptions }) => {
   const [activeSection, setActiveSection] = useState('data-creation');
   const [symbols, setSymbols] = useState([]);
   const [formData, setFormData] = useState({
@@ -19,6 +19,13 @@ const TrainingPage = ({ sendV3Command, v3Data }) => {
   const [testResults, setTestResults] = useState(null);
   const [simulationResults, setSimulationResults] = useState(null);
 
+  // Esta página no muestra el Top 20: evitar recibirlo a 4 Hz mientras está abierta
+  useEffect(() => {
+    if (!setV3Subscriptions) return undefined;
+    setV3Subscriptions(['training', 'simulation', 'balances', 'system']);
+    return () => setV3Subscriptions(null);
+  }, [setV3Subscriptions]);
+
   // Obtener símbolos de Sebo
   useEffect(() => {
     const fetchSymbols = async () => {
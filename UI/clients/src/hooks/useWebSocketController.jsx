@@ -1,4 +1,26 @@
-import { useState, useEffect, useRef } from 'react';
+import { useState, useEffect, useRef, useCallback } from 'react';
+
+// Clave estable de una fila del Top 20 (debe coincidir con top20_row_key en V3)
+const top20RowKey = (row) => `${row.symbol || ''}|${row.exchange_min_id || ''}|${row.exchange_max_id || ''}`;
+
+// Codificación de los frames de V3. Con VITE_V3_WS_ENCODING=msgpack se pide el subprotocolo
+// binario (más compacto); JSON queda como alternativa si V3 no tiene msgpack instalado.
+// permessage-deflate lo negocia el navegador automáticamente con el servidor.
+const V3_WS_ENCODING = import.meta.env.VITE_V3_WS_ENCODING || 'json';
+const V3_SUBPROTOCOLS = { msgpack: 'simos.msgpack.v1', json: 'simos.json.v1' };
+
+let msgpackDecoderPromise = null;
+const loadMsgpackDecoder = () => {
+  if (!msgpackDecoderPromise) {
+    msgpackDecoderPromise = import('@msgpack/msgpack')
+      .then((module) => module.decode)
+      .catch((error) => {
+        console.warn('⚠️ No se pudo cargar @msgpack/msgpack, se usará JSON:', error);
+        return null;
+      });
+  }
+  return msgpackDecoderPromise;
+};
 
 const useWebSocketController = () => {
   const [connectionStatus, setConnectionStatus] = useState({
@@ -13,9 +35,19 @@ const useWebSocketController = () => {
   const v3ReconnectAttemptsRef = useRef(0);
   const maxReconnectAttempts = 10;  
 
+  // Estado del Top 20 para aplicar deltas (top20_delta) sobre el último snapshot
+  const top20SeqRef = useRef(-1);
+  const top20RowsRef = useRef(new Map());
+  const top20OrderRef = useRef([]);
+
+  // Tópicos que muestra la página actual (null = todos); se reenvían al reconectar
+  const v3TopicsRef = useRef(null);
+
   useEffect(() => {
-    const connectV3 = () => {
+    const connectV3 = async () => {
       try {
+        const decodeMsgpack = V3_WS_ENCODING === 'msgpack' ? await loadMsgpackDecoder() : null;
+
         // Limpiar conexión anterior si existe
         if (v3SocketRef.current) {
           v3SocketRef.current.close();
@@ -25,22 +57,36 @@ const useWebSocketController = () => {
         const wsUrl = 'ws://localhost:3001';
         console.log(`Intentando conectar a V3 WebSocket: ${wsUrl}`);
         
-        const socket = new WebSocket(wsUrl);
+        // Sin subprotocolo el servidor responde en JSON como siempre
+        const socket = decodeMsgpack
+          ? new WebSocket(wsUrl, [V3_SUBPROTOCOLS.msgpack, V3_SUBPROTOCOLS.json])
+          : new WebSocket(wsUrl);
+        socket.binaryType = 'arraybuffer';
         v3SocketRef.current = socket;
         window.v3SocketInstance = socket;
 
         socket.onopen = () => {
-          console.log('✅ Conectado al servidor WebSocket V3');
+          console.log(`✅ Conectado al servidor WebSocket V3 (protocolo: ${socket.protocol || 'json'}, extensiones: ${socket.extensions || 'ninguna'})`);
           setConnectionStatus(prev => ({ ...prev, v3: 'connected' }));
           v3ReconnectAttemptsRef.current = 0;
+          // El servidor envía un snapshot del Top 20 al conectar
+          top20SeqRef.current = -1;
           
+          // El servidor suscribe a todos los tópicos al conectar; restaurar la selección de la página
+          if (v3TopicsRef.current) {
+            socket.send(JSON.stringify({ type: 'set_subscriptions', payload: { topics: v3TopicsRef.current } }));
+          }
+
           // Solicitar estado inicial del sistema
           socket.send(JSON.stringify({ type: 'get_system_status' }));
         };
 
         socket.onmessage = (event) => {
           try {
-            const message = JSON.parse(event.data);
+            // Frames de texto = JSON; frames binarios = MessagePack
+            const message = typeof event.data === 'string'
+              ? JSON.parse(event.data)
+              : decodeMsgpack(new Uint8Array(event.data));
             console.log('📨 Mensaje de V3:', message.type, message.payload);
 
             switch (message.type) {
@@ -75,10 +121,44 @@ const useWebSocketController = () => {
                 setV3Data(prev => ({ ...prev, trading_status: message.payload }));
                 break;
                 
-              case 'top20_data':
+              case 'top20_data': {
                 console.log('📈 Datos Top 20 recibidos:', message.payload?.length || 0, 'elementos');
+                // Ignorar snapshots más viejos que el estado ya aplicado
+                if (typeof message.seq === 'number' && message.seq < top20SeqRef.current) {
+                  break;
+                }
+                const rows = new Map();
+                (message.payload || []).forEach(row => rows.set(top20RowKey(row), row));
+                top20RowsRef.current = rows;
+                top20OrderRef.current = Array.from(rows.keys());
+                top20SeqRef.current = typeof message.seq === 'number' ? message.seq : -1;
                 setV3Data(prev => ({ ...prev, top20_data: message.payload }));
                 break;
+              }
+                
+              case 'top20_delta': {
+                const delta = message.payload;
+                if (delta.seq <= top20SeqRef.current) {
+                  break;
+                }
+                if (delta.base_seq !== top20SeqRef.current) {
+                  // Salto de secuencia: pedir snapshot completo
+                  console.log(`🔁 Salto en Top 20 (esperado ${top20SeqRef.current}, base ${delta.base_seq}), solicitando snapshot`);
+                  socket.send(JSON.stringify({ type: 'request_top20_snapshot' }));
+                  break;
+                }
+                const rows = new Map(top20RowsRef.current);
+                (delta.removes || []).forEach(key => rows.delete(key));
+                Object.entries(delta.upserts || {}).forEach(([key, patch]) => {
+                  rows.set(key, { ...(rows.get(key) || {}), ...patch });
+                });
+                const order = delta.order || top20OrderRef.current.filter(key => rows.has(key));
+                top20RowsRef.current = rows;
+                top20OrderRef.current = order;
+                top20SeqRef.current = delta.seq;
+                setV3Data(prev => ({ ...prev, top20_data: order.map(key => rows.get(key)).filter(Boolean) }));
+                break;
+              }
                 
               case 'balance_update':
                 console.log('💰 Actualización de balance:', message.payload);
@@ -214,6 +294,16 @@ const useWebSocketController = () => {
     }
   };
 
+  // Limita los streams que envía V3 a los tópicos indicados (null = todos).
+  // Tópicos: top20, balances, trading, training, simulation, system
+  const setV3Subscriptions = useCallback((topics) => {
+    v3TopicsRef.current = topics;
+    const socket = v3SocketRef.current;
+    if (socket && socket.readyState === WebSocket.OPEN) {
+      socket.send(JSON.stringify({ type: 'set_subscriptions', payload: { topics: topics || ['*'] } }));
+    }
+  }, []);
+
   // Función para forzar reconexión
   const forceReconnectV3 = () => {
     console.log('🔄 Forzando reconexión a V3...');
@@ -246,6 +336,7 @@ const useWebSocketController = () => {
     v3Data,
     balances,
     sendV3Command,
+    setV3Subscriptions,
     forceReconnectV3,
     getConnectionDetails,
   };
@@ -45,6 +45,9 @@ class APIv3Routes:
         self.app.route('/api/v3/create-test-csv', methods=['POST'])(
             self._create_test_csv
         )
+        self.app.route('/api/v3/cancel-dataset-creation', methods=['POST'])(
+            self._cancel_dataset_creation
+        )
         self.app.route('/api/v3/start-training', methods=['POST'])(
             self._start_training
         )
@@ -106,6 +109,25 @@ class APIv3Routes:
                 "message": f"Error interno: {str(e)}"
             }), 500
     
+    def _cancel_dataset_creation(self):
+        """Endpoint para cancelar la creación de CSV en curso."""
+        try:
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            result = loop.run_until_complete(
+                self.training_handler.cancel_dataset_creation()
+            )
+            loop.close()
+            
+            return jsonify(result)
+            
+        except Exception as e:
+            self.logger.error(f"Error en cancel_dataset_creation: {e}")
+            return jsonify({
+                "status": "error",
+                "message": f"Error interno: {str(e)}"
+            }), 500
+    
     def _create_test_csv(self):
         """Endpoint para crear CSV de pruebas."""
         try:
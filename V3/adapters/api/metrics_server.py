@@ -0,0 +1,47 @@
+# Simos/V3/adapters/api/metrics_server.py
+
+import logging
+from typing import Optional
+
+from aiohttp import web
+
+from shared.config_v3 import METRICS_HOST, METRICS_PORT
+from shared.metrics import MetricsRegistry, registry as default_registry
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+class MetricsServer:
+    """Expone el registro de métricas en GET /metrics (formato de texto de Prometheus)."""
+
+    def __init__(self, registry: MetricsRegistry = None, host: str = METRICS_HOST, port: int = METRICS_PORT):
+        self.logger = logging.getLogger('V3.MetricsServer')
+        self.registry = registry or default_registry
+        self.host = host
+        self.port = port
+        self._runner: Optional[web.AppRunner] = None
+
+    async def _handle_metrics(self, request: web.Request) -> web.Response:
+        body = self.registry.render()
+        return web.Response(body=body.encode('utf-8'), headers={"Content-Type": CONTENT_TYPE})
+
+    async def start(self):
+        """Inicia el servidor HTTP de métricas en el loop actual."""
+        if self._runner:
+            return
+        try:
+            app = web.Application()
+            app.router.add_get('/metrics', self._handle_metrics)
+            self._runner = web.AppRunner(app, access_log=None)
+            await self._runner.setup()
+            await web.TCPSite(self._runner, self.host, self.port).start()
+            self.logger.info(f"Métricas disponibles en http://{self.host}:{self.port}/metrics")
+        except Exception as e:
+            self.logger.error(f"Error iniciando servidor de métricas: {e}")
+            await self.stop()
+
+    async def stop(self):
+        """Detiene el servidor de métricas."""
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+            self.logger.info("Servidor de métricas detenido")
@@ -0,0 +1,151 @@
+# Simos/V3/adapters/connectors/http_client.py
+
+import asyncio
+import bisect
+import logging
+from collections import Counter
+from typing import Dict, Any, Optional, List
+
+import aiohttp
+
+from shared.config_v3 import (
+    HTTP_POOL_LIMIT, HTTP_POOL_LIMIT_PER_HOST, HTTP_DNS_CACHE_TTL, HTTP_KEEPALIVE_TIMEOUT,
+    HTTP_LATENCY_BUCKETS_MS
+)
+
+class SharedHTTPClient:
+    """
+    Sesión aiohttp compartida por los adaptadores de Sebo.
+
+    Un único pool de conexiones keep-alive (con límite por host y cache DNS)
+    evita que cada componente pague su propio establecimiento de conexión
+    contra el mismo host. Las métricas se toman con TraceConfig, así que
+    cubren cualquier petición hecha con la sesión (incluida make_http_request).
+    """
+
+    def __init__(self, limit: int = HTTP_POOL_LIMIT, limit_per_host: int = HTTP_POOL_LIMIT_PER_HOST,
+                 dns_cache_ttl: int = HTTP_DNS_CACHE_TTL, keepalive_timeout: float = HTTP_KEEPALIVE_TIMEOUT,
+                 latency_buckets_ms: List[float] = None):
+        self.logger = logging.getLogger('V3.SharedHTTPClient')
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.dns_cache_ttl = dns_cache_ttl
+        self.keepalive_timeout = keepalive_timeout
+        self.latency_buckets_ms = sorted(latency_buckets_ms or HTTP_LATENCY_BUCKETS_MS)
+
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._lock = asyncio.Lock()
+        self._reset_stats()
+
+    def _reset_stats(self):
+        """Inicializa los contadores de peticiones."""
+        # Un bucket extra para las peticiones por encima del último límite
+        self._latency_counts = [0] * (len(self.latency_buckets_ms) + 1)
+        self._latency_sum_ms = 0.0
+        self._status_counts: Counter = Counter()
+        self._error_counts: Counter = Counter()
+        self._host_counts: Counter = Counter()
+        self._connections_created = 0
+        self._connections_reused = 0
+        self._in_flight = 0
+
+    async def get_session(self) -> aiohttp.ClientSession:
+        """Retorna la sesión compartida, creándola la primera vez."""
+        if self._session is None or self._session.closed:
+            async with self._lock:
+                if self._session is None or self._session.closed:
+                    self._session = self._create_session()
+        return self._session
+
+    def _create_session(self) -> aiohttp.ClientSession:
+        """Crea la sesión con el pool ajustado y los hooks de métricas."""
+        connector = aiohttp.TCPConnector(
+            limit=self.limit,
+            limit_per_host=self.limit_per_host,
+            use_dns_cache=True,
+            ttl_dns_cache=self.dns_cache_ttl,
+            keepalive_timeout=self.keepalive_timeout,
+            enable_cleanup_closed=True
+        )
+
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_request_start.append(self._on_request_start)
+        trace_config.on_request_end.append(self._on_request_end)
+        trace_config.on_request_exception.append(self._on_request_exception)
+        trace_config.on_connection_create_end.append(self._on_connection_create_end)
+        trace_config.on_connection_reuseconn.append(self._on_connection_reuseconn)
+
+        self.logger.info(
+            f"Sesión HTTP compartida creada (límite {self.limit}, {self.limit_per_host} por host, "
+            f"DNS cache {self.dns_cache_ttl}s, keep-alive {self.keepalive_timeout}s)"
+        )
+        return aiohttp.ClientSession(connector=connector, trace_configs=[trace_config])
+
+    async def close(self):
+        """Cierra la sesión y su pool de conexiones."""
+        if self._session and not self._session.closed:
+            await self._session.close()
+            self.logger.info("Sesión HTTP compartida cerrada")
+        self._session = None
+
+    # Hooks de TraceConfig
+
+    async def _on_request_start(self, session, trace_config_ctx, params):
+        trace_config_ctx.start = asyncio.get_running_loop().time()
+        self._in_flight += 1
+        self._host_counts[params.url.host] += 1
+
+    def _record_latency(self, trace_config_ctx):
+        self._in_flight -= 1
+        start = getattr(trace_config_ctx, 'start', None)
+        if start is None:
+            return
+        elapsed_ms = (asyncio.get_running_loop().time() - start) * 1000
+        self._latency_counts[bisect.bisect_left(self.latency_buckets_ms, elapsed_ms)] += 1
+        self._latency_sum_ms += elapsed_ms
+
+    async def _on_request_end(self, session, trace_config_ctx, params):
+        self._record_latency(trace_config_ctx)
+        self._status_counts[params.response.status] += 1
+
+    async def _on_request_exception(self, session, trace_config_ctx, params):
+        self._record_latency(trace_config_ctx)
+        self._error_counts[type(params.exception).__name__] += 1
+
+    async def _on_connection_create_end(self, session, trace_config_ctx, params):
+        self._connections_created += 1
+
+    async def _on_connection_reuseconn(self, session, trace_config_ctx, params):
+        self._connections_reused += 1
+
+    # Métricas
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Retorna métricas de peticiones: histograma de latencia, códigos de estado y reutilización."""
+        total = sum(self._latency_counts)
+        lower_bounds = [0] + self.latency_buckets_ms[:-1]
+        histogram = {
+            f"{lower:g}-{upper:g}ms": count
+            for lower, upper, count in zip(lower_bounds, self.latency_buckets_ms, self._latency_counts)
+        }
+        histogram[f">{self.latency_buckets_ms[-1]:g}ms"] = self._latency_counts[-1]
+
+        connections = self._connections_created + self._connections_reused
+        return {
+            'requests': total,
+            'in_flight': self._in_flight,
+            'avg_latency_ms': round(self._latency_sum_ms / total, 2) if total else 0.0,
+            'latency_histogram_ms': histogram,
+            'status_counts': {str(status): count for status, count in self._status_counts.items()},
+            'error_counts': dict(self._error_counts),
+            'requests_by_host': dict(self._host_counts),
+            'connections_created': self._connections_created,
+            'connections_reused': self._connections_reused,
+            'connection_reuse_ratio': round(self._connections_reused / connections, 4) if connections else 0.0,
+            'pool': {
+                'limit': self.limit,
+                'limit_per_host': self.limit_per_host,
+                'dns_cache_ttl': self.dns_cache_ttl,
+                'keepalive_timeout': self.keepalive_timeout
+            }
+        }
@@ -0,0 +1,164 @@
+# Simos/V3/adapters/connectors/ingest_queue.py
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Dict, Any, Optional, Callable, Awaitable, Iterable
+
+from shared.config_v3 import (
+    SEBO_INGEST_QUEUE_SIZE, SEBO_INGEST_LATEST_WINS_EVENTS, SEBO_INGEST_LATENCY_SAMPLES
+)
+from shared.utils import calculate_percentiles
+
+class IngestQueue:
+    """
+    Cola acotada entre los eventos de Socket.IO y sus consumidores.
+
+    Los handlers de Socket.IO solo encolan (O(1), sin esperar a nadie) y una
+    tarea consumidora dedicada entrega los eventos en orden. Para los eventos
+    de tipo snapshot (ej: top_20_data, balances-update) solo se conserva el
+    último valor pendiente; si la cola se llena se descarta el evento más
+    antiguo de los demás tipos. Así un consumidor lento nunca retrasa la
+    lectura del socket de Sebo.
+    """
+
+    def __init__(self, max_size: int = SEBO_INGEST_QUEUE_SIZE,
+                 latest_wins_events: Iterable[str] = SEBO_INGEST_LATEST_WINS_EVENTS,
+                 latency_samples: int = SEBO_INGEST_LATENCY_SAMPLES):
+        self.logger = logging.getLogger('V3.IngestQueue')
+        self.max_size = max_size
+        self.latest_wins_events = set(latest_wins_events)
+
+        # Entradas: (evento, datos, handler, momento de encolado);
+        # para eventos latest-wins los datos viven en _latest
+        self._queue: deque = deque()
+        self._latest: Dict[str, tuple] = {}
+        self._wakeup = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._consumer_task: Optional[asyncio.Task] = None
+        self._busy = False
+
+        self._wait_ms: deque = deque(maxlen=latency_samples)
+        self._handler_ms: deque = deque(maxlen=latency_samples)
+        self.stats: Dict[str, Dict[str, int]] = {}
+        self.max_queue_depth = 0
+
+    def _event_stats(self, event: str) -> Dict[str, int]:
+        """Contadores de un tipo de evento."""
+        if event not in self.stats:
+            self.stats[event] = {'received': 0, 'processed': 0, 'coalesced': 0, 'dropped': 0, 'errors': 0}
+        return self.stats[event]
+
+    def start(self):
+        """Inicia la tarea consumidora (requiere un loop en ejecución)."""
+        if self._consumer_task is None or self._consumer_task.done():
+            self._consumer_task = asyncio.create_task(self._consumer_loop())
+
+    def put(self, event: str, data: Any, handler: Callable[[Any], Awaitable]):
+        """Encola un evento sin bloquear."""
+        self.start()
+        stats = self._event_stats(event)
+        stats['received'] += 1
+        self._idle.clear()
+
+        entry = (data, handler, time.perf_counter())
+        if event in self.latest_wins_events:
+            if event in self._latest:
+                # Ya hay uno pendiente: reemplazarlo manteniendo su posición en la cola
+                # (se conserva el momento de encolado del primero para medir la espera real)
+                self._latest[event] = (data, handler, self._latest[event][2])
+                stats['coalesced'] += 1
+                return
+            self._latest[event] = entry
+            self._queue.append((event, None))
+        else:
+            self._queue.append((event, entry))
+
+        if len(self._queue) > self.max_size:
+            self._drop_oldest()
+
+        self.max_queue_depth = max(self.max_queue_depth, len(self._queue))
+        self._wakeup.set()
+
+    def _drop_oldest(self):
+        """
+        Descarta el evento pendiente más antiguo que no sea un snapshot.
+
+        Los snapshots ocupan un único lugar por tipo y su último valor es el
+        estado vigente, así que nunca se descartan.
+        """
+        for index, (event, entry) in enumerate(self._queue):
+            if entry is not None:
+                del self._queue[index]
+                self._event_stats(event)['dropped'] += 1
+                self.logger.warning(f"Cola de ingesta llena, descartado evento {event}")
+                return
+
+    async def _consumer_loop(self):
+        """Entrega los eventos encolados a sus handlers, uno a la vez y en orden."""
+        try:
+            while True:
+                if not self._queue:
+                    self._idle.set()
+                    self._wakeup.clear()
+                    await self._wakeup.wait()
+                    continue
+
+                event, entry = self._queue.popleft()
+                if entry is None:
+                    entry = self._latest.pop(event, None)
+                    if entry is None:
+                        continue
+                data, handler, enqueued_at = entry
+
+                self._busy = True
+                started = time.perf_counter()
+                self._wait_ms.append((started - enqueued_at) * 1000)
+                try:
+                    await handler(data)
+                    self._event_stats(event)['processed'] += 1
+                except Exception as e:
+                    self._event_stats(event)['errors'] += 1
+                    self.logger.error(f"Error procesando evento {event} de la cola de ingesta: {e}")
+                finally:
+                    self._handler_ms.append((time.perf_counter() - started) * 1000)
+                    self._busy = False
+
+        except asyncio.CancelledError:
+            pass
+
+    async def wait_idle(self):
+        """Espera hasta que no queden eventos pendientes ni en proceso."""
+        while self._queue or self._busy:
+            self._idle.clear()
+            await self._idle.wait()
+
+    async def stop(self):
+        """Detiene la tarea consumidora descartando los eventos pendientes."""
+        self._queue.clear()
+        self._latest.clear()
+        self._idle.set()
+        if self._consumer_task and not self._consumer_task.done():
+            self._consumer_task.cancel()
+            try:
+                await self._consumer_task
+            except asyncio.CancelledError:
+                pass
+        self._consumer_task = None
+
+    @property
+    def queue_depth(self) -> int:
+        """Eventos pendientes de entrega."""
+        return len(self._queue)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Retorna contadores por evento y latencias de espera y proceso."""
+        return {
+            'queue_depth': self.queue_depth,
+            'max_queue_depth': self.max_queue_depth,
+            'by_event': {event: dict(stats) for event, stats in self.stats.items()},
+            'queue_wait_ms': calculate_percentiles(list(self._wait_ms)),
+            'handler_ms': calculate_percentiles(list(self._handler_ms))
+        }
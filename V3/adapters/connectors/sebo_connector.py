@@ -3,22 +3,58 @@
 import asyncio
 import logging
 import json
+import random
+import time
 import urllib.parse
 from typing import Dict, Any, Optional, List, Callable
 import socketio
 import aiohttp
-from shared.config_v3 import WEBSOCKET_URL, SEBO_API_BASE_URL, REQUEST_TIMEOUT
-from shared.utils import make_http_request, safe_dict_get, get_current_timestamp
+from shared.config_v3 import (
+    WEBSOCKET_URL, SEBO_API_BASE_URL, REQUEST_TIMEOUT, WEBSOCKET_RECONNECT_DELAY,
+    WEBSOCKET_RECONNECT_MAX_DELAY, MAX_RECONNECT_ATTEMPTS, SEBO_RESYNC_TOP_OPPORTUNITIES,
+    SINGLE_FLIGHT_TTLS
+)
+from shared.utils import make_http_request, safe_dict_get, get_current_timestamp, calculate_percentiles
+from adapters.connectors.ingest_queue import IngestQueue
+from adapters.connectors.http_client import SharedHTTPClient
+from shared.single_flight import SingleFlight
+from shared.tracing import sebo_received_at
+from shared.metrics import registry
+
+SEBO_EVENTS = registry.counter("simos_sebo_events_received", "Eventos Socket.IO recibidos de Sebo", ["event"])
+SEBO_CONNECTED = registry.gauge("simos_sebo_connected", "1 si la conexión Socket.IO con Sebo está activa")
+SEBO_RECONNECTS = registry.counter("simos_sebo_reconnects", "Reconexiones exitosas a Sebo")
+SEBO_DOWNTIME = registry.counter("simos_sebo_downtime_seconds", "Tiempo total sin conexión con Sebo")
+INGEST_QUEUE_DEPTH = registry.gauge("simos_sebo_ingest_queue_depth", "Eventos pendientes en la cola de ingesta")
+INGEST_EVENTS = registry.counter(
+    "simos_sebo_ingest_events", "Eventos de la cola de ingesta por resultado", ["event", "result"]
+)
+INGEST_WAIT_P95 = registry.gauge("simos_sebo_ingest_wait_p95_seconds", "p95 de la espera en la cola de ingesta")
+HTTP_REQUESTS = registry.counter("simos_sebo_http_requests", "Peticiones HTTP a Sebo por código", ["status"])
+HTTP_CONNECTIONS = registry.counter(
+    "simos_sebo_http_connections", "Conexiones HTTP usadas por peticiones a Sebo", ["kind"]
+)
 
 class SeboConnector:
     """Maneja la conexión con el servidor Sebo (Socket.IO y API REST)."""
     
-    def __init__(self):
+    def __init__(self, http_client: SharedHTTPClient = None):
         self.logger = logging.getLogger('V3.SeboConnector')
-        self.sio = socketio.AsyncClient(logger=False, engineio_logger=False)
+        # La reconexión la maneja el supervisor (wait_for_connection), no python-socketio
+        self.sio = socketio.AsyncClient(reconnection=False, logger=False, engineio_logger=False)
+        parsed_url = urllib.parse.urlparse(WEBSOCKET_URL)
+        self.sebo_base_url = f"{parsed_url.scheme}://{parsed_url.netloc}"
+        self.namespace = parsed_url.path or '/'
+        # Pool HTTP compartido con los demás adaptadores de Sebo (propio si no se inyecta)
+        self._owns_http_client = http_client is None
+        self.http_client = http_client or SharedHTTPClient()
         self.http_session: Optional[aiohttp.ClientSession] = None
         self.is_connected = False
         
+        # Peticiones REST concurrentes idénticas comparten una sola llamada
+        self.balance_config_flight = SingleFlight('balance_config', SINGLE_FLIGHT_TTLS['balance_config'])
+        self.withdrawal_fees_flight = SingleFlight('withdrawal_fees', SINGLE_FLIGHT_TTLS['withdrawal_fees'])
+        
         # Callbacks para eventos
         # self.on_spot_arb_callback: Optional[Callable] = None
         self.on_balances_update_callback: Optional[Callable] = None
@@ -28,42 +64,88 @@ class SeboConnector:
         self.latest_top20_data: List[Dict] = []
         self.latest_balances: Optional[Dict] = None
         
+        # Grabador opcional de eventos entrantes (ver SeboEventRecorder)
+        self.recorder = None
+        
+        # Los handlers de Socket.IO solo encolan; los callbacks corren en la tarea consumidora
+        self.ingest_queue = IngestQueue()
+        
+        # Supervisión de la conexión
+        self._disconnected = asyncio.Event()
+        self._closing = False
+        self._outage_started: Optional[float] = None
+        self._outage_durations: List[float] = []
+        self.connection_stats = {
+            'connects': 0,
+            'disconnects': 0,
+            'reconnects': 0,
+            'failed_attempts': 0,
+            'consecutive_failures': 0,
+            'resyncs': 0,
+            'last_connected_at': None,
+            'last_disconnected_at': None,
+            'last_error': None,
+            'total_downtime_seconds': 0.0
+        }
+        
         self._register_sio_handlers()
+        registry.register_collector('sebo_connector', self._collect_metrics)
     
     async def initialize(self):
-        """Inicializa la sesión HTTP."""
+        """Obtiene la sesión HTTP compartida."""
         if self.http_session is None or self.http_session.closed:
-            self.http_session = aiohttp.ClientSession()
+            self.http_session = await self.http_client.get_session()
     
     async def cleanup(self):
         """Limpia recursos."""
+        await self.ingest_queue.stop()
+        
         if self.sio.connected:
             await self.sio.disconnect()
         
-        if self.http_session and not self.http_session.closed:
-            await self.http_session.close()
+        # La sesión compartida la cierra su dueño
+        if self._owns_http_client:
+            await self.http_client.close()
     
     def _register_sio_handlers(self):
-        """Registra los handlers para eventos de Socket.IO."""
+        """
+        Registra los handlers para eventos de Socket.IO.
         
-        @self.sio.event
-        async def connect():
-            self.logger.info("Conectado a Sebo Socket.IO")
-            self.is_connected = True
-        
-        @self.sio.event
-        async def disconnect():
-            self.logger.warning("Desconectado de Sebo Socket.IO")
-            self.is_connected = False
+        connect/disconnect se registran en el namespace de Sebo: python-socketio
+        solo los dispara para los namespaces a los que el cliente se unió.
+        """
+        self.sio.on('connect', self._on_sio_connect, namespace=self.namespace)
+        self.sio.on('disconnect', self._on_sio_disconnect, namespace=self.namespace)
+        self.sio.on('connect_error', self._on_sio_connect_error, namespace=self.namespace)
         
         # Handler para datos de arbitraje spot
-        # self.sio.on('spot-arb', namespace='/api/spot/arb')(self._on_spot_arb_data)
+        # self.sio.on('spot-arb', namespace=self.namespace)(self._on_spot_arb_data)
         
         # Handler para actualizaciones de balance
-        self.sio.on('balances-update', namespace='/api/spot/arb')(self._on_balances_update)
+        self.sio.on('balances-update', namespace=self.namespace)(self._on_balances_update)
         
         # Handler para datos del top 20
-        self.sio.on('top_20_data', namespace='/api/spot/arb')(self._on_top20_data)
+        self.sio.on('top_20_data', namespace=self.namespace)(self._on_top20_data)
+    
+    async def _on_sio_connect(self):
+        self.logger.info("Conectado a Sebo Socket.IO")
+        self.is_connected = True
+        self._disconnected.clear()
+        self.connection_stats['connects'] += 1
+        self.connection_stats['last_connected_at'] = get_current_timestamp()
+    
+    async def _on_sio_disconnect(self, reason: Any = None):
+        self.logger.warning(f"Desconectado de Sebo Socket.IO{f' ({reason})' if reason else ''}")
+        self.is_connected = False
+        if not self._closing:
+            # Despertar al supervisor de inmediato
+            self.connection_stats['disconnects'] += 1
+            self.connection_stats['last_disconnected_at'] = get_current_timestamp()
+            self._disconnected.set()
+    
+    async def _on_sio_connect_error(self, data: Any = None):
+        self.logger.warning(f"Sebo rechazó la conexión al namespace {self.namespace}: {data}")
+        self.connection_stats['last_error'] = str(data)
     
     # async def _on_spot_arb_data(self, data: Dict):
     #     """Maneja datos de arbitraje spot recibidos de Sebo."""
@@ -76,26 +158,53 @@ class SeboConnector:
     #     except Exception as e:
     #         self.logger.error(f"Error procesando spot-arb data: {e}")
     
+    @staticmethod
+    def _with_receipt_time(callback: Callable) -> Callable:
+        """
+        Envuelve un callback para que el consumidor vea el momento de llegada del evento.
+
+        Las trazas de latencia (shared/tracing.py) lo usan como origen, así la
+        espera en la cola de ingesta cuenta dentro de la etapa "ingest".
+        """
+        received_at = time.perf_counter()
+
+        async def deliver(data):
+            token = sebo_received_at.set(received_at)
+            try:
+                await callback(data)
+            finally:
+                sebo_received_at.reset(token)
+
+        return deliver
+    
     async def _on_balances_update(self, data: Dict):
         """Maneja actualizaciones de balance recibidas de Sebo."""
         try:
+            SEBO_EVENTS.inc(event='balances-update')
+            if self.recorder:
+                self.recorder.record('balances-update', data)
+            
             self.logger.info(f"Recibida actualización de balances: {len(data) if isinstance(data, (list, dict)) else 'Invalid'}")
             self.latest_balances = data
             
             if self.on_balances_update_callback:
-                await self.on_balances_update_callback(data)
+                self.ingest_queue.put('balances-update', data, self._with_receipt_time(self.on_balances_update_callback))
         except Exception as e:
             self.logger.error(f"Error procesando balances-update: {e}")
     
     async def _on_top20_data(self, data: List[Dict]):
         """Maneja datos del top 20 recibidos de Sebo."""
         try:
+            SEBO_EVENTS.inc(event='top_20_data')
+            if self.recorder:
+                self.recorder.record('top_20_data', data)
+            
             if isinstance(data, list):
                 self.logger.info(f"Recibidos datos top 20: {len(data)} items")
                 self.latest_top20_data = data
                 
                 if self.on_top20_data_callback:
-                    await self.on_top20_data_callback(data)
+                    self.ingest_queue.put('top_20_data', data, self._with_receipt_time(self.on_top20_data_callback))
             else:
                 self.logger.warning(f"Datos top 20 con formato inesperado: {type(data)}")
         except Exception as e:
@@ -104,25 +213,86 @@ class SeboConnector:
     async def connect_to_sebo(self) -> bool:
         """Conecta al servidor Sebo via Socket.IO."""
         try:
-            parsed_url = urllib.parse.urlparse(WEBSOCKET_URL)
-            sebo_base_url = f"{parsed_url.scheme}://{parsed_url.netloc}"
-            namespace = parsed_url.path if parsed_url.path else '/'
-            
-            self.logger.info(f"Conectando a Sebo Socket.IO: {sebo_base_url} (namespace: {namespace})")
+            self.logger.info(f"Conectando a Sebo Socket.IO: {self.sebo_base_url} (namespace: {self.namespace})")
             
-            await self.sio.connect(sebo_base_url, namespaces=[namespace])
+            self._closing = False
+            await self.sio.connect(self.sebo_base_url, namespaces=[self.namespace])
             return True
             
         except Exception as e:
             self.logger.error(f"Error conectando a Sebo Socket.IO: {e}")
+            self.connection_stats['last_error'] = str(e)
             return False
     
     async def disconnect_from_sebo(self):
-        """Desconecta del servidor Sebo."""
+        """Desconecta del servidor Sebo y detiene la supervisión."""
+        self._closing = True
+        self._disconnected.set()  # Liberar al supervisor si está esperando
         if self.sio.connected:
             await self.sio.disconnect()
             self.logger.info("Desconectado de Sebo Socket.IO")
     
+    def _reconnect_delay(self, attempt: int) -> float:
+        """
+        Backoff exponencial con jitter para el intento N (desde 1).
+
+        Se usa "equal jitter": la mitad fija y la otra mitad aleatoria, para que
+        varias instancias no reconecten en sincronía tras una caída de Sebo.
+        """
+        exponent = min(attempt, MAX_RECONNECT_ATTEMPTS) - 1
+        delay = min(WEBSOCKET_RECONNECT_MAX_DELAY, WEBSOCKET_RECONNECT_DELAY * (2 ** exponent))
+        return delay / 2 + random.uniform(0, delay / 2)
+    
+    async def _reconnect(self):
+        """Reintenta la conexión hasta lograrlo o hasta que se pida cerrar."""
+        self._outage_started = time.monotonic()
+        attempt = 0
+        
+        while not self._closing:
+            attempt += 1
+            delay = self._reconnect_delay(attempt)
+            self.logger.info(f"Reconectando a Sebo (intento {attempt}) en {delay:.1f}s")
+            await asyncio.sleep(delay)
+            if self._closing:
+                return
+            
+            if self.sio.connected or await self.connect_to_sebo():
+                break
+            
+            self.connection_stats['failed_attempts'] += 1
+            self.connection_stats['consecutive_failures'] = attempt
+            if attempt == MAX_RECONNECT_ATTEMPTS:
+                self.logger.error(
+                    f"Sebo sigue sin responder tras {attempt} intentos; "
+                    f"se seguirá reintentando cada ~{WEBSOCKET_RECONNECT_MAX_DELAY}s"
+                )
+        
+        if self._closing:
+            return
+        
+        outage = time.monotonic() - self._outage_started
+        self._outage_started = None
+        self._outage_durations = (self._outage_durations + [outage])[-100:]
+        self.connection_stats['reconnects'] += 1
+        self.connection_stats['consecutive_failures'] = 0
+        self.connection_stats['total_downtime_seconds'] += outage
+        self.logger.info(f"Reconectado a Sebo tras {outage:.1f}s sin conexión ({attempt} intentos)")
+        
+        await self._resync_state()
+    
+    async def _resync_state(self):
+        """Rellena el cache con el estado actual de Sebo tras una reconexión."""
+        # Los eventos emitidos durante la caída se perdieron: pedir el Top 20 vigente por REST
+        opportunities = await self.get_top_opportunities(SEBO_RESYNC_TOP_OPPORTUNITIES)
+        if opportunities:
+            self.latest_top20_data = opportunities
+            if self.on_top20_data_callback:
+                self.ingest_queue.put('top_20_data', opportunities, self._with_receipt_time(self.on_top20_data_callback))
+            self.connection_stats['resyncs'] += 1
+            self.logger.info(f"Estado re-sincronizado con Sebo: {len(opportunities)} oportunidades")
+        else:
+            self.logger.warning("No se pudo re-sincronizar el Top 20; se esperará el próximo evento de Sebo")
+    
     # API REST methods
     
     async def get_balance_config(self, exchange_id: str) -> Optional[Dict]:
@@ -130,6 +300,12 @@ class SeboConnector:
         if not exchange_id:
             return None
         
+        return await self.balance_config_flight.do(
+            exchange_id, lambda: self._fetch_balance_config(exchange_id)
+        )
+    
+    async def _fetch_balance_config(self, exchange_id: str) -> Optional[Dict]:
+        """Pide la configuración de balance a Sebo."""
         await self.initialize()
         url = f"{SEBO_API_BASE_URL}/balances/exchange/{exchange_id}"
         
@@ -165,6 +341,9 @@ class SeboConnector:
             self.http_session, 'PUT', url, timeout=REQUEST_TIMEOUT, json=payload
         )
         
+        # Lo cacheado (si hay TTL) ya no es válido
+        self.balance_config_flight.invalidate(exchange_id)
+        
         if result:
             self.logger.info(f"Balance actualizado para {exchange_id}: {result.get('balance_usdt')} USDT")
             return True
@@ -177,6 +356,12 @@ class SeboConnector:
         if not exchange_id or not symbol:
             return None
         
+        return await self.withdrawal_fees_flight.do(
+            (exchange_id, symbol), lambda: self._fetch_withdrawal_fees(exchange_id, symbol)
+        )
+    
+    async def _fetch_withdrawal_fees(self, exchange_id: str, symbol: str) -> Optional[Dict]:
+        """Pide las tarifas de retiro a Sebo."""
         await self.initialize()
         url = f"{SEBO_API_BASE_URL}/exchanges/{exchange_id}/withdrawal-fees/{symbol}"
         
@@ -223,6 +408,10 @@ class SeboConnector:
         """Establece el callback para datos del top 20."""
         self.on_top20_data_callback = callback
     
+    def set_recorder(self, recorder):
+        """Establece el grabador de eventos entrantes (None para desactivar)."""
+        self.recorder = recorder
+    
     # Getters para datos cacheados
     
     def get_latest_top20_data(self) -> List[Dict]:
@@ -233,10 +422,68 @@ class SeboConnector:
         """Retorna los últimos datos de balances."""
         return self.latest_balances
     
+    async def wait_ingest_idle(self):
+        """Espera a que los consumidores procesen todos los eventos encolados."""
+        await self.ingest_queue.wait_idle()
+    
+    def get_connection_stats(self) -> Dict[str, Any]:
+        """Retorna métricas de conexión y de caídas (outages) con Sebo."""
+        stats = dict(self.connection_stats)
+        stats['connected'] = self.is_connected
+        stats['current_outage_seconds'] = (
+            time.monotonic() - self._outage_started if self._outage_started is not None else 0.0
+        )
+        stats['outage_seconds'] = calculate_percentiles(self._outage_durations)
+        stats['max_outage_seconds'] = max(self._outage_durations, default=0.0)
+        return stats
+    
+    def get_request_coalescing_stats(self) -> Dict[str, Any]:
+        """Retorna estadísticas de deduplicación de las peticiones REST a Sebo."""
+        return {
+            'balance_config': self.balance_config_flight.get_stats(),
+            'withdrawal_fees': self.withdrawal_fees_flight.get_stats()
+        }
+    
+    def get_ingest_stats(self) -> Dict[str, Any]:
+        """Retorna estadísticas de la cola de ingesta (descartes, coalescencia, latencias)."""
+        return self.ingest_queue.get_stats()
+    
+    def _collect_metrics(self):
+        """Copia a las métricas el estado de conexión, de la cola de ingesta y del pool HTTP."""
+        SEBO_CONNECTED.set(1 if self.is_connected else 0)
+        SEBO_RECONNECTS.set_total(self.connection_stats['reconnects'])
+        SEBO_DOWNTIME.set_total(self.connection_stats['total_downtime_seconds'])
+        
+        ingest = self.ingest_queue.get_stats()
+        INGEST_QUEUE_DEPTH.set(ingest['queue_depth'])
+        INGEST_WAIT_P95.set(ingest['queue_wait_ms'].get('p95', 0.0) / 1000)
+        for event, counters in ingest['by_event'].items():
+            for result in ('processed', 'coalesced', 'dropped', 'errors'):
+                INGEST_EVENTS.set_total(counters[result], event=event, result=result)
+        
+        http = self.http_client.get_stats()
+        for status, count in http['status_counts'].items():
+            HTTP_REQUESTS.set_total(count, status=status)
+        HTTP_CONNECTIONS.set_total(http['connections_created'], kind='created')
+        HTTP_CONNECTIONS.set_total(http['connections_reused'], kind='reused')
+    
     async def wait_for_connection(self):
-        """Mantiene la conexión Socket.IO activa."""
+        """
+        Supervisa la conexión Socket.IO hasta que se llame a disconnect_from_sebo.
+
+        Cada desconexión se detecta por el evento de Socket.IO (sin sondeo) y
+        dispara la reconexión con backoff y la re-sincronización del estado.
+        """
         try:
-            await self.sio.wait()
+            if not self.is_connected and not self._closing:
+                self._disconnected.set()
+            
+            while not self._closing:
+                await self._disconnected.wait()
+                if self._closing:
+                    break
+                self._disconnected.clear()
+                await self._reconnect()
         except Exception as e:
             self.logger.error(f"Error en conexión Socket.IO: {e}")
             raise
@@ -0,0 +1,242 @@
+# Simos/V3/adapters/connectors/sebo_replay.py
+
+import asyncio
+import csv
+import json
+import logging
+import time
+from typing import Dict, Any, List, Tuple
+
+from shared.config_v3 import REPLAY_DEFAULT_SPEED, REPLAY_DEFAULT_INTERVAL_SECONDS, REPLAY_SNAPSHOT_SIZE
+from shared.utils import safe_float, calculate_percentiles, get_current_timestamp, parse_timestamp
+from adapters.connectors.sebo_connector import SeboConnector
+from adapters.persistence.sebo_recorder import SeboEventLogReader
+
+# Un snapshot reproducible: (segundos desde el inicio de la grabación, items del top 20)
+ReplaySnapshot = Tuple[float, List[Dict]]
+
+def _parse_json_field(value: Any) -> Dict:
+    """Convierte un campo JSON serializado en CSV a diccionario."""
+    if isinstance(value, dict):
+        return value
+    if not value or not isinstance(value, str):
+        return {}
+    try:
+        parsed = json.loads(value)
+        return parsed if isinstance(parsed, dict) else {}
+    except (ValueError, TypeError):
+        return {}
+
+def csv_row_to_top20_item(row: Dict) -> Dict[str, Any]:
+    """Convierte una fila de CSV grabado (formato realData o top 20) a un item del top 20 de Sebo."""
+    # Filas ya en formato top 20: solo deserializar los fees
+    if row.get('exchange_min_id'):
+        item = dict(row)
+        item['fees_exMin'] = _parse_json_field(row.get('fees_exMin'))
+        item['fees_exMax'] = _parse_json_field(row.get('fees_exMax'))
+        item['price_at_exMin_to_buy_asset'] = safe_float(row.get('price_at_exMin_to_buy_asset'))
+        item['price_at_exMax_to_sell_asset'] = safe_float(row.get('price_at_exMax_to_sell_asset'))
+        return item
+
+    # Filas en formato realData_*.csv (datos de entrenamiento de Sebo)
+    symbol = row.get('symbol') or 'UNKNOWN/USDT'
+    buy_price = safe_float(row.get('current_price_buy'))
+    sell_price = safe_float(row.get('current_price_sell'))
+    percentage = ((sell_price - buy_price) / buy_price) * 100 if buy_price > 0 else 0.0
+    market_data = _parse_json_field(row.get('market_data'))
+
+    return {
+        'symbol': symbol,
+        'symbol_name': row.get('symbol_name') or symbol.split('/')[0],
+        'exchange_min_id': row.get('buy_exchange_id'),
+        'exchange_max_id': row.get('sell_exchange_id'),
+        'price_at_exMin_to_buy_asset': buy_price,
+        'price_at_exMax_to_sell_asset': sell_price,
+        'percentage_difference': f"{percentage:.4f}%",
+        'fees_exMin': market_data.get('buy_fees', {}),
+        'fees_exMax': market_data.get('sell_fees', {}),
+        'analysis_id': row.get('analysis_id'),
+        'timestamp': row.get('timestamp')
+    }
+
+class SeboReplayFeeder:
+    """Reproduce snapshots Top 20 grabados a través de la misma cadena de callbacks que Sebo."""
+
+    def __init__(self, sebo_connector: SeboConnector, speed: float = REPLAY_DEFAULT_SPEED,
+                 default_interval_seconds: float = REPLAY_DEFAULT_INTERVAL_SECONDS,
+                 snapshot_size: int = REPLAY_SNAPSHOT_SIZE):
+        self.logger = logging.getLogger('V3.SeboReplayFeeder')
+        self.sebo_connector = sebo_connector
+        self.speed = speed
+        self.default_interval_seconds = default_interval_seconds
+        self.snapshot_size = snapshot_size
+
+        self.is_running = False
+        self._stop_requested = False
+        self.stats = self._empty_stats()
+
+    def _empty_stats(self) -> Dict[str, Any]:
+        """Retorna estadísticas vacías de replay."""
+        return {
+            'source': None,
+            'speed': self.speed,
+            'snapshots_sent': 0,
+            'items_sent': 0,
+            'start_time': None,
+            'end_time': None,
+            'duration_seconds': 0.0,
+            'snapshots_per_second': 0.0,
+            'latency_ms': calculate_percentiles([]),
+            'max_latency_ms': 0.0,
+            'schedule_lag_ms': calculate_percentiles([]),
+            'ingest': None
+        }
+
+    # Carga de snapshots
+
+    def load_csv_snapshots(self, filepath: str) -> List[ReplaySnapshot]:
+        """Carga un CSV grabado y lo agrupa en snapshots del top 20."""
+        with open(filepath, 'r', encoding='utf-8', newline='') as csvfile:
+            items = [csv_row_to_top20_item(row) for row in csv.DictReader(csvfile)]
+
+        snapshots = self._group_snapshots(items)
+        self.logger.info(f"Cargados {len(snapshots)} snapshots ({len(items)} items) desde {filepath}")
+        return snapshots
+
+    def _group_snapshots(self, items: List[Dict]) -> List[ReplaySnapshot]:
+        """Agrupa items por timestamp; sin timestamps, en bloques de snapshot_size."""
+        if not items:
+            return []
+
+        timestamps = [parse_timestamp(item.get('timestamp')) for item in items]
+
+        if all(ts is not None for ts in timestamps):
+            grouped: Dict[float, List[Dict]] = {}
+            for ts, item in zip(timestamps, items):
+                grouped.setdefault(ts, []).append(item)
+
+            first_ts = min(grouped)
+            return [
+                (ts - first_ts, self._rank_snapshot(grouped[ts]))
+                for ts in sorted(grouped)
+            ]
+
+        return [
+            (index * self.default_interval_seconds, self._rank_snapshot(items[start:start + self.snapshot_size]))
+            for index, start in enumerate(range(0, len(items), self.snapshot_size))
+        ]
+
+    def _rank_snapshot(self, items: List[Dict]) -> List[Dict]:
+        """Ordena un snapshot por diferencia porcentual, como lo hace Sebo."""
+        ranked = sorted(
+            items,
+            key=lambda item: safe_float(item.get('percentage_difference')),
+            reverse=True
+        )
+        return ranked[:self.snapshot_size]
+
+    # Reproducción
+
+    async def replay_csv(self, filepath: str, speed: float = None) -> Dict[str, Any]:
+        """Carga y reproduce un CSV grabado."""
+        snapshots = self.load_csv_snapshots(filepath)
+        return await self.replay(snapshots, speed=speed, source=filepath)
+
+    async def replay_recording(self, directory: str, start_time: float = None,
+                               end_time: float = None, speed: float = None) -> Dict[str, Any]:
+        """Reproduce eventos top_20_data grabados por SeboEventRecorder, opcionalmente acotados por tiempo."""
+        reader = SeboEventLogReader(directory)
+        snapshots = reader.load_top20_snapshots(start_time, end_time)
+        self.logger.info(f"Cargados {len(snapshots)} snapshots grabados desde {directory}")
+        return await self.replay(snapshots, speed=speed, source=directory)
+
+    async def replay(self, snapshots: List[ReplaySnapshot], speed: float = None,
+                     source: str = None) -> Dict[str, Any]:
+        """
+        Reproduce snapshots respetando su espaciado temporal.
+
+        Args:
+            snapshots: Lista de (offset en segundos, items del top 20)
+            speed: Factor de aceleración; 0 o negativo reproduce tan rápido como sea posible
+            source: Descripción del origen para las estadísticas
+
+        Returns:
+            Estadísticas del replay, incluyendo latencia de la cadena de callbacks
+        """
+        if self.is_running:
+            raise RuntimeError("Ya hay un replay en curso")
+
+        if speed is not None:
+            self.speed = speed
+
+        self.is_running = True
+        self._stop_requested = False
+        self.stats = self._empty_stats()
+        self.stats['source'] = source
+        self.stats['start_time'] = get_current_timestamp()
+
+        latencies_ms: List[float] = []
+        lags_ms: List[float] = []
+        as_fast_as_possible = self.speed <= 0
+
+        self.logger.info(
+            f"Iniciando replay de {len(snapshots)} snapshots "
+            f"({'máxima velocidad' if as_fast_as_possible else f'velocidad x{self.speed}'})"
+        )
+
+        replay_start = time.perf_counter()
+
+        try:
+            for offset, items in snapshots:
+                if self._stop_requested:
+                    self.logger.info("Replay detenido por solicitud")
+                    break
+
+                # Programar contra el reloj de inicio para no acumular deriva
+                if not as_fast_as_possible:
+                    target = replay_start + offset / self.speed
+                    delay = target - time.perf_counter()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                    lags_ms.append(max(0.0, (time.perf_counter() - target) * 1000))
+
+                # El handler solo encola: esperar a la tarea consumidora para medir
+                # la cadena completa y que cada snapshot se procese (sin coalescer)
+                dispatch_start = time.perf_counter()
+                await self.sebo_connector._on_top20_data(items)
+                await self.sebo_connector.wait_ingest_idle()
+                latencies_ms.append((time.perf_counter() - dispatch_start) * 1000)
+
+                self.stats['snapshots_sent'] += 1
+                self.stats['items_sent'] += len(items)
+
+                # Ceder el loop para que la UI y otras tareas avancen
+                if as_fast_as_possible:
+                    await asyncio.sleep(0)
+
+        finally:
+            duration = time.perf_counter() - replay_start
+            self.is_running = False
+            self.stats['end_time'] = get_current_timestamp()
+            self.stats['duration_seconds'] = duration
+            self.stats['snapshots_per_second'] = (
+                self.stats['snapshots_sent'] / duration if duration > 0 else 0.0
+            )
+            self.stats['latency_ms'] = calculate_percentiles(latencies_ms)
+            self.stats['max_latency_ms'] = max(latencies_ms) if latencies_ms else 0.0
+            self.stats['schedule_lag_ms'] = calculate_percentiles(lags_ms)
+            self.stats['ingest'] = self.sebo_connector.get_ingest_stats()
+
+        self.logger.info(
+            f"Replay completado: {self.stats['snapshots_sent']} snapshots en {duration:.2f}s "
+            f"(p95 latencia: {self.stats['latency_ms']['p95']:.2f} ms)"
+        )
+        return self.get_stats()
+
+    def stop(self):
+        """Solicita detener el replay en curso."""
+        self._stop_requested = True
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Retorna las estadísticas del último replay."""
+        return dict(self.stats)
@@ -7,25 +7,28 @@ import aiohttp
 
 from shared.config_v3 import SEBO_API_BASE_URL, REQUEST_TIMEOUT
 from shared.utils import make_http_request
+from adapters.connectors.http_client import SharedHTTPClient
 
 class SeboSymbolsAPI:
     """API para obtener símbolos desde Sebo."""
     
-    def __init__(self):
+    def __init__(self, http_client: SharedHTTPClient = None):
         self.logger = logging.getLogger('V3.SeboSymbolsAPI')
+        self._owns_http_client = http_client is None
+        self.http_client = http_client or SharedHTTPClient()
         self.http_session: Optional[aiohttp.ClientSession] = None
         self.symbols_cache: List[Dict] = []
         self.cache_timestamp = None
         
     async def initialize(self):
-        """Inicializa la sesión HTTP."""
+        """Obtiene la sesión HTTP compartida."""
         if self.http_session is None or self.http_session.closed:
-            self.http_session = aiohttp.ClientSession()
+            self.http_session = await self.http_client.get_session()
     
     async def cleanup(self):
         """Limpia recursos."""
-        if self.http_session and not self.http_session.closed:
-            await self.http_session.close()
+        if self._owns_http_client:
+            await self.http_client.close()
     
     async def get_symbols(self, force_refresh: bool = False) -> List[Dict]:
         """
@@ -2,35 +2,157 @@
 
 import asyncio
 import logging
+import time
 from typing import Dict, Any, Optional, Tuple, List
 import ccxt.async_support as ccxt
-from shared.config_v3 import API_KEYS, SUPPORTED_EXCHANGES, PREFERRED_NETWORKS, REQUEST_TIMEOUT, EXCHANGE_SANDBOX_MODE, SANDBOX_API_KEYS
-from shared.utils import safe_float, find_cheapest_network, validate_exchange_id
+from shared.config_v3 import (
+    API_KEYS, SUPPORTED_EXCHANGES, PREFERRED_NETWORKS, REQUEST_TIMEOUT, EXCHANGE_SANDBOX_MODE, SANDBOX_API_KEYS,
+    SINGLE_FLIGHT_TTLS, EXCHANGE_BACKEND, EXCHANGE_INIT_TIMEOUT, EXCHANGE_INIT_LOAD_MARKETS,
+    EXCHANGE_INIT_RETRY_DELAY, EXCHANGE_INIT_RETRY_MAX_DELAY
+)
+from shared.utils import safe_float, find_cheapest_network, validate_exchange_id, get_current_timestamp
+from shared.single_flight import SingleFlight
+from adapters.exchanges.mock_exchange import MockExchange, MockMarketState
+from shared.metrics import registry
+
+EXCHANGE_REQUEST_SECONDS = registry.histogram(
+    "simos_exchange_request_seconds", "Latencia de llamadas CCXT", ["exchange", "method"]
+)
+EXCHANGE_ERRORS = registry.counter(
+    "simos_exchange_errors", "Errores en llamadas CCXT", ["exchange", "method", "error"]
+)
+ACTIVE_EXCHANGES = registry.gauge("simos_exchanges_active", "Exchanges con instancia CCXT activa")
+EXCHANGE_READY = registry.gauge("simos_exchange_ready", "1 si el exchange terminó su inicialización", ["exchange"])
 
 class ExchangeManager:
     """Maneja las interacciones con exchanges usando CCXT."""
     
-    def __init__(self):
+    def __init__(self, backend: str = None, mock_config: Dict[str, Any] = None):
         self.logger = logging.getLogger('V3.ExchangeManager')
+        # "ccxt" (exchanges reales) o "mock" (MockExchange, para pruebas de carga)
+        self.backend = backend or EXCHANGE_BACKEND
+        self.mock_config = mock_config
+        self._mock_market: Optional[MockMarketState] = None
         self.ccxt_instances: Dict[str, ccxt.Exchange] = {}
         self.exchange_info_cache: Dict[str, Dict] = {}
+        # Estado de inicialización por exchange: pending / ready / failed / retrying
+        self.exchange_readiness: Dict[str, Dict[str, Any]] = {}
+        self._retry_tasks: Dict[str, asyncio.Task] = {}
+        # Constructores CCXT en curso (en un hilo): si el timeout de init abandona la espera,
+        # el siguiente intento adopta el mismo constructor en vez de lanzar otro hilo
+        self._constructions: Dict[str, asyncio.Future] = {}
+        # Tickers pedidos a la vez por varias oportunidades comparten una sola llamada
+        self.ticker_flight = SingleFlight('ticker', SINGLE_FLIGHT_TTLS['ticker'])
+        registry.register_collector('exchange_manager', self._collect_metrics)
     
     async def initialize(self):
-        """Inicializa las instancias de CCXT para exchanges soportados."""
+        """
+        Inicializa los exchanges soportados a la vez, cada uno con su propio timeout.
+        
+        El arranque continúa con los que quedan listos; los demás se reintentan en
+        segundo plano con backoff hasta que respondan (ver get_readiness).
+        """
         self.logger.info("Inicializando ExchangeManager...")
+        start = time.perf_counter()
         
         for exchange_id in SUPPORTED_EXCHANGES:
+            self.exchange_readiness[exchange_id] = {
+                "status": "pending", "attempts": 0, "last_error": None, "ready_at": None, "init_ms": None
+            }
+        
+        # Todos a la vez: un exchange lento o caído no retrasa a los demás
+        await asyncio.gather(*(self._initialize_exchange(exchange_id) for exchange_id in SUPPORTED_EXCHANGES))
+        
+        pending = [exchange_id for exchange_id in SUPPORTED_EXCHANGES if not self.is_exchange_ready(exchange_id)]
+        for exchange_id in pending:
+            self._retry_tasks[exchange_id] = asyncio.create_task(self._retry_until_ready(exchange_id))
+        
+        ready_count = len(SUPPORTED_EXCHANGES) - len(pending)
+        self.logger.info(
+            f"ExchangeManager inicializado: {ready_count}/{len(SUPPORTED_EXCHANGES)} exchanges listos "
+            f"en {time.perf_counter() - start:.2f}s"
+            + (f"; reintentando en segundo plano: {', '.join(pending)}" if pending else "")
+        )
+    
+    async def _initialize_exchange(self, exchange_id: str) -> bool:
+        """Crea la instancia y carga markets dentro del timeout; actualiza el mapa de readiness."""
+        state = self.exchange_readiness[exchange_id]
+        state["attempts"] += 1
+        start = time.perf_counter()
+        
+        try:
+            await asyncio.wait_for(self._create_and_load_exchange(exchange_id), EXCHANGE_INIT_TIMEOUT)
+        except asyncio.TimeoutError:
+            error = f"timeout tras {EXCHANGE_INIT_TIMEOUT}s"
+        except Exception as e:
+            error = str(e) or type(e).__name__
+        else:
+            state.update(status="ready", last_error=None, ready_at=get_current_timestamp(),
+                         init_ms=round((time.perf_counter() - start) * 1000, 1))
+            self.logger.info(f"Exchange {exchange_id} listo en {state['init_ms']:.0f} ms")
+            return True
+        
+        state.update(status="failed", last_error=error)
+        await self._discard_exchange_instance(exchange_id)
+        self.logger.warning(f"Exchange {exchange_id} no listo (intento {state['attempts']}): {error}")
+        return False
+    
+    async def _create_and_load_exchange(self, exchange_id: str):
+        instance = await self._create_exchange_instance(exchange_id)
+        if instance is None:
+            raise RuntimeError("no se pudo crear la instancia CCXT")
+        if EXCHANGE_INIT_LOAD_MARKETS:
+            await instance.load_markets()
+    
+    async def _retry_until_ready(self, exchange_id: str):
+        """Reintenta la inicialización de un exchange con backoff exponencial hasta lograrla."""
+        try:
+            while not self.is_exchange_ready(exchange_id):
+                attempts = self.exchange_readiness[exchange_id]["attempts"]
+                delay = min(EXCHANGE_INIT_RETRY_DELAY * 2 ** (attempts - 1), EXCHANGE_INIT_RETRY_MAX_DELAY)
+                self.exchange_readiness[exchange_id]["status"] = "retrying"
+                await asyncio.sleep(delay)
+                await self._initialize_exchange(exchange_id)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self._retry_tasks.pop(exchange_id, None)
+    
+    async def _discard_exchange_instance(self, exchange_id: str):
+        instance = self.ccxt_instances.pop(exchange_id, None)
+        if instance is not None and hasattr(instance, 'close') and asyncio.iscoroutinefunction(instance.close):
             try:
-                await self._create_exchange_instance(exchange_id)
+                await instance.close()
             except Exception as e:
-                self.logger.warning(f"No se pudo inicializar {exchange_id}: {e}")
-        
-        self.logger.info(f"ExchangeManager inicializado con {len(self.ccxt_instances)} exchanges")
+                self.logger.debug(f"Error cerrando instancia descartada de {exchange_id}: {e}")
+    
+    def is_exchange_ready(self, exchange_id: str) -> bool:
+        """True si el exchange terminó su inicialización (o fue creado bajo demanda sin initialize)."""
+        state = self.exchange_readiness.get(exchange_id)
+        if state is None:
+            return exchange_id in self.ccxt_instances
+        return state["status"] == "ready"
+    
+    def get_ready_exchanges(self) -> List[str]:
+        """Exchanges listos para operar."""
+        return [exchange_id for exchange_id in SUPPORTED_EXCHANGES if self.is_exchange_ready(exchange_id)]
+    
+    def get_readiness(self) -> Dict[str, Dict[str, Any]]:
+        """Estado de inicialización de cada exchange (copia)."""
+        return {exchange_id: dict(state) for exchange_id, state in self.exchange_readiness.items()}
     
     async def cleanup(self):
         """Limpia recursos de CCXT."""
         self.logger.info("Cerrando instancias CCXT...")
         
+        for task in list(self._retry_tasks.values()):
+            task.cancel()
+        
+        # Instancias cuyo constructor terminó (o terminará) sin que nadie las adoptara
+        for construction in self._constructions.values():
+            construction.add_done_callback(self._close_abandoned_instance)
+        self._constructions.clear()
+        
         for exchange_id, instance in self.ccxt_instances.items():
             try:
                 if hasattr(instance, 'close') and asyncio.iscoroutinefunction(instance.close):
@@ -48,6 +170,9 @@ class ExchangeManager:
             self.logger.error(f"Exchange no soportado: {exchange_id}")
             return None
         
+        if self.backend == "mock":
+            return self._create_mock_instance(exchange_id)
+        
         try:
             # Obtener clase del exchange
             exchange_class = getattr(ccxt, exchange_id.lower())
@@ -92,22 +217,54 @@ class ExchangeManager:
             else:
                 self.logger.warning(f"{key_type_log} API keys no configuradas o son placeholders para {exchange_id} - solo lectura")
             
-            # Crear instancia
-            instance = exchange_class(config)
+            # Crear instancia (el constructor de CCXT es costoso: fuera del event loop).
+            # shield: si se cancela la espera, el hilo sigue y su instancia queda para el próximo intento
+            construction = self._constructions.get(exchange_id)
+            if construction is None:
+                construction = asyncio.ensure_future(asyncio.to_thread(exchange_class, config))
+                self._constructions[exchange_id] = construction
+            instance = await asyncio.shield(construction)
+            self._constructions.pop(exchange_id, None)
             self.ccxt_instances[exchange_id] = instance
             
             self.logger.debug(f"Instancia CCXT creada para {exchange_id}")
             return instance
             
         except AttributeError:
+            self._constructions.pop(exchange_id, None)
             self.logger.error(f"Exchange CCXT no soportado: {exchange_id}")
             return None
         except Exception as e:
+            self._constructions.pop(exchange_id, None)
             self.logger.error(f"Error creando instancia CCXT para {exchange_id}: {e}")
             return None
     
+    def _close_abandoned_instance(self, construction: asyncio.Future):
+        """Cierra la instancia de un constructor que ya nadie va a usar (tras cleanup)."""
+        if construction.cancelled() or construction.exception() is not None:
+            return
+        instance = construction.result()
+        if hasattr(instance, 'close') and asyncio.iscoroutinefunction(instance.close):
+            try:
+                asyncio.ensure_future(instance.close())
+            except RuntimeError:
+                pass  # El loop ya se cerró
+    
+    def _create_mock_instance(self, exchange_id: str) -> MockExchange:
+        """Crea un exchange simulado; todos comparten el mismo estado de precios."""
+        if self._mock_market is None:
+            self._mock_market = MockMarketState(self.mock_config)
+        instance = MockExchange(exchange_id, self.mock_config, self._mock_market)
+        self.ccxt_instances[exchange_id] = instance
+        self.logger.debug(f"Exchange simulado creado para {exchange_id}")
+        return instance
+    
     async def get_exchange_instance(self, exchange_id: str) -> Optional[ccxt.Exchange]:
-        """Obtiene una instancia CCXT, creándola si no existe."""
+        """Obtiene una instancia CCXT, creándola si no existe (None si su inicialización sigue pendiente)."""
+        state = self.exchange_readiness.get(exchange_id)
+        if state is not None and state["status"] != "ready":
+            return None
+        
         if exchange_id not in self.ccxt_instances:
             await self._create_exchange_instance(exchange_id)
         
@@ -117,20 +274,35 @@ class ExchangeManager:
     
     async def get_ticker(self, exchange_id: str, symbol: str) -> Optional[Dict]:
         """Obtiene el ticker de un símbolo en un exchange."""
+        ticker, _ = await self.get_ticker_timed(exchange_id, symbol)
+        return ticker
+    
+    async def get_ticker_timed(self, exchange_id: str, symbol: str) -> Tuple[Optional[Dict], float]:
+        """Obtiene el ticker y el momento (epoch local) en que V3 lo recibió; si viene de la caché, el original."""
+        return await self.ticker_flight.do_timed(
+            (exchange_id, symbol), lambda: self._fetch_ticker(exchange_id, symbol)
+        )
+    
+    async def _fetch_ticker(self, exchange_id: str, symbol: str) -> Optional[Dict]:
+        """Pide el ticker al exchange vía CCXT."""
         exchange = await self.get_exchange_instance(exchange_id)
         if not exchange:
             return None
         
         try:
-            ticker = await exchange.fetch_ticker(symbol)
+            with EXCHANGE_REQUEST_SECONDS.time(exchange=exchange_id, method="fetch_ticker"):
+                ticker = await exchange.fetch_ticker(symbol)
             self.logger.debug(f"Ticker obtenido: {symbol}@{exchange_id}")
             return ticker
         except ccxt.NetworkError as e:
             self.logger.error(f"Error de red obteniendo ticker {symbol}@{exchange_id}: {e}")
+            EXCHANGE_ERRORS.inc(exchange=exchange_id, method="fetch_ticker", error=type(e).__name__)
         except ccxt.ExchangeError as e:
             self.logger.error(f"Error de exchange obteniendo ticker {symbol}@{exchange_id}: {e}")
+            EXCHANGE_ERRORS.inc(exchange=exchange_id, method="fetch_ticker", error=type(e).__name__)
         except Exception as e:
             self.logger.error(f"Error genérico obteniendo ticker {symbol}@{exchange_id}: {e}")
+            EXCHANGE_ERRORS.inc(exchange=exchange_id, method="fetch_ticker", error=type(e).__name__)
         
         return None
     
@@ -152,11 +324,13 @@ class ExchangeManager:
             return None
         
         try:
-            order_book = await exchange.fetch_order_book(symbol, limit)
+            with EXCHANGE_REQUEST_SECONDS.time(exchange=exchange_id, method="fetch_order_book"):
+                order_book = await exchange.fetch_order_book(symbol, limit)
             self.logger.debug(f"Order book obtenido: {symbol}@{exchange_id}")
             return order_book
         except Exception as e:
             self.logger.error(f"Error obteniendo order book {symbol}@{exchange_id}: {e}")
+            EXCHANGE_ERRORS.inc(exchange=exchange_id, method="fetch_order_book", error=type(e).__name__)
             return None
     
     # Métodos para trading (requieren API keys)
@@ -196,17 +370,21 @@ class ExchangeManager:
                 return None
             
             # Crear orden de compra por valor en USDT (quoteOrderQty)
-            order = await exchange.create_market_buy_order(symbol, None, None, amount_usdt)
+            with EXCHANGE_REQUEST_SECONDS.time(exchange=exchange_id, method="create_market_buy_order"):
+                order = await exchange.create_market_buy_order(symbol, None, None, amount_usdt)
             
             self.logger.info(f"Orden de compra creada: {symbol}@{exchange_id} por {amount_usdt} USDT")
             return order
             
         except ccxt.InsufficientFunds as e:
             self.logger.error(f"Fondos insuficientes para compra {symbol}@{exchange_id}: {e}")
+            EXCHANGE_ERRORS.inc(exchange=exchange_id, method="create_market_buy_order", error=type(e).__name__)
         except ccxt.ExchangeError as e:
             self.logger.error(f"Error de exchange en compra {symbol}@{exchange_id}: {e}")
+            EXCHANGE_ERRORS.inc(exchange=exchange_id, method="create_market_buy_order", error=type(e).__name__)
         except Exception as e:
             self.logger.error(f"Error genérico en compra {symbol}@{exchange_id}: {e}")
+            EXCHANGE_ERRORS.inc(exchange=exchange_id, method="create_market_buy_order", error=type(e).__name__)
         
         return None
     
@@ -228,17 +406,21 @@ class ExchangeManager:
                 return None
             
             # Crear orden de venta
-            order = await exchange.create_market_sell_order(symbol, amount)
+            with EXCHANGE_REQUEST_SECONDS.time(exchange=exchange_id, method="create_market_sell_order"):
+                order = await exchange.create_market_sell_order(symbol, amount)
             
             self.logger.info(f"Orden de venta creada: {amount} {symbol}@{exchange_id}")
             return order
             
         except ccxt.InsufficientFunds as e:
             self.logger.error(f"Fondos insuficientes para venta {symbol}@{exchange_id}: {e}")
+            EXCHANGE_ERRORS.inc(exchange=exchange_id, method="create_market_sell_order", error=type(e).__name__)
         except ccxt.ExchangeError as e:
             self.logger.error(f"Error de exchange en venta {symbol}@{exchange_id}: {e}")
+            EXCHANGE_ERRORS.inc(exchange=exchange_id, method="create_market_sell_order", error=type(e).__name__)
         except Exception as e:
             self.logger.error(f"Error genérico en venta {symbol}@{exchange_id}: {e}")
+            EXCHANGE_ERRORS.inc(exchange=exchange_id, method="create_market_sell_order", error=type(e).__name__)
         
         return None
     
@@ -403,6 +585,16 @@ class ExchangeManager:
         """Retorna la lista de exchanges con instancias activas."""
         return list(self.ccxt_instances.keys())
     
+    def get_request_coalescing_stats(self) -> Dict[str, Any]:
+        """Retorna estadísticas de deduplicación de las peticiones a exchanges."""
+        return {'ticker': self.ticker_flight.get_stats()}
+    
+    def _collect_metrics(self):
+        """Actualiza las métricas de estado antes de cada exposición."""
+        ACTIVE_EXCHANGES.set(len(self.ccxt_instances))
+        for exchange_id in self.exchange_readiness:
+            EXCHANGE_READY.set(1 if self.is_exchange_ready(exchange_id) else 0, exchange=exchange_id)
+    
     async def test_exchange_connection(self, exchange_id: str) -> bool:
         """Prueba la conexión con un exchange."""
         try:
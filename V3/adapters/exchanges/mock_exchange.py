@@ -0,0 +1,254 @@
+# Simos/V3/adapters/exchanges/mock_exchange.py
+
+import asyncio
+import logging
+import random
+import time
+from collections import Counter
+from typing import Dict, Any, Optional, List
+
+import ccxt.async_support as ccxt
+
+from shared.config_v3 import MOCK_EXCHANGE_CONFIG
+from shared.utils import get_current_timestamp
+
+class MockMarketState:
+    """
+    Precios simulados compartidos por todos los exchanges mock.
+
+    Cada símbolo sigue un paseo aleatorio a partir de su precio base y cada
+    exchange aplica un desvío propio y estable, así aparecen diferencias de
+    precio entre exchanges como en el mercado real.
+    """
+
+    def __init__(self, config: Dict[str, Any] = None):
+        self.config = {**MOCK_EXCHANGE_CONFIG, **(config or {})}
+        self._prices: Dict[str, float] = dict(self.config["symbols"])
+        self._offsets: Dict[tuple, float] = {}
+
+    def mid_price(self, exchange_id: str, symbol: str) -> float:
+        """Precio medio actual de un símbolo en un exchange (avanza el paseo aleatorio)."""
+        volatility = self.config["price_volatility_bps"] / 10000
+        price = self._prices[symbol] * (1 + random.gauss(0, volatility))
+        self._prices[symbol] = price
+
+        key = (exchange_id, symbol)
+        if key not in self._offsets:
+            spread = self.config["exchange_price_dispersion_bps"] / 10000
+            self._offsets[key] = random.uniform(-spread, spread)
+        return price * (1 + self._offsets[key])
+
+class MockExchange:
+    """
+    Exchange simulado con la interfaz de ccxt.async_support usada por ExchangeManager.
+
+    Cada llamada pasa por un límite de frecuencia (token bucket), una latencia
+    configurable (con una cola de latencias altas) y una tasa de errores, y
+    lanza las mismas excepciones de CCXT que un exchange real. Sirve para
+    pruebas de carga de ExchangeManager y TradingLogic sin tocar exchanges.
+    """
+
+    def __init__(self, exchange_id: str, config: Dict[str, Any] = None, market_state: MockMarketState = None):
+        self.logger = logging.getLogger('V3.MockExchange')
+        self.id = exchange_id
+        self.config = {**MOCK_EXCHANGE_CONFIG, **(config or {})}
+        self.market_state = market_state or MockMarketState(self.config)
+        self.markets: Dict[str, Dict] = {}
+        self.has = {
+            'createMarketOrder': True,
+            'fetchTradingFees': True,
+            'fetchDepositWithdrawFees': True,
+            'withdraw': True
+        }
+        self.balances: Dict[str, float] = dict(self.config["initial_balances"])
+
+        # Token bucket para el límite de frecuencia
+        self._tokens = float(self.config["rate_limit_burst"])
+        self._last_refill = time.monotonic()
+
+        self._order_ids = 0
+        self.stats: Dict[str, Counter] = {'calls': Counter(), 'errors': Counter(), 'rate_limited': Counter()}
+
+    # Simulación de red
+
+    def _take_token(self) -> bool:
+        rate = self.config["rate_limit_per_second"]
+        if not rate:
+            return True
+        now = time.monotonic()
+        self._tokens = min(self.config["rate_limit_burst"], self._tokens + (now - self._last_refill) * rate)
+        self._last_refill = now
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+    def _latency_seconds(self) -> float:
+        latency_ms = random.gauss(self.config["latency_ms"], self.config["latency_jitter_ms"])
+        if random.random() < self.config["tail_probability"]:
+            latency_ms += self.config["tail_latency_ms"]
+        return max(0.0, latency_ms) / 1000
+
+    async def _request(self, method: str):
+        """Aplica límite de frecuencia, latencia y errores simulados a una llamada."""
+        self.stats['calls'][method] += 1
+
+        if not self._take_token():
+            self.stats['rate_limited'][method] += 1
+            raise ccxt.RateLimitExceeded(f"{self.id} {method}: límite de frecuencia simulado excedido")
+
+        await asyncio.sleep(self._latency_seconds())
+
+        if random.random() < self.config["error_rate"]:
+            error_class = random.choice([ccxt.NetworkError, ccxt.RequestTimeout, ccxt.ExchangeNotAvailable])
+            self.stats['errors'][method] += 1
+            raise error_class(f"{self.id} {method}: error simulado")
+
+    def _check_symbol(self, symbol: str):
+        if symbol not in self.config["symbols"]:
+            raise ccxt.BadSymbol(f"{self.id} no tiene el mercado {symbol}")
+
+    # API CCXT
+
+    async def load_markets(self, reload: bool = False) -> Dict[str, Dict]:
+        if self.markets and not reload:
+            return self.markets
+        await self._request('load_markets')
+        self.markets = {
+            symbol: {
+                'id': symbol.replace('/', ''),
+                'symbol': symbol,
+                'base': symbol.split('/')[0],
+                'quote': symbol.split('/')[1],
+                'active': True,
+                'taker': self.config["taker_fee"],
+                'maker': self.config["maker_fee"],
+                'limits': {'amount': {'min': 0.0001}, 'cost': {'min': 5.0}}
+            }
+            for symbol in self.config["symbols"]
+        }
+        return self.markets
+
+    async def fetch_ticker(self, symbol: str, params: Dict = None) -> Dict:
+        await self._request('fetch_ticker')
+        self._check_symbol(symbol)
+        mid = self.market_state.mid_price(self.id, symbol)
+        half_spread = mid * self.config["spread_bps"] / 20000
+        return {
+            'symbol': symbol,
+            'timestamp': int(time.time() * 1000),
+            'datetime': get_current_timestamp(),
+            'bid': mid - half_spread,
+            'ask': mid + half_spread,
+            'last': mid,
+            'baseVolume': random.uniform(100, 10000)
+        }
+
+    async def fetch_order_book(self, symbol: str, limit: Optional[int] = None, params: Dict = None) -> Dict:
+        await self._request('fetch_order_book')
+        self._check_symbol(symbol)
+        depth = min(limit or self.config["order_book_depth"], self.config["order_book_depth"])
+        mid = self.market_state.mid_price(self.id, symbol)
+        tick = mid * self.config["spread_bps"] / 20000
+        base_size = self.config["order_book_level_usdt"] / mid
+        return {
+            'symbol': symbol,
+            'bids': [[mid - tick * (level + 1), base_size * random.uniform(0.5, 1.5)] for level in range(depth)],
+            'asks': [[mid + tick * (level + 1), base_size * random.uniform(0.5, 1.5)] for level in range(depth)],
+            'timestamp': int(time.time() * 1000),
+            'nonce': None
+        }
+
+    async def fetch_balance(self, params: Dict = None) -> Dict:
+        await self._request('fetch_balance')
+        return {
+            'free': dict(self.balances),
+            'used': {currency: 0.0 for currency in self.balances},
+            'total': dict(self.balances)
+        }
+
+    async def fetch_trading_fees(self, symbols: List[str] = None, params: Dict = None) -> Dict:
+        await self._request('fetch_trading_fees')
+        return {
+            symbol: {'symbol': symbol, 'maker': self.config["maker_fee"], 'taker': self.config["taker_fee"]}
+            for symbol in (symbols or self.config["symbols"])
+        }
+
+    async def fetch_deposit_withdraw_fees(self, codes: List[str] = None, params: Dict = None) -> Dict:
+        await self._request('fetch_deposit_withdraw_fees')
+        currencies = codes or sorted({symbol.split('/')[0] for symbol in self.config["symbols"]} | {'USDT'})
+        return {
+            code: {
+                'withdraw': {'fee': fee, 'percentage': False},
+                'deposit': {'fee': 0.0, 'percentage': False},
+                'networks': {
+                    network: {'withdraw': {'fee': fee * factor, 'percentage': False},
+                              'deposit': {'fee': 0.0, 'percentage': False}}
+                    for network, factor in self.config["withdrawal_networks"].items()
+                }
+            }
+            for code in currencies
+            for fee in [self.config["withdrawal_fee_usdt"] / self.config["symbols"].get(f"{code}/USDT", 1.0)]
+        }
+
+    async def fetch_deposit_address(self, code: str, params: Dict = None) -> Dict:
+        await self._request('fetch_deposit_address')
+        network = (params or {}).get('network') or next(iter(self.config["withdrawal_networks"]))
+        return {'currency': code, 'network': network, 'address': f"mock-{self.id}-{code}-{network}", 'tag': None}
+
+    async def _create_order(self, method: str, symbol: str, side: str, amount: Optional[float], cost: Optional[float]) -> Dict:
+        await self._request(method)
+        self._check_symbol(symbol)
+        base, quote = symbol.split('/')
+        mid = self.market_state.mid_price(self.id, symbol)
+        price = mid * (1 + (1 if side == 'buy' else -1) * self.config["spread_bps"] / 20000)
+        if amount is None:
+            amount = cost / price
+        cost = amount * price
+        fee = cost * self.config["taker_fee"]
+
+        spend_currency, spend_amount = (quote, cost + fee) if side == 'buy' else (base, amount)
+        if self.balances.get(spend_currency, 0.0) < spend_amount:
+            raise ccxt.InsufficientFunds(f"{self.id}: saldo {spend_currency} insuficiente")
+        self.balances[spend_currency] -= spend_amount
+        receive_currency, receive_amount = (base, amount) if side == 'buy' else (quote, cost - fee)
+        self.balances[receive_currency] = self.balances.get(receive_currency, 0.0) + receive_amount
+
+        self._order_ids += 1
+        return {
+            'id': f"{self.id}-{self._order_ids}",
+            'symbol': symbol,
+            'type': 'market',
+            'side': side,
+            'status': 'closed',
+            'price': price,
+            'average': price,
+            'amount': amount,
+            'filled': amount,
+            'cost': cost,
+            'fee': {'currency': quote, 'cost': fee},
+            'datetime': get_current_timestamp()
+        }
+
+    async def create_market_buy_order(self, symbol: str, amount: Optional[float], price=None, cost: Optional[float] = None, params: Dict = None) -> Dict:
+        # ExchangeManager compra por valor en USDT: (symbol, None, None, amount_usdt)
+        return await self._create_order('create_market_buy_order', symbol, 'buy', amount, cost)
+
+    async def create_market_sell_order(self, symbol: str, amount: float, params: Dict = None) -> Dict:
+        return await self._create_order('create_market_sell_order', symbol, 'sell', amount, None)
+
+    async def withdraw(self, code: str, amount: float, address: str, tag: str = None, params: Dict = None) -> Dict:
+        await self._request('withdraw')
+        if self.balances.get(code, 0.0) < amount:
+            raise ccxt.InsufficientFunds(f"{self.id}: saldo {code} insuficiente para retirar")
+        self.balances[code] -= amount
+        self._order_ids += 1
+        return {'id': f"{self.id}-w{self._order_ids}", 'currency': code, 'amount': amount,
+                'address': address, 'tag': tag, 'status': 'ok', 'datetime': get_current_timestamp()}
+
+    async def close(self):
+        return None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Llamadas, errores y rechazos por límite de frecuencia, por método."""
+        return {key: dict(counter) for key, counter in self.stats.items()}
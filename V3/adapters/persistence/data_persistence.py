@@ -4,11 +4,14 @@ import asyncio
 import logging
 import csv
 import os
-import pandas as pd
 from datetime import datetime, timezone
 from typing import Dict, Any, Optional, List
 from shared.config_v3 import CSV_LOG_PATH, TRADING_STATE_FILE, BALANCE_CACHE_FILE
 from shared.utils import save_json_file, load_json_file, get_current_timestamp, safe_float
+from shared.metrics import registry
+
+WRITE_SECONDS = registry.histogram("simos_persistence_write_seconds", "Duración de escrituras a disco", ["target"])
+WRITE_ERRORS = registry.counter("simos_persistence_write_errors", "Escrituras a disco fallidas", ["target"])
 
 class DataPersistence:
     """Maneja la persistencia de datos para V3."""
@@ -45,20 +48,22 @@ class DataPersistence:
             file_exists = os.path.exists(csv_path)
             
             # Escribir al CSV
-            with open(csv_path, 'a', newline='', encoding='utf-8') as csvfile:
-                fieldnames = list(csv_data.keys())
-                writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-                
-                # Escribir headers si es un archivo nuevo
-                if not file_exists:
-                    writer.writeheader()
-                
-                writer.writerow(csv_data)
+            with WRITE_SECONDS.time(target="operations_csv"):
+                with open(csv_path, 'a', newline='', encoding='utf-8') as csvfile:
+                    fieldnames = list(csv_data.keys())
+                    writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+                    
+                    # Escribir headers si es un archivo nuevo
+                    if not file_exists:
+                        writer.writeheader()
+                    
+                    writer.writerow(csv_data)
             
             self.logger.debug(f"Operación registrada en CSV: {operation_data.get('symbol', 'N/A')}")
             
         except Exception as e:
             self.logger.error(f"Error registrando operación en CSV: {e}")
+            WRITE_ERRORS.inc(target="operations_csv")
     
     def _prepare_csv_data(self, operation_data: Dict) -> Dict[str, Any]:
         """Prepara los datos de operación para el formato CSV."""
@@ -116,12 +121,14 @@ class DataPersistence:
         """Guarda el estado actual del trading."""
         try:
             state_data['last_updated'] = get_current_timestamp()
-            success = save_json_file(state_data, TRADING_STATE_FILE)
+            with WRITE_SECONDS.time(target="trading_state"):
+                success = save_json_file(state_data, TRADING_STATE_FILE)
             
             if success:
                 self.logger.debug("Estado de trading guardado")
             else:
                 self.logger.error("Error guardando estado de trading")
+                WRITE_ERRORS.inc(target="trading_state")
             
             return success
             
@@ -155,12 +162,14 @@ class DataPersistence:
                 'last_updated': get_current_timestamp()
             }
             
-            success = save_json_file(cache_data, BALANCE_CACHE_FILE)
+            with WRITE_SECONDS.time(target="balance_cache"):
+                success = save_json_file(cache_data, BALANCE_CACHE_FILE)
             
             if success:
                 self.logger.debug("Cache de balances guardado")
             else:
                 self.logger.error("Error guardando cache de balances")
+                WRITE_ERRORS.inc(target="balance_cache")
             
             return success
             
@@ -247,6 +256,8 @@ class DataPersistence:
                 self.logger.error(f"Archivo CSV de entrenamiento no encontrado: {filepath}")
                 return None
 
+            import pandas as pd
+            
             df = pd.read_csv(filepath)
 
             # Convertir el DataFrame a una lista de diccionarios
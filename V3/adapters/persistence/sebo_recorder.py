@@ -0,0 +1,363 @@
+# Simos/V3/adapters/persistence/sebo_recorder.py
+
+import bisect
+import glob
+import json
+import logging
+import os
+import queue
+import struct
+import threading
+import time
+import zlib
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Iterator, Tuple
+
+try:
+    import msgpack
+except ImportError:  # msgpack es opcional; sin él se graba en JSON
+    msgpack = None
+
+from shared.config_v3 import (
+    SEBO_RECORDING_DIR, SEBO_RECORDING_MAX_SEGMENT_MB,
+    SEBO_RECORDING_MAX_SEGMENT_SECONDS, SEBO_RECORDING_MAX_SEGMENTS,
+    SEBO_RECORDING_QUEUE_SIZE, SEBO_RECORDING_MAX_BATCH
+)
+
+# Formato de segmento:
+#   cabecera: SEGMENT_MAGIC + byte de codec (b'M' msgpack, b'J' JSON)
+#   registro: >I longitud del payload, >d timestamp monotónico, >d timestamp epoch, payload zlib
+# Formato de índice (.idx, uno por segmento):
+#   cabecera: INDEX_MAGIC
+#   entrada:  >d timestamp epoch, >d timestamp monotónico, >Q offset del registro
+SEGMENT_MAGIC = b'SIMREC1'
+INDEX_MAGIC = b'SIMIDX1'
+SEGMENT_EXTENSION = '.rec'
+INDEX_EXTENSION = '.idx'
+CODEC_MSGPACK = b'M'
+CODEC_JSON = b'J'
+
+_RECORD_HEADER = struct.Struct('>Idd')
+_INDEX_ENTRY = struct.Struct('>ddQ')
+
+def _encode(codec: bytes, value: Any) -> bytes:
+    """Serializa un valor con el codec del segmento."""
+    if codec == CODEC_MSGPACK:
+        return msgpack.packb(value, use_bin_type=True, default=str)
+    return json.dumps(value, default=str, separators=(',', ':')).encode('utf-8')
+
+def _decode(codec: bytes, raw: bytes) -> Any:
+    """Deserializa un payload con el codec del segmento."""
+    if codec == CODEC_MSGPACK:
+        if msgpack is None:
+            raise RuntimeError("El segmento fue grabado con msgpack y msgpack no está instalado")
+        return msgpack.unpackb(raw, raw=False)
+    return json.loads(raw.decode('utf-8'))
+
+class SeboEventRecorder:
+    """
+    Graba cada evento entrante de Sebo en un log binario comprimido con rotación e índice temporal.
+
+    record() solo encola el evento: la serialización, compresión, escritura,
+    rotación y retención corren en un hilo propio que escribe por lotes y hace
+    un flush por lote. Si la cola se llena, los eventos nuevos se descartan
+    (y se cuentan) en lugar de frenar la ingesta.
+    """
+
+    def __init__(self, directory: str = None, max_segment_mb: float = None,
+                 max_segment_seconds: float = None, max_segments: int = None,
+                 compression_level: int = 6, queue_size: int = SEBO_RECORDING_QUEUE_SIZE,
+                 max_batch: int = SEBO_RECORDING_MAX_BATCH):
+        self.logger = logging.getLogger('V3.SeboEventRecorder')
+        self.directory = directory or SEBO_RECORDING_DIR
+        self.max_segment_bytes = int((max_segment_mb or SEBO_RECORDING_MAX_SEGMENT_MB) * 1024 * 1024)
+        self.max_segment_seconds = max_segment_seconds or SEBO_RECORDING_MAX_SEGMENT_SECONDS
+        self.max_segments = max_segments if max_segments is not None else SEBO_RECORDING_MAX_SEGMENTS
+        self.compression_level = compression_level
+        self.codec = CODEC_MSGPACK if msgpack is not None else CODEC_JSON
+        self.max_batch = max(1, max_batch)
+
+        self._segment_file = None
+        self._index_file = None
+        self._segment_path: Optional[str] = None
+        self._segment_bytes = 0
+        self._segment_opened_at = 0.0
+        self._segment_counter = 0
+
+        self.stats = {
+            'events_recorded': 0,
+            'bytes_written': 0,
+            'uncompressed_bytes': 0,
+            'segments_created': 0,
+            'write_errors': 0,
+            'events_dropped': 0,
+            'events_by_type': {}
+        }
+        self._stats_lock = threading.Lock()
+
+        os.makedirs(self.directory, exist_ok=True)
+
+        self._queue: queue.Queue = queue.Queue(maxsize=max(1, queue_size))
+        self._closed = False
+        self._writer = threading.Thread(target=self._writer_loop, name='v3-sebo-recorder', daemon=True)
+        self._writer.start()
+
+    def record(self, event_name: str, data: Any):
+        """Encola un evento con sus timestamps monotónico y epoch (no bloquea)."""
+        if self._closed:
+            return
+        try:
+            self._queue.put_nowait((event_name, data, time.monotonic(), time.time()))
+        except queue.Full:
+            with self._stats_lock:
+                self.stats['events_dropped'] += 1
+            self.logger.warning(f"Cola de grabación llena: evento {event_name} descartado")
+
+    def _writer_loop(self):
+        """Hilo de escritura: toma lotes de la cola, los escribe y hace un flush por lote."""
+        stopping = False
+        while not stopping:
+            batch = [self._queue.get()]
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            for entry in batch:
+                if entry is None:
+                    stopping = True
+                    continue
+                self._write_record(*entry)
+
+            try:
+                for handle in (self._segment_file, self._index_file):
+                    if handle is not None:
+                        handle.flush()
+            except Exception as e:
+                self.logger.error(f"Error haciendo flush de la grabación: {e}")
+
+        self._close_segment()
+
+    def _write_record(self, event_name: str, data: Any, monotonic_ts: float, wall_ts: float):
+        """Escribe un registro en el segmento actual (solo desde el hilo de escritura)."""
+        try:
+            if self._segment_file is None or self._should_rotate(monotonic_ts):
+                self._rotate(monotonic_ts)
+
+            raw = _encode(self.codec, {'event': event_name, 'data': data})
+            payload = zlib.compress(raw, self.compression_level)
+            offset = self._segment_bytes
+
+            self._segment_file.write(_RECORD_HEADER.pack(len(payload), monotonic_ts, wall_ts))
+            self._segment_file.write(payload)
+            self._index_file.write(_INDEX_ENTRY.pack(wall_ts, monotonic_ts, offset))
+
+            written = _RECORD_HEADER.size + len(payload)
+            self._segment_bytes += written
+
+            with self._stats_lock:
+                self.stats['events_recorded'] += 1
+                self.stats['bytes_written'] += written
+                self.stats['uncompressed_bytes'] += len(raw)
+                by_type = self.stats['events_by_type']
+                by_type[event_name] = by_type.get(event_name, 0) + 1
+
+        except Exception as e:
+            with self._stats_lock:
+                self.stats['write_errors'] += 1
+            self.logger.error(f"Error grabando evento {event_name}: {e}")
+
+    def _should_rotate(self, monotonic_ts: float) -> bool:
+        """Indica si el segmento actual superó su tamaño o antigüedad máxima."""
+        return (
+            self._segment_bytes >= self.max_segment_bytes or
+            monotonic_ts - self._segment_opened_at >= self.max_segment_seconds
+        )
+
+    def _rotate(self, monotonic_ts: float):
+        """Cierra el segmento actual y abre uno nuevo."""
+        self._close_segment()
+
+        self._segment_counter += 1
+        stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        base_name = f"sebo_events_{stamp}_{self._segment_counter:04d}"
+        self._segment_path = os.path.join(self.directory, base_name + SEGMENT_EXTENSION)
+
+        self._segment_file = open(self._segment_path, 'wb')
+        self._segment_file.write(SEGMENT_MAGIC + self.codec)
+        self._index_file = open(os.path.join(self.directory, base_name + INDEX_EXTENSION), 'wb')
+        self._index_file.write(INDEX_MAGIC)
+
+        self._segment_bytes = len(SEGMENT_MAGIC) + 1
+        self._segment_opened_at = monotonic_ts
+        with self._stats_lock:
+            self.stats['segments_created'] += 1
+
+        self.logger.info(f"Nuevo segmento de grabación: {self._segment_path}")
+        self._apply_retention()
+
+    def _close_segment(self):
+        """Cierra los archivos del segmento actual."""
+        for handle in (self._segment_file, self._index_file):
+            if handle is not None:
+                try:
+                    handle.close()
+                except Exception as e:
+                    self.logger.error(f"Error cerrando segmento de grabación: {e}")
+        self._segment_file = None
+        self._index_file = None
+
+    def _apply_retention(self):
+        """Elimina los segmentos más antiguos por encima de max_segments."""
+        if not self.max_segments:
+            return
+
+        segments = list_segments(self.directory)
+        for segment_path in segments[:-self.max_segments]:
+            try:
+                os.remove(segment_path)
+                index_path = segment_path[:-len(SEGMENT_EXTENSION)] + INDEX_EXTENSION
+                if os.path.exists(index_path):
+                    os.remove(index_path)
+                self.logger.debug(f"Segmento antiguo eliminado: {segment_path}")
+            except OSError as e:
+                self.logger.error(f"Error eliminando segmento {segment_path}: {e}")
+
+    def close(self):
+        """Escribe lo pendiente y cierra el recorder (bloquea hasta que el hilo termina)."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._writer.join()
+        self.logger.info(f"Grabación cerrada: {self.stats['events_recorded']} eventos")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Retorna estadísticas de grabación."""
+        with self._stats_lock:
+            stats = dict(self.stats)
+            stats['events_by_type'] = dict(self.stats['events_by_type'])
+        stats['queued'] = self._queue.qsize()
+        stats['codec'] = 'msgpack' if self.codec == CODEC_MSGPACK else 'json'
+        stats['current_segment'] = self._segment_path
+        stats['compression_ratio'] = (
+            self.stats['uncompressed_bytes'] / self.stats['bytes_written']
+            if self.stats['bytes_written'] else 0.0
+        )
+        return stats
+
+def list_segments(directory: str) -> List[str]:
+    """Lista los segmentos de un directorio de grabación en orden cronológico."""
+    return sorted(glob.glob(os.path.join(directory, f"sebo_events_*{SEGMENT_EXTENSION}")))
+
+class SeboEventLogReader:
+    """Lee logs grabados por SeboEventRecorder, con búsqueda por tiempo vía índice."""
+
+    def __init__(self, directory: str = None):
+        self.logger = logging.getLogger('V3.SeboEventLogReader')
+        self.directory = directory or SEBO_RECORDING_DIR
+
+    def _load_index(self, segment_path: str) -> List[Tuple[float, float, int]]:
+        """Carga las entradas (epoch, monotónico, offset) del índice de un segmento."""
+        index_path = segment_path[:-len(SEGMENT_EXTENSION)] + INDEX_EXTENSION
+        if not os.path.exists(index_path):
+            return []
+
+        with open(index_path, 'rb') as index_file:
+            content = index_file.read()
+
+        if not content.startswith(INDEX_MAGIC):
+            self.logger.warning(f"Índice inválido: {index_path}")
+            return []
+
+        body = content[len(INDEX_MAGIC):]
+        usable = len(body) - len(body) % _INDEX_ENTRY.size
+        return [entry for entry in _INDEX_ENTRY.iter_unpack(body[:usable])]
+
+    def iter_events(self, start_time: float = None, end_time: float = None,
+                    event_types: List[str] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Itera los eventos grabados en orden.
+
+        Args:
+            start_time: Epoch (segundos) desde el cual leer; usa el índice para saltar
+            end_time: Epoch (segundos) hasta el cual leer
+            event_types: Filtra por nombre de evento (ej: ['top_20_data'])
+        """
+        for segment_path in list_segments(self.directory):
+            index = self._load_index(segment_path)
+            start_offset = None
+
+            if index:
+                first_ts, last_ts = index[0][0], index[-1][0]
+                if end_time is not None and first_ts > end_time:
+                    break
+                if start_time is not None and last_ts < start_time:
+                    continue
+                if start_time is not None:
+                    position = bisect.bisect_left([entry[0] for entry in index], start_time)
+                    start_offset = index[position][2] if position < len(index) else None
+
+            for event in self._read_segment(segment_path, start_offset):
+                if start_time is not None and event['wall_ts'] < start_time:
+                    continue
+                if end_time is not None and event['wall_ts'] > end_time:
+                    return
+                if event_types and event['event'] not in event_types:
+                    continue
+                yield event
+
+    def _read_segment(self, segment_path: str, start_offset: int = None) -> Iterator[Dict[str, Any]]:
+        """Lee los registros de un segmento, tolerando un último registro truncado."""
+        with open(segment_path, 'rb') as segment_file:
+            header = segment_file.read(len(SEGMENT_MAGIC) + 1)
+            if not header.startswith(SEGMENT_MAGIC):
+                self.logger.warning(f"Segmento inválido: {segment_path}")
+                return
+            codec = header[-1:]
+
+            if start_offset is not None:
+                segment_file.seek(start_offset)
+
+            while True:
+                record_header = segment_file.read(_RECORD_HEADER.size)
+                if len(record_header) < _RECORD_HEADER.size:
+                    return
+
+                length, monotonic_ts, wall_ts = _RECORD_HEADER.unpack(record_header)
+                payload = segment_file.read(length)
+                if len(payload) < length:
+                    self.logger.warning(f"Registro truncado al final de {segment_path}")
+                    return
+
+                record = _decode(codec, zlib.decompress(payload))
+                yield {
+                    'event': record.get('event'),
+                    'data': record.get('data'),
+                    'monotonic_ts': monotonic_ts,
+                    'wall_ts': wall_ts
+                }
+
+    def load_top20_snapshots(self, start_time: float = None,
+                             end_time: float = None) -> List[Tuple[float, List[Dict]]]:
+        """Retorna los eventos top_20_data como snapshots (offset en segundos, items) para replay."""
+        snapshots = []
+        elapsed = 0.0
+        previous = None
+
+        for event in self.iter_events(start_time, end_time, event_types=['top_20_data']):
+            if not isinstance(event['data'], list):
+                continue
+
+            if previous is not None:
+                delta = event['monotonic_ts'] - previous['monotonic_ts']
+                # El reloj monotónico se reinicia entre ejecuciones; usar el epoch en ese caso
+                if delta < 0:
+                    delta = max(0.0, event['wall_ts'] - previous['wall_ts'])
+                elapsed += delta
+
+            snapshots.append((elapsed, event['data']))
+            previous = event
+
+        return snapshots
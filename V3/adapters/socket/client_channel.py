@@ -0,0 +1,298 @@
+# Simos/V3/adapters/socket/client_channel.py
+
+import asyncio
+import logging
+import time
+import zlib
+from collections import deque
+from typing import Dict, Any, Optional, Callable, Iterable, Set
+
+from websockets.exceptions import ConnectionClosed
+
+from shared.config_v3 import (
+    UI_CLIENT_QUEUE_SIZE, UI_CLIENT_MAX_DROPS_BEFORE_EVICT, UI_CLIENT_RATE_LIMITS,
+    UI_COMPRESSION_SAMPLE_EVERY
+)
+from adapters.socket.message_encoder import EncodedFrame
+
+# Marca de un delta pendiente que fue reemplazado por el snapshot vigente al enviar
+_SNAPSHOT = object()
+
+class ClientChannel:
+    """
+    Cola de envío acotada para un cliente UI, drenada por su propia tarea de escritura.
+
+    Los productores encolan en O(1) sin esperar a la red. Si la cola se llena se
+    descarta el mensaje más antiguo; los tipos coalescibles (ej: top20_data,
+    balance_update) solo conservan su último valor pendiente. Si llega un
+    segundo delta (ej: top20_delta) con otro aún pendiente, ambos se reemplazan
+    por el snapshot completo vigente al momento de enviar. Los tipos con
+    límite de frecuencia esperan en su lugar (acumulando cambios) sin frenar
+    al resto de mensajes. Un cliente que acumula demasiados descartes sin
+    completar un envío se desaloja.
+
+    Los mensajes se encolan como EncodedFrame y se envían en la codificación
+    negociada por el cliente (JSON en texto o MessagePack en binario).
+    """
+
+    def __init__(self, websocket, coalesce_types: Iterable[str] = (),
+                 snapshot_providers: Dict[str, Callable[[], Optional[EncodedFrame]]] = None,
+                 max_queue_size: int = UI_CLIENT_QUEUE_SIZE,
+                 max_drops_before_evict: int = UI_CLIENT_MAX_DROPS_BEFORE_EVICT,
+                 rate_limits: Dict[str, float] = None,
+                 encoding: str = "json",
+                 compression: Optional[str] = None,
+                 client_address: Optional[str] = None,
+                 on_evict: Optional[Callable] = None):
+        self.logger = logging.getLogger('V3.ClientChannel')
+        self.websocket = websocket
+        self.encoding = encoding
+        self.compression = compression  # Extensión negociada (ej: permessage-deflate) o None
+        self.client_address = client_address
+        self.topics: Set[str] = set()  # Tópicos suscritos (los mantiene UIBroadcaster)
+        self.coalesce_types = set(coalesce_types)
+        self.snapshot_providers = snapshot_providers or {}
+        # Tipos que ocupan un único lugar en la cola
+        self._slotted_types = self.coalesce_types | set(self.snapshot_providers)
+        self.max_queue_size = max_queue_size
+        self.max_drops_before_evict = max_drops_before_evict
+        self.on_evict = on_evict
+
+        # Intervalo mínimo entre envíos por tipo (solo aplica a tipos de lugar único)
+        limits = UI_CLIENT_RATE_LIMITS if rate_limits is None else rate_limits
+        self._min_intervals = {
+            message_type: 1.0 / max_hz
+            for message_type, max_hz in limits.items()
+            if max_hz and message_type in self._slotted_types
+        }
+        self._last_sent: Dict[str, float] = {}
+
+        # Entradas: (tipo, payload); para tipos coalescibles el payload vive en _latest
+        self._queue: deque = deque()
+        self._latest: Dict[str, Any] = {}
+        self._wakeup = asyncio.Event()
+        self._writer_task: Optional[asyncio.Task] = None
+        self._drops_since_send = 0
+        self.closed = False
+        self.evicted = False
+
+        self.stats = {
+            'enqueued': 0,
+            'sent': 0,
+            'dropped': 0,
+            'coalesced': 0,
+            'rate_limited': 0,
+            'send_errors': 0,
+            'max_queue_depth': 0,
+            'bytes_sent': 0
+        }
+
+        # Muestreo de la relación de compresión: el deflate real ocurre dentro de
+        # websockets, así que se estima comprimiendo uno de cada N frames
+        self._frames_until_sample = 0
+        self._sampled_raw_bytes = 0
+        self._sampled_deflated_bytes = 0
+
+    def start(self):
+        """Inicia la tarea de escritura del cliente."""
+        if self._writer_task is None:
+            self._writer_task = asyncio.create_task(self._writer_loop())
+
+    def enqueue(self, message_type: Optional[str], payload: Any) -> bool:
+        """Encola un EncodedFrame sin bloquear. Retorna False si el canal está cerrado."""
+        if self.closed:
+            return False
+
+        self.stats['enqueued'] += 1
+
+        if message_type in self._slotted_types:
+            if message_type in self._latest:
+                # Ya hay uno pendiente: reemplazar su contenido manteniendo su posición.
+                # Los deltas no se pueden combinar entre sí: se envía el snapshot vigente.
+                is_delta = message_type in self.snapshot_providers
+                self._latest[message_type] = _SNAPSHOT if is_delta else payload
+                self.stats['coalesced'] += 1
+                return True
+            self._latest[message_type] = payload
+            self._queue.append((message_type, None))
+        else:
+            self._queue.append((message_type, payload))
+
+        if len(self._queue) > self.max_queue_size:
+            self._drop_oldest()
+
+        self.stats['max_queue_depth'] = max(self.stats['max_queue_depth'], len(self._queue))
+        self._wakeup.set()
+        return not self.closed
+
+    def _drop_oldest(self):
+        """Descarta el mensaje pendiente más antiguo y desaloja al cliente si va demasiado atrasado."""
+        message_type, _ = self._queue.popleft()
+        if message_type in self._slotted_types:
+            self._latest.pop(message_type, None)
+
+        self.stats['dropped'] += 1
+        self._drops_since_send += 1
+
+        if self._drops_since_send >= self.max_drops_before_evict:
+            self.evict(f"{self._drops_since_send} mensajes descartados sin completar un envío")
+
+    def _pop_next(self):
+        """
+        Obtiene el siguiente mensaje listo para enviar.
+
+        Los tipos aún dentro de su intervalo mínimo rotan al final de la cola;
+        si ninguno está listo retorna el tiempo de espera del más próximo.
+        """
+        now = time.monotonic()
+        min_wait = None
+
+        for _ in range(len(self._queue)):
+            message_type, payload = self._queue[0]
+            wait = self._rate_wait(message_type, now)
+            if wait > 0:
+                self._queue.rotate(-1)
+                min_wait = wait if min_wait is None else min(min_wait, wait)
+                continue
+
+            self._queue.popleft()
+            if message_type in self._slotted_types:
+                payload = self._latest.pop(message_type, None)
+            if payload is _SNAPSHOT:
+                payload = self.snapshot_providers[message_type]()
+            return message_type, payload, None
+
+        self.stats['rate_limited'] += 1
+        return None, None, min_wait
+
+    def _rate_wait(self, message_type: Optional[str], now: float) -> float:
+        """Segundos que faltan para poder enviar un mensaje de este tipo."""
+        min_interval = self._min_intervals.get(message_type)
+        if not min_interval:
+            return 0.0
+        return self._last_sent.get(message_type, float('-inf')) + min_interval - now
+
+    async def _writer_loop(self):
+        """Drena la cola enviando los mensajes en orden."""
+        try:
+            while not self.closed:
+                if not self._queue:
+                    self._wakeup.clear()
+                    await self._wakeup.wait()
+                    continue
+
+                message_type, payload, wait = self._pop_next()
+                if wait is not None:
+                    # Solo quedan tipos limitados: esperar al más próximo o a un mensaje nuevo
+                    self._wakeup.clear()
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), timeout=wait)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+
+                if payload is None:
+                    continue
+
+                try:
+                    data = payload.data(self.encoding)
+                    await self.websocket.send(data)
+                    self.stats['sent'] += 1
+                    self._record_size(data)
+                    self._drops_since_send = 0
+                    if message_type in self._min_intervals:
+                        self._last_sent[message_type] = time.monotonic()
+                except ConnectionClosed:
+                    self.closed = True
+                except Exception as e:
+                    self.stats['send_errors'] += 1
+                    self.logger.error(f"Error enviando mensaje a cliente UI: {e}")
+                    self.closed = True
+
+        except asyncio.CancelledError:
+            pass
+
+    def _record_size(self, data):
+        """Acumula bytes enviados y, cada N frames, estima cuánto los reduciría deflate."""
+        raw = data.encode('utf-8') if isinstance(data, str) else data
+        self.stats['bytes_sent'] += len(raw)
+
+        if self._frames_until_sample > 0:
+            self._frames_until_sample -= 1
+            return
+
+        self._frames_until_sample = UI_COMPRESSION_SAMPLE_EVERY - 1
+        # Deflate crudo sin contexto compartido: cota conservadora del permessage-deflate real
+        compressor = zlib.compressobj(6, zlib.DEFLATED, -zlib.MAX_WBITS)
+        deflated = compressor.compress(raw) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        self._sampled_raw_bytes += len(raw)
+        self._sampled_deflated_bytes += len(deflated)
+
+    @property
+    def deflate_ratio(self) -> Optional[float]:
+        """Relación comprimido/original estimada por muestreo (None sin muestras)."""
+        if not self._sampled_raw_bytes:
+            return None
+        return self._sampled_deflated_bytes / self._sampled_raw_bytes
+
+    def evict(self, reason: str):
+        """Cierra el canal y la conexión de un cliente que no mantiene el ritmo."""
+        if self.evicted:
+            return
+
+        self.evicted = True
+        self.logger.warning(f"Desalojando cliente UI lento: {reason}")
+        self._close_queue()
+
+        if self.on_evict:
+            self.on_evict(self)
+
+        # 1013: "try again later"; el cliente puede reconectar y recibir un snapshot fresco
+        asyncio.create_task(self._close_websocket(1013, "Cliente demasiado lento"))
+
+    async def _close_websocket(self, code: int, reason: str):
+        """Cierra la conexión sin propagar errores."""
+        try:
+            await self.websocket.close(code=code, reason=reason)
+        except Exception as e:
+            self.logger.debug(f"Error cerrando cliente desalojado: {e}")
+
+    def _close_queue(self):
+        """Marca el canal como cerrado y libera los mensajes pendientes."""
+        self.closed = True
+        self._queue.clear()
+        self._latest.clear()
+        self._wakeup.set()
+
+    async def close(self):
+        """Detiene la tarea de escritura."""
+        self._close_queue()
+        if self._writer_task and not self._writer_task.done():
+            self._writer_task.cancel()
+            try:
+                await self._writer_task
+            except asyncio.CancelledError:
+                pass
+
+    @property
+    def queue_depth(self) -> int:
+        """Mensajes pendientes de envío."""
+        return len(self._queue)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Retorna estadísticas del canal."""
+        stats = dict(self.stats)
+        stats['queue_depth'] = self.queue_depth
+        stats['evicted'] = self.evicted
+        stats['client'] = self.client_address
+        stats['topics'] = sorted(self.topics)
+        stats['encoding'] = self.encoding
+        stats['compression'] = self.compression
+        ratio = self.deflate_ratio
+        stats['deflate_ratio_estimate'] = round(ratio, 4) if ratio is not None else None
+        # Solo se estima el tamaño en la red si la conexión negoció deflate
+        stats['estimated_wire_bytes'] = (
+            int(self.stats['bytes_sent'] * ratio) if self.compression and ratio is not None
+            else self.stats['bytes_sent']
+        )
+        return stats
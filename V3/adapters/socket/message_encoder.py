@@ -0,0 +1,119 @@
+# Simos/V3/adapters/socket/message_encoder.py
+
+import json
+import logging
+from typing import Dict, Any, Optional, Tuple, Union
+
+try:
+    import orjson
+except ImportError:  # orjson es opcional; sin él se usa el encoder de la stdlib
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # msgpack es opcional; sin él solo se ofrece JSON a la UI
+    msgpack = None
+
+SUPPORTED_ENCODINGS = ("json", "msgpack") if msgpack is not None else ("json",)
+
+def _msgpack_default(value: Any) -> Any:
+    """Convierte tipos no nativos de msgpack (numpy, datetime, etc.)."""
+    if hasattr(value, 'item'):  # Escalares numpy
+        return value.item()
+    if hasattr(value, 'tolist'):  # Arrays numpy
+        return value.tolist()
+    return str(value)
+
+def encode_message(message: Dict[str, Any], encoding: str = "json") -> Union[str, bytes]:
+    """
+    Serializa un mensaje UI.
+
+    "json" produce texto (frame de texto WebSocket); "msgpack" produce bytes
+    (frame binario) para los clientes que negociaron ese subprotocolo.
+    """
+    if encoding == "msgpack":
+        return msgpack.packb(message, default=_msgpack_default, use_bin_type=True)
+    if orjson is not None:
+        return orjson.dumps(
+            message, default=str, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        ).decode('utf-8')
+    return json.dumps(message, default=str, separators=(',', ':'))
+
+def encoder_name() -> str:
+    """Nombre del encoder JSON en uso."""
+    return 'orjson' if orjson is not None else 'json'
+
+class EncodedFrame:
+    """
+    Mensaje UI listo para enviar, serializado a lo sumo una vez por codificación.
+
+    La versión JSON se genera al crearlo; la MessagePack solo cuando el primer
+    cliente binario la pide, y luego se reutiliza para el resto.
+    """
+
+    __slots__ = ('message', '_encoded')
+
+    def __init__(self, message: Dict[str, Any]):
+        self.message = message
+        self._encoded: Dict[str, Union[str, bytes]] = {"json": encode_message(message)}
+
+    def data(self, encoding: str = "json") -> Union[str, bytes]:
+        """Retorna el frame en la codificación pedida."""
+        encoded = self._encoded.get(encoding)
+        if encoded is None:
+            encoded = encode_message(self.message, encoding)
+            self._encoded[encoding] = encoded
+        return encoded
+
+class FrameCache:
+    """
+    Guarda el frame serializado del último snapshot de cada tipo (top20, balance, modelo).
+
+    Mientras el payload no cambie, todos los envíos reutilizan el mismo frame en
+    lugar de volver a serializarlo por cliente.
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger('V3.FrameCache')
+        self._frames: Dict[str, Tuple[Any, EncodedFrame]] = {}
+        self.stats = {'encodes': 0, 'hits': 0}
+
+    def put(self, key: str, payload: Any, message: Dict[str, Any]) -> EncodedFrame:
+        """Serializa y guarda el frame de un snapshot nuevo."""
+        frame = EncodedFrame(message)
+        self._frames[key] = (payload, frame)
+        self.stats['encodes'] += 1
+        return frame
+
+    def get(self, key: str) -> Optional[EncodedFrame]:
+        """Retorna el frame cacheado de un snapshot, si existe."""
+        entry = self._frames.get(key)
+        if entry is None:
+            return None
+        self.stats['hits'] += 1
+        return entry[1]
+
+    def get_or_encode(self, key: str, payload: Any, message: Dict[str, Any]) -> EncodedFrame:
+        """Reutiliza el frame si el payload es igual al cacheado; si no, lo serializa de nuevo."""
+        entry = self._frames.get(key)
+        if entry is not None and (entry[0] is payload or entry[0] == payload):
+            self.stats['hits'] += 1
+            return entry[1]
+        return self.put(key, payload, message)
+
+    def invalidate(self, key: str = None):
+        """Descarta un frame cacheado (o todos)."""
+        if key is None:
+            self._frames.clear()
+        else:
+            self._frames.pop(key, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Retorna estadísticas del cache de frames."""
+        return {
+            'encoder': encoder_name(),
+            'encodings': list(SUPPORTED_ENCODINGS),
+            'cached_frames': len(self._frames),
+            'encodes': self.stats['encodes'],
+            'hits': self.stats['hits']
+        }
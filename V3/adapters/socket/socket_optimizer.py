@@ -2,13 +2,125 @@
 
 import asyncio
 import logging
-from typing import Dict, Any, Optional
+import time
+from typing import Dict, Any, Optional, Callable, Awaitable
 from datetime import datetime, timedelta
 
+from shared.config_v3 import UI_MESSAGE_RATE_POLICIES
 from adapters.socket.ui_broadcaster import UIBroadcaster
 from adapters.connectors.sebo_connector import SeboConnector
 from adapters.persistence.data_persistence import DataPersistence
 
+class CoalescingScheduler:
+    """
+    Limita la frecuencia de envío por tipo de mensaje conservando solo el último valor.
+
+    El primer valor de una ráfaga se envía de inmediato; los siguientes dentro de
+    la ventana se coalescen y se envía el último al cumplirse el intervalo mínimo.
+    Con 'on_change' se omiten valores iguales al último enviado.
+    """
+
+    def __init__(self, policies: Dict[str, Dict] = None):
+        self.logger = logging.getLogger('V3.CoalescingScheduler')
+        self.policies = {}
+        for message_type, policy in (policies if policies is not None else UI_MESSAGE_RATE_POLICIES).items():
+            max_hz = policy.get('max_hz')
+            self.policies[message_type] = {
+                'min_interval': 1.0 / max_hz if max_hz else 0.0,
+                'on_change': policy.get('on_change', False)
+            }
+        
+        self._last_flush: Dict[str, float] = {}
+        self._last_value: Dict[str, Any] = {}
+        self._pending: Dict[str, tuple] = {}
+        self._timers: Dict[str, asyncio.Task] = {}
+        self.stats: Dict[str, Dict[str, int]] = {}
+    
+    def _type_stats(self, message_type: str) -> Dict[str, int]:
+        """Contadores de un tipo de mensaje."""
+        if message_type not in self.stats:
+            self.stats[message_type] = {'submitted': 0, 'flushed': 0, 'coalesced': 0, 'unchanged': 0}
+        return self.stats[message_type]
+    
+    async def submit(self, message_type: str, value: Any, flush: Callable[[Any], Awaitable]):
+        """Entrega un valor; se envía ahora, se coalesce o se omite según la política del tipo."""
+        policy = self.policies.get(message_type)
+        if policy is None:
+            await flush(value)
+            return
+        
+        stats = self._type_stats(message_type)
+        stats['submitted'] += 1
+        
+        if policy['on_change'] and message_type not in self._pending and self._last_value.get(message_type) == value:
+            stats['unchanged'] += 1
+            return
+        
+        elapsed = time.monotonic() - self._last_flush.get(message_type, float('-inf'))
+        if message_type not in self._pending and elapsed >= policy['min_interval']:
+            await self._flush_now(message_type, value, flush)
+            return
+        
+        # Dentro de la ventana: conservar solo el último valor
+        if message_type in self._pending:
+            stats['coalesced'] += 1
+        self._pending[message_type] = (value, flush)
+        
+        if message_type not in self._timers:
+            delay = max(0.0, policy['min_interval'] - elapsed)
+            self._timers[message_type] = asyncio.create_task(self._flush_later(message_type, delay))
+    
+    async def _flush_now(self, message_type: str, value: Any, flush: Callable[[Any], Awaitable]):
+        """Envía un valor y registra el momento del envío."""
+        self._last_flush[message_type] = time.monotonic()
+        if self.policies[message_type]['on_change']:
+            self._last_value[message_type] = value
+        self._type_stats(message_type)['flushed'] += 1
+        await flush(value)
+    
+    async def _flush_later(self, message_type: str, delay: float):
+        """Envía el último valor pendiente al cumplirse el intervalo."""
+        try:
+            await asyncio.sleep(delay)
+            self._timers.pop(message_type, None)
+            pending = self._pending.pop(message_type, None)
+            if pending:
+                value, flush = pending
+                if self.policies[message_type]['on_change'] and self._last_value.get(message_type) == value:
+                    self._type_stats(message_type)['unchanged'] += 1
+                    return
+                await self._flush_now(message_type, value, flush)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            self.logger.error(f"Error enviando mensaje coalescido {message_type}: {e}")
+    
+    def discard(self, message_type: str):
+        """Descarta el valor pendiente de un tipo (ej: progreso obsoleto tras completar)."""
+        self._pending.pop(message_type, None)
+        timer = self._timers.pop(message_type, None)
+        if timer:
+            timer.cancel()
+    
+    async def stop(self):
+        """Cancela los envíos pendientes."""
+        for message_type in list(self._timers):
+            self.discard(message_type)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Retorna contadores por tipo de mensaje."""
+        return {
+            'policies': {
+                message_type: {
+                    'max_hz': round(1.0 / policy['min_interval'], 2) if policy['min_interval'] else None,
+                    'on_change': policy['on_change']
+                }
+                for message_type, policy in self.policies.items()
+            },
+            'pending': list(self._pending),
+            'by_type': {message_type: dict(stats) for message_type, stats in self.stats.items()}
+        }
+
 class SocketOptimizer:
     """Optimiza la comunicación por socket para mejorar el rendimiento."""
     
@@ -35,6 +147,10 @@ class SocketOptimizer:
         # Tareas en background
         self.top20_task = None
         
+        # Coalescencia y límite de frecuencia por tipo de mensaje hacia la UI
+        self.scheduler = CoalescingScheduler()
+        self.ui_broadcaster.set_message_scheduler(self.scheduler)
+        
     async def start(self):
         """Inicia la optimización de comunicación por socket."""
         try:
@@ -59,6 +175,9 @@ class SocketOptimizer:
         try:
             self.is_running = False
             
+            # Cancelar envíos coalescidos pendientes
+            await self.scheduler.stop()
+            
             # Cancelar tareas en background
             if self.top20_task and not self.top20_task.done():
                 self.top20_task.cancel()
@@ -288,8 +407,8 @@ class SocketOptimizer:
                 await self.ui_broadcaster.broadcast_top20_data(top20_data)
                 self.last_valid_top20_data = top20_data
             elif self.last_valid_top20_data:
-                # Usar datos válidos anteriores
-                await self.ui_broadcaster.broadcast_top20_data(self.last_valid_top20_data)
+                # Reenviar el último snapshot a todos (sin cambios no habría delta)
+                await self.ui_broadcaster.send_latest_top20()
             
             # Enviar estado del sistema
             system_status = await self._get_system_status()
@@ -333,6 +452,8 @@ class SocketOptimizer:
             "top20_cached": self.last_valid_top20_data is not None,
             "top20_cache_size": len(self.last_valid_top20_data) if self.last_valid_top20_data else 0,
             "connected_clients": len(self.ui_broadcaster.ui_clients),
+            "client_channels": self.ui_broadcaster.get_channel_stats(),
+            "message_scheduler": self.scheduler.get_stats(),
             "min_top20_data_size": self.MIN_TOP20_DATA_SIZE
         }
 
@@ -0,0 +1,75 @@
+# Simos/V3/adapters/socket/top20_delta.py
+
+from typing import Dict, Any, List, Optional
+
+def top20_row_key(item: Dict) -> str:
+    """Clave estable de una fila del Top 20: símbolo + par de exchanges."""
+    # Debe coincidir con top20RowKey en UI/clients/src/hooks/useWebSocketController.jsx
+    return f"{item.get('symbol') or ''}|{item.get('exchange_min_id') or ''}|{item.get('exchange_max_id') or ''}"
+
+class Top20DeltaTracker:
+    """
+    Calcula parches por campo entre snapshots consecutivos del Top 20.
+
+    Cada cambio incrementa `seq`. Un delta se aplica sobre el estado con
+    `base_seq`; si el cliente no está en esa secuencia debe pedir un snapshot.
+
+    Formato del delta:
+        {
+            "seq": 42, "base_seq": 41,
+            "upserts": {row_key: {campo: valor, ...}},  # filas nuevas completas, existentes solo campos cambiados
+            "removes": [row_key, ...],
+            "order": [row_key, ...]                      # solo si cambió el orden o la composición
+        }
+    """
+
+    def __init__(self):
+        self.seq = 0
+        self._rows: Dict[str, Dict] = {}
+        self._order: List[str] = []
+
+    def update(self, top20_data: List[Dict]) -> Optional[Dict[str, Any]]:
+        """Registra un snapshot nuevo y retorna el delta, o None si no hubo cambios."""
+        new_rows: Dict[str, Dict] = {}
+        new_order: List[str] = []
+        for item in top20_data:
+            key = top20_row_key(item)
+            if key in new_rows:
+                continue  # Sebo no debería repetir filas; conservar la primera
+            new_rows[key] = item
+            new_order.append(key)
+
+        upserts: Dict[str, Dict] = {}
+        for key, row in new_rows.items():
+            previous = self._rows.get(key)
+            if previous is None:
+                upserts[key] = row
+                continue
+
+            patch = {field: value for field, value in row.items() if previous.get(field) != value}
+            # Campos que desaparecieron de la fila
+            for field in previous.keys() - row.keys():
+                patch[field] = None
+            if patch:
+                upserts[key] = patch
+
+        removes = [key for key in self._order if key not in new_rows]
+        order_changed = new_order != self._order
+
+        if not upserts and not removes and not order_changed:
+            return None
+
+        self.seq += 1
+        self._rows = new_rows
+        self._order = new_order
+
+        delta = {
+            "seq": self.seq,
+            "base_seq": self.seq - 1,
+            "upserts": upserts,
+            "removes": removes
+        }
+        if order_changed:
+            delta["order"] = new_order
+        return delta
+
@@ -7,8 +7,29 @@ import urllib.parse
 from typing import Dict, Any, Set, Optional, Callable
 import websockets
 from websockets.exceptions import ConnectionClosed
-from shared.config_v3 import UI_WEBSOCKET_URL
+from websockets.extensions.permessage_deflate import ServerPerMessageDeflateFactory
+from shared.config_v3 import (
+    UI_WEBSOCKET_URL, UI_COALESCE_MESSAGE_TYPES, UI_WEBSOCKET_COMPRESSION_ENABLED,
+    UI_WEBSOCKET_DEFLATE_OPTIONS, UI_WEBSOCKET_SUBPROTOCOLS, UI_MESSAGE_TOPICS, UI_TOPICS
+)
 from shared.utils import get_current_timestamp
+from adapters.socket.client_channel import ClientChannel
+from adapters.socket.message_encoder import EncodedFrame, FrameCache, SUPPORTED_ENCODINGS
+from adapters.socket.top20_delta import Top20DeltaTracker
+from shared.metrics import registry
+
+UI_CLIENTS = registry.gauge("simos_ui_clients", "Clientes UI conectados")
+UI_EVICTED = registry.counter("simos_ui_evicted_clients", "Clientes UI desalojados por no consumir sus mensajes")
+UI_QUEUE_DEPTH = registry.gauge("simos_ui_queue_depth", "Mensajes pendientes en las colas de clientes UI", ["aggregate"])
+# Las colas viven lo que dura cada conexión: son gauges con los totales de los clientes conectados
+UI_MESSAGES = registry.gauge(
+    "simos_ui_connected_client_messages", "Mensajes de las colas de los clientes UI conectados por resultado", ["result"]
+)
+UI_BYTES_SENT = registry.gauge(
+    "simos_ui_connected_client_bytes_sent", "Bytes enviados a los clientes UI conectados (antes de compresión)"
+)
+UI_FRAME_CACHE = registry.counter("simos_ui_frame_cache", "Serializaciones del cache de frames por resultado", ["result"])
+UI_TOPIC_SUBSCRIBERS = registry.gauge("simos_ui_topic_subscribers", "Clientes suscritos por tópico", ["topic"])
 
 class UIBroadcaster:
     """Maneja la comunicación WebSocket con la interfaz de usuario."""
@@ -16,8 +37,20 @@ class UIBroadcaster:
     def __init__(self):
         self.logger = logging.getLogger('V3.UIBroadcaster')
         self.ui_clients: Set[websockets.WebSocketServerProtocol] = set()
+        self.client_channels: Dict[Any, ClientChannel] = {}  # Cola de envío por cliente
+        self.evicted_clients_count = 0
+        # Índice tópico -> clientes suscritos; la difusión solo recorre los suscriptores
+        self.topic_subscribers: Dict[str, Set] = {topic: set() for topic in UI_TOPICS}
+        self.topic_stats: Dict[str, Dict[str, int]] = {
+            topic: {'messages': 0, 'deliveries': 0, 'skipped_deliveries': 0} for topic in UI_TOPICS
+        }
+        self.frame_cache = FrameCache()  # Frames serializados de los últimos snapshots
+        self.top20_delta = Top20DeltaTracker()  # Secuencia y parches del Top 20
+        registry.register_collector('ui_broadcaster', self._collect_metrics)
+        self.message_scheduler = None  # Coalescencia por tipo (la configura SocketOptimizer)
         self.server = None
         self.is_running = False
+        self.loop: Optional[asyncio.AbstractEventLoop] = None  # Loop del servidor, para envíos desde otros hilos
         
         # Cache para evitar envío de datos vacíos
         self.last_valid_top20_data = None
@@ -35,6 +68,7 @@ class UIBroadcaster:
         self.on_get_training_status_callback: Optional[Callable] = None
         self.on_get_test_status_callback: Optional[Callable] = None
         self.get_ai_model_details_callback: Optional[Callable] = None
+        self.on_cancel_dataset_creation_callback: Optional[Callable] = None
         
         # Estado del trading
         self.trading_active = False
@@ -63,11 +97,15 @@ class UIBroadcaster:
             host = "0.0.0.0"  # Permitir conexiones desde cualquier IP
             
             self.logger.info(f"Iniciando servidor WebSocket UI en {host}:{port}")
+            self.loop = asyncio.get_running_loop()
             
             self.server = await websockets.serve(
                 self._handle_ui_client,
                 host,
                 port,
+                compression=None,  # Deflate se configura explícitamente en extensions
+                extensions=self._build_extensions(),
+                subprotocols=self._available_subprotocols() or None,
                 ping_interval=30,  # Envía un ping cada 30 segundos
                 ping_timeout=20,   # Espera 20 segundos por el pong
                 close_timeout=10   # Tiempo para cerrar la conexión
@@ -80,6 +118,19 @@ class UIBroadcaster:
             self.logger.error(f"Error iniciando servidor WebSocket UI: {e}")
             raise
     
+    def _build_extensions(self) -> list:
+        """Extensiones WebSocket ofrecidas a los clientes (permessage-deflate configurable)."""
+        if not UI_WEBSOCKET_COMPRESSION_ENABLED:
+            return []
+        return [ServerPerMessageDeflateFactory(**UI_WEBSOCKET_DEFLATE_OPTIONS)]
+    
+    def _available_subprotocols(self) -> list:
+        """Subprotocolos cuya codificación está disponible (msgpack requiere el paquete instalado)."""
+        return [
+            subprotocol for subprotocol, encoding in UI_WEBSOCKET_SUBPROTOCOLS.items()
+            if encoding in SUPPORTED_ENCODINGS
+        ]
+    
     async def stop_server(self):
         """Detiene el servidor WebSocket."""
         if self.server:
@@ -91,9 +142,29 @@ class UIBroadcaster:
     async def _handle_ui_client(self, websocket, path):
         """Maneja conexiones de clientes UI."""
         client_address = f"{websocket.remote_address[0]}:{websocket.remote_address[1]}"
-        self.logger.info(f"Cliente UI conectado: {client_address} (path: {path})")
+        # Sin subprotocolo negociado el cliente recibe JSON, como siempre
+        encoding = UI_WEBSOCKET_SUBPROTOCOLS.get(websocket.subprotocol, "json")
+        compression = next(
+            (extension.name for extension in getattr(websocket, 'extensions', None) or []), None
+        )
+        self.logger.info(
+            f"Cliente UI conectado: {client_address} (path: {path}, "
+            f"codificación: {encoding}, compresión: {compression or 'ninguna'})"
+        )
         
         self.ui_clients.add(websocket)
+        channel = ClientChannel(
+            websocket,
+            coalesce_types=UI_COALESCE_MESSAGE_TYPES,
+            snapshot_providers={"top20_delta": self._get_top20_snapshot_frame},
+            encoding=encoding,
+            compression=compression,
+            client_address=client_address,
+            on_evict=self._on_client_evicted
+        )
+        self.client_channels[websocket] = channel
+        self._set_client_topics(channel, UI_TOPICS)  # Por defecto, todos los tópicos
+        channel.start()
         
         try:
             # Enviar estado inicial y datos adicionales al cliente
@@ -112,6 +183,16 @@ class UIBroadcaster:
             self.logger.error(f"Error en cliente UI {client_address}: {e}")
         finally:
             self.ui_clients.discard(websocket)
+            self.client_channels.pop(websocket, None)
+            self._set_client_topics(channel, ())
+            await channel.close()
+    
+    def _on_client_evicted(self, channel: ClientChannel):
+        """Quita de la difusión a un cliente desalojado por lentitud."""
+        self.ui_clients.discard(channel.websocket)
+        self.client_channels.pop(channel.websocket, None)
+        self._set_client_topics(channel, ())
+        self.evicted_clients_count += 1
     
     async def _send_initial_state(self, websocket):
         """Envía el estado inicial a un cliente UI recién conectado."""
@@ -127,7 +208,7 @@ class UIBroadcaster:
         }
         
         try:
-            await websocket.send(json.dumps(initial_state))
+            await self._send_frame(websocket, "initial_state", EncodedFrame(initial_state))
             self.logger.debug(f"Estado inicial enviado a cliente UI")
         except Exception as e:
             self.logger.error(f"Error enviando estado inicial: {e}")
@@ -174,6 +255,14 @@ class UIBroadcaster:
             elif message_type == 'get_test_status':
                 if self.on_get_test_status_callback:
                     await self.on_get_test_status_callback(websocket)
+            elif message_type == 'request_top20_snapshot':
+                # El cliente detectó un salto de secuencia en los deltas
+                await self.send_latest_top20(websocket)
+            elif message_type in ('subscribe', 'unsubscribe', 'set_subscriptions'):
+                await self._handle_subscription(websocket, message_type, payload)
+            elif message_type == 'cancel_dataset_creation':
+                if self.on_cancel_dataset_creation_callback:
+                    await self.on_cancel_dataset_creation_callback(payload)
             else:
                 # Callback genérico para otros mensajes
                 if self.on_ui_message_callback:
@@ -184,6 +273,62 @@ class UIBroadcaster:
         except Exception as e:
             self.logger.error(f"Error procesando mensaje UI: {e}")
     
+    async def _handle_subscription(self, websocket, message_type: str, payload: Dict):
+        """
+        Actualiza los tópicos de un cliente.
+
+        payload: {"topics": ["top20", "balances", ...]}; "*" equivale a todos.
+        Al suscribirse a un tópico con snapshot se envía su último valor.
+        """
+        channel = self.client_channels.get(websocket)
+        if not channel:
+            return
+        
+        requested = set((payload or {}).get('topics') or [])
+        if '*' in requested:
+            requested = set(UI_TOPICS)
+        unknown = requested - set(UI_TOPICS)
+        if unknown:
+            self.logger.warning(f"Tópicos UI desconocidos ignorados: {sorted(unknown)}")
+        requested &= set(UI_TOPICS)
+        
+        previous = set(channel.topics)
+        if message_type == 'subscribe':
+            topics = previous | requested
+        elif message_type == 'unsubscribe':
+            topics = previous - requested
+        else:
+            topics = requested
+        
+        self._set_client_topics(channel, topics)
+        self.logger.debug(f"Suscripciones de {channel.client_address}: {sorted(topics)}")
+        
+        await self._send_frame(websocket, "subscriptions", EncodedFrame({
+            "type": "subscriptions",
+            "payload": {
+                "topics": sorted(topics),
+                "available_topics": UI_TOPICS,
+                "timestamp": get_current_timestamp()
+            }
+        }))
+        
+        # El cliente no recibió nada de estos tópicos mientras no estaba suscrito
+        added = topics - previous
+        if 'top20' in added:
+            await self.send_latest_top20(websocket)
+        if 'balances' in added:
+            await self.send_latest_balance(websocket)
+        if 'training' in added:
+            await self.send_ai_model_details(websocket)
+    
+    def _set_client_topics(self, channel: ClientChannel, topics):
+        """Reemplaza los tópicos de un cliente manteniendo el índice por tópico."""
+        for topic in channel.topics - set(topics):
+            self.topic_subscribers[topic].discard(channel.websocket)
+        for topic in topics:
+            self.topic_subscribers[topic].add(channel.websocket)
+        channel.topics = set(topics)
+    
     async def _handle_start_trading(self, payload: Dict):
         """Maneja la solicitud de inicio de trading."""
         if not self.trading_active:
@@ -225,7 +370,7 @@ class UIBroadcaster:
         }
         
         try:
-            await websocket.send(json.dumps(status_message))
+            await self._send_frame(websocket, "trading_status", EncodedFrame(status_message))
         except Exception as e:
             self.logger.error(f"Error enviando estado de trading: {e}")
     
@@ -243,7 +388,7 @@ class UIBroadcaster:
         }
         
         try:
-            await websocket.send(json.dumps(system_status))
+            await self._send_frame(websocket, "system_status", EncodedFrame(system_status))
         except Exception as e:
             self.logger.error(f"Error enviando estado del sistema: {e}")
     
@@ -290,6 +435,14 @@ class UIBroadcaster:
         """Establece el callback para la solicitud del estado de pruebas."""
         self.on_get_test_status_callback = callback
 
+    def set_cancel_dataset_creation_callback(self, callback: Callable):
+        """Establece el callback para cancelar la creación de datasets."""
+        self.on_cancel_dataset_creation_callback = callback
+
+    def set_message_scheduler(self, scheduler):
+        """Establece el scheduler que limita la frecuencia de envío por tipo de mensaje."""
+        self.message_scheduler = scheduler
+
     def set_get_ai_model_details_callback(self, callback: Callable):
         """Establece el callback para obtener los detalles del modelo de IA."""
         self.get_ai_model_details_callback = callback
@@ -304,68 +457,188 @@ class UIBroadcaster:
 
     # Métodos públicos para broadcasting
     
+    async def _schedule(self, message_type: str, value: Any, flush):
+        """Pasa un valor por el scheduler de coalescencia, si hay uno configurado."""
+        if self.message_scheduler:
+            await self.message_scheduler.submit(message_type, value, flush)
+        else:
+            await flush(value)
+    
+    def _discard_scheduled(self, message_type: str):
+        """Descarta un valor coalescido pendiente que quedaría obsoleto."""
+        if self.message_scheduler:
+            self.message_scheduler.discard(message_type)
+    
     async def broadcast_message(self, message_data: Dict):
-        """Envía un mensaje a todos los clientes UI conectados."""
-        if not self.ui_clients:
+        """
+        Encola un mensaje para todos los clientes UI conectados.
+
+        Serializa una sola vez y no espera a la red: cada cliente tiene su propia
+        cola y tarea de escritura, así un navegador lento no retrasa a los demás
+        ni al llamador.
+        """
+        if not self.client_channels:
             self.logger.debug("No hay clientes UI conectados para enviar mensaje")
             return
         
-        message_json = json.dumps(message_data)
-        disconnected_clients = set()
-        
-        for client in self.ui_clients:
-            try:
-                await client.send(message_json)
-            except ConnectionClosed:
-                disconnected_clients.add(client)
-            except Exception as e:
-                self.logger.error(f"Error enviando mensaje a cliente UI: {e}")
-                disconnected_clients.add(client)
-        
-        # Remover clientes desconectados
-        for client in disconnected_clients:
-            self.ui_clients.discard(client)
+        message_type = message_data.get('type')
+        topic = UI_MESSAGE_TOPICS.get(message_type)
+        if topic and not self.topic_subscribers[topic]:
+            # Nadie muestra este tópico: ni siquiera se serializa
+            self.topic_stats[topic]['messages'] += 1
+            self.topic_stats[topic]['skipped_deliveries'] += len(self.client_channels)
+            return
         
-        if disconnected_clients:
-            self.logger.info(f"Removidos {len(disconnected_clients)} clientes desconectados")
+        await self.broadcast_frame(message_type, EncodedFrame(message_data))
+    
+    async def broadcast_frame(self, message_type: Optional[str], frame: EncodedFrame):
+        """Encola un frame ya serializado para los clientes UI suscritos a su tópico."""
+        closed_channels = []
+        
+        topic = UI_MESSAGE_TOPICS.get(message_type)
+        if topic:
+            subscribers = self.topic_subscribers[topic]
+            stats = self.topic_stats[topic]
+            stats['messages'] += 1
+            stats['deliveries'] += len(subscribers)
+            stats['skipped_deliveries'] += len(self.client_channels) - len(subscribers)
+            targets = [(websocket, self.client_channels[websocket])
+                       for websocket in list(subscribers) if websocket in self.client_channels]
+        else:
+            targets = list(self.client_channels.items())
+        
+        for websocket, channel in targets:
+            if not channel.enqueue(message_type, frame) and not channel.evicted:
+                closed_channels.append(websocket)
+        
+        # Remover clientes cuya conexión ya se cerró
+        for websocket in closed_channels:
+            self.ui_clients.discard(websocket)
+            channel = self.client_channels.pop(websocket, None)
+            if channel:
+                self._set_client_topics(channel, ())
+                await channel.close()
+        
+        if closed_channels:
+            self.logger.info(f"Removidos {len(closed_channels)} clientes desconectados")
+    
+    async def _send_frame(self, websocket, message_type: Optional[str], frame: EncodedFrame):
+        """Envía un frame ya serializado a un cliente, por su cola si la tiene."""
+        channel = self.client_channels.get(websocket)
+        if channel:
+            channel.enqueue(message_type, frame)
+        else:
+            encoding = UI_WEBSOCKET_SUBPROTOCOLS.get(getattr(websocket, 'subprotocol', None), "json")
+            await websocket.send(frame.data(encoding))
+    
+    def get_channel_stats(self) -> Dict[str, Any]:
+        """Retorna estadísticas agregadas de las colas de envío por cliente."""
+        channel_stats = [channel.get_stats() for channel in self.client_channels.values()]
+        return {
+            'clients': len(channel_stats),
+            'evicted_clients': self.evicted_clients_count,
+            'queue_depth_total': sum(stats['queue_depth'] for stats in channel_stats),
+            'queue_depth_max': max((stats['queue_depth'] for stats in channel_stats), default=0),
+            'sent': sum(stats['sent'] for stats in channel_stats),
+            'dropped': sum(stats['dropped'] for stats in channel_stats),
+            'coalesced': sum(stats['coalesced'] for stats in channel_stats),
+            'bytes_sent': sum(stats['bytes_sent'] for stats in channel_stats),
+            'estimated_wire_bytes': sum(stats['estimated_wire_bytes'] for stats in channel_stats),
+            'frame_cache': self.frame_cache.get_stats(),
+            'topics': {
+                topic: {'subscribers': len(self.topic_subscribers[topic]), **self.topic_stats[topic]}
+                for topic in UI_TOPICS
+            },
+            'connections': [
+                {
+                    key: stats[key] for key in (
+                        'client', 'topics', 'encoding', 'compression', 'bytes_sent',
+                        'estimated_wire_bytes', 'deflate_ratio_estimate'
+                    )
+                }
+                for stats in channel_stats
+            ]
+        }
+    
+    def _collect_metrics(self):
+        """Copia a las métricas el estado de las colas por cliente y del cache de frames."""
+        channel_stats = [channel.get_stats() for channel in self.client_channels.values()]
+        UI_CLIENTS.set(len(self.ui_clients))
+        UI_EVICTED.set_total(self.evicted_clients_count)
+        UI_QUEUE_DEPTH.set(sum(stats['queue_depth'] for stats in channel_stats), aggregate="total")
+        UI_QUEUE_DEPTH.set(max((stats['queue_depth'] for stats in channel_stats), default=0), aggregate="max")
+        for result in ('sent', 'dropped', 'coalesced'):
+            UI_MESSAGES.set(sum(stats[result] for stats in channel_stats), result=result)
+        UI_BYTES_SENT.set(sum(stats['bytes_sent'] for stats in channel_stats))
+        UI_FRAME_CACHE.set_total(self.frame_cache.stats['hits'], result="hit")
+        UI_FRAME_CACHE.set_total(self.frame_cache.stats['encodes'], result="encode")
+        for topic in UI_TOPICS:
+            UI_TOPIC_SUBSCRIBERS.set(len(self.topic_subscribers[topic]), topic=topic)
     
     async def broadcast_top20_data(self, top20_data: list):
-        """Retransmite datos del Top 20 a la UI solo si son válidos y han cambiado."""
+        """Retransmite el Top 20 a la UI, coalesciendo ráfagas de Sebo antes de calcular el delta."""
+        await self._schedule("top20_data", top20_data, self._broadcast_top20_data_now)
+    
+    async def _broadcast_top20_data_now(self, top20_data: list):
+        """
+        Retransmite cambios del Top 20 a la UI como delta por campo.
+
+        Las filas se identifican por símbolo + par de exchanges, así que se
+        detectan cambios en cualquier posición de la lista. Los clientes reciben
+        el snapshot completo (top20_data) al conectar o al pedirlo tras un salto
+        de secuencia, y luego solo deltas (top20_delta).
+        """
         # Validar que los datos no estén vacíos
         if not self._is_valid_data(top20_data, min_size=1):
             self.logger.debug("Datos Top 20 vacíos o inválidos, no se envían a la UI")
             return
         
-        # Verificar si los datos han cambiado significativamente
-        if self.last_valid_top20_data:
-            # Comparación simple para evitar envíos innecesarios
-            if len(top20_data) == len(self.last_valid_top20_data):
-                # Si el tamaño es igual, verificar algunos elementos clave
-                same_data = True
-                for i in range(min(3, len(top20_data))):
-                    if (top20_data[i].get('symbol') != self.last_valid_top20_data[i].get('symbol') or
-                        abs(top20_data[i].get('promedio', 0) - self.last_valid_top20_data[i].get('promedio', 0)) > 0.01):
-                        same_data = False
-                        break
-                
-                if same_data:
-                    self.logger.debug("Datos Top 20 sin cambios significativos, no se reenvían")
-                    return
+        delta = self.top20_delta.update(top20_data)
+        if delta is None:
+            self.logger.debug("Datos Top 20 sin cambios, no se reenvían")
+            return
         
         # Actualizar cache con datos válidos
         self.last_valid_top20_data = top20_data
         self.last_top20_timestamp = get_current_timestamp()
         
+        # Snapshot serializado una vez, para conexiones nuevas y resincronizaciones
+        self.frame_cache.put("top20_data", top20_data, self._top20_snapshot_message())
+        
         message = {
-            "type": "top20_data",
-            "payload": top20_data,
+            "type": "top20_delta",
+            "payload": delta,
             "timestamp": self.last_top20_timestamp
         }
         
         await self.broadcast_message(message)
-        self.logger.debug(f"Top 20 data válido retransmitido a {len(self.ui_clients)} clientes UI ({len(top20_data)} elementos)")
+        self.logger.debug(
+            f"Delta Top 20 seq {delta['seq']} retransmitido a {len(self.ui_clients)} clientes UI "
+            f"({len(delta['upserts'])} filas cambiadas, {len(delta['removes'])} removidas)"
+        )
+    
+    def _top20_snapshot_message(self) -> Dict:
+        """Mensaje de snapshot completo del Top 20 con su número de secuencia."""
+        return {
+            "type": "top20_data",
+            "payload": self.last_valid_top20_data,
+            "seq": self.top20_delta.seq,
+            "timestamp": self.last_top20_timestamp or get_current_timestamp()
+        }
+    
+    def _get_top20_snapshot_frame(self) -> Optional[EncodedFrame]:
+        """Frame del snapshot vigente del Top 20 (usado al reemplazar deltas acumulados)."""
+        if not self.last_valid_top20_data:
+            return None
+        return self.frame_cache.get_or_encode(
+            "top20_data", self.last_valid_top20_data, self._top20_snapshot_message()
+        )
     
     async def broadcast_balance_update(self, balance_data: Dict):
+        """Retransmite actualizaciones de balance a la UI, pasando por el scheduler de coalescencia."""
+        await self._schedule("balance_update", balance_data, self._broadcast_balance_update_now)
+    
+    async def _broadcast_balance_update_now(self, balance_data: Dict):
         """Retransmite actualizaciones de balance a la UI solo si son válidas y han cambiado."""
         # Validar que los datos no estén vacíos
         if not self._is_valid_data(balance_data):
@@ -392,7 +665,8 @@ class UIBroadcaster:
             "timestamp": self.last_balance_timestamp
         }
         
-        await self.broadcast_message(message)
+        frame = self.frame_cache.put("balance_update", balance_data, message)
+        await self.broadcast_frame("balance_update", frame)
         self.logger.debug(f"Balance update válido retransmitido a {len(self.ui_clients)} clientes UI")
     
     async def send_operation_result(self, operation_data: Dict):
@@ -455,11 +729,12 @@ class UIBroadcaster:
                 "payload": model_info,
                 "timestamp": get_current_timestamp()
             }
+            frame = self.frame_cache.get_or_encode("ai_model_details", model_info, message)
             
             if websocket:
-                await websocket.send(json.dumps(message))
+                await self._send_frame(websocket, "ai_model_details", frame)
             else:
-                await self.broadcast_message(message)
+                await self.broadcast_frame("ai_model_details", frame)
                 
         except Exception as e:
             self.logger.error(f"Error enviando detalles del modelo de IA: {e}")
@@ -486,11 +761,12 @@ class UIBroadcaster:
                     "payload": balance_data,
                     "timestamp": self.last_balance_timestamp or get_current_timestamp()
                 }
+                frame = self.frame_cache.get_or_encode("balance_update", balance_data, message)
                 
                 if websocket:
-                    await websocket.send(json.dumps(message))
+                    await self._send_frame(websocket, "balance_update", frame)
                 else:
-                    await self.broadcast_message(message)
+                    await self.broadcast_frame("balance_update", frame)
             else:
                 self.logger.debug("No hay datos de balance disponibles para enviar")
                 
@@ -498,19 +774,14 @@ class UIBroadcaster:
             self.logger.error(f"Error enviando el último balance: {e}")
 
     async def send_latest_top20(self, websocket=None):
-        """Envía los últimos datos del top 20 cacheados a un cliente específico o a todos."""
+        """Envía el snapshot del top 20 cacheado (con su secuencia) a un cliente específico o a todos."""
         try:
-            if self.last_valid_top20_data:
-                message = {
-                    "type": "top20_data",
-                    "payload": self.last_valid_top20_data,
-                    "timestamp": self.last_top20_timestamp or get_current_timestamp()
-                }
-                
+            frame = self._get_top20_snapshot_frame()
+            if frame:
                 if websocket:
-                    await websocket.send(json.dumps(message))
+                    await self._send_frame(websocket, "top20_data", frame)
                 else:
-                    await self.broadcast_message(message)
+                    await self.broadcast_frame("top20_data", frame)
             else:
                 self.logger.debug("No hay datos Top 20 cacheados para enviar")
                 
@@ -563,6 +834,31 @@ class UIBroadcaster:
         
         await self.broadcast_message(message)
     
+    async def broadcast_dataset_progress(self, dataset_type: str, status: str, rows_written: int,
+                                         total_rows: int, filepath: str = None):
+        """Envía el progreso de creación de un dataset (entrenamiento/pruebas) a la UI."""
+        progress = round(rows_written / total_rows * 100, 2) if total_rows else 0
+        
+        message = {
+            "type": "dataset_creation_update",
+            "payload": {
+                "dataset_type": dataset_type,
+                "status": status,
+                "progress": progress,
+                "rows_written": rows_written,
+                "total_rows": total_rows,
+                "filepath": filepath,
+                "timestamp": get_current_timestamp()
+            }
+        }
+        
+        if status == "IN_PROGRESS":
+            await self._schedule("dataset_creation_update", message, self.broadcast_message)
+        else:
+            self._discard_scheduled("dataset_creation_update")
+            await self.broadcast_message(message)
+        self.logger.debug(f"Progreso de dataset {dataset_type}: {rows_written}/{total_rows} - {status}")
+    
     async def broadcast_training_progress(self, progress: float, completed: bool, filepath: str = None):
         """Envía el progreso del entrenamiento a la UI."""
         status = "COMPLETED" if completed else ("IN_PROGRESS" if progress > 0 else "STARTING")
@@ -577,7 +873,11 @@ class UIBroadcaster:
             }
         }
         
-        await self.broadcast_message(message)
+        if status == "IN_PROGRESS":
+            await self._schedule("ai_training_update", message, self.broadcast_message)
+        else:
+            self._discard_scheduled("ai_training_update")
+            await self.broadcast_message(message)
         self.logger.debug(f"Progreso de entrenamiento enviado: {progress}% - {status}")
     
     async def broadcast_training_complete(self, results: Dict):
@@ -592,6 +892,7 @@ class UIBroadcaster:
             }
         }
         
+        self._discard_scheduled("ai_training_update")
         await self.broadcast_message(message)
         self.logger.info("Entrenamiento completado - resultado enviado a UI")
     
@@ -607,6 +908,7 @@ class UIBroadcaster:
             }
         }
         
+        self._discard_scheduled("ai_training_update")
         await self.broadcast_message(message)
         self.logger.error(f"Error de entrenamiento enviado a UI: {error_message}")
     
@@ -624,7 +926,11 @@ class UIBroadcaster:
             }
         }
         
-        await self.broadcast_message(message)
+        if status == "IN_PROGRESS":
+            await self._schedule("ai_test_update", message, self.broadcast_message)
+        else:
+            self._discard_scheduled("ai_test_update")
+            await self.broadcast_message(message)
         self.logger.debug(f"Progreso de pruebas enviado: {progress}% - {status}")
     
     async def broadcast_test_complete(self, results: Dict):
@@ -639,6 +945,7 @@ class UIBroadcaster:
             }
         }
         
+        self._discard_scheduled("ai_test_update")
         await self.broadcast_message(message)
         self.logger.info("Pruebas completadas - resultado enviado a UI")
     
@@ -654,6 +961,7 @@ class UIBroadcaster:
             }
         }
         
+        self._discard_scheduled("ai_test_update")
         await self.broadcast_message(message)
         self.logger.error(f"Error de pruebas enviado a UI: {error_message}")
     
@@ -669,6 +977,11 @@ class UIBroadcaster:
         try:
             self.logger.info("Limpiando UIBroadcaster...")
             
+            # Detener las tareas de escritura por cliente
+            for channel in list(self.client_channels.values()):
+                await channel.close()
+            self.client_channels.clear()
+            
             # Cerrar todas las conexiones de clientes
             if self.ui_clients:
                 for client in self.ui_clients.copy():
@@ -7,13 +7,11 @@ import json
 import time
 from datetime import datetime, timezone, timedelta
 from typing import Dict, Any, List, Optional, Tuple, Callable
-import pandas as pd
-import numpy as np
 from enum import Enum
 
 from shared.config_v3 import (
     SIMULATION_DELAY, MIN_PROFIT_USDT, MIN_PROFIT_PERCENTAGE,
-    SEBO_API_BASE_URL, PREFERRED_NETWORKS
+    SEBO_API_BASE_URL, PREFERRED_NETWORKS, REQUEST_TIMEOUT
 )
 from shared.utils import (
     safe_float, safe_dict_get, get_current_timestamp, 
@@ -22,6 +20,7 @@ from shared.utils import (
 from core.ai_model import ArbitrageAIModel
 from adapters.persistence.data_persistence import DataPersistence
 from adapters.exchanges.exchange_manager import ExchangeManager
+from adapters.connectors.http_client import SharedHTTPClient
 
 class SimulationMode(Enum):
     """Modos de simulación disponibles."""
@@ -46,7 +45,8 @@ class AdvancedSimulationEngine:
         ai_model: ArbitrageAIModel, 
         data_persistence: DataPersistence,
         exchange_manager: ExchangeManager = None,
-        ui_broadcaster = None
+        ui_broadcaster = None,
+        http_client: SharedHTTPClient = None
     ):
         self.logger = logging.getLogger('V3.AdvancedSimulationEngine')
         self.ai_model = ai_model
@@ -88,7 +88,9 @@ class AdvancedSimulationEngine:
             'transactions_log': []
         }
         
-        # HTTP session para API calls
+        # HTTP para la API sandbox de Sebo (pool compartido si se inyecta)
+        self._owns_http_client = http_client is None
+        self.http_client = http_client or SharedHTTPClient()
         self.http_session = None
     
     async def initialize(self):
@@ -96,10 +98,8 @@ class AdvancedSimulationEngine:
         try:
             self.logger.info("Inicializando AdvancedSimulationEngine...")
             
-            # Inicializar sesión HTTP si no existe
-            if not self.http_session:
-                import aiohttp
-                self.http_session = aiohttp.ClientSession()
+            # Obtener la sesión HTTP compartida
+            self.http_session = await self.http_client.get_session()
             
             self.logger.info("AdvancedSimulationEngine inicializado correctamente")
             
@@ -114,9 +114,9 @@ class AdvancedSimulationEngine:
             if self.is_simulation_running:
                 await self.stop_simulation()
             
-            # Cerrar sesión HTTP
-            if self.http_session and not self.http_session.closed:
-                await self.http_session.close()
+            # Cerrar sesión HTTP solo si es propia
+            if self._owns_http_client:
+                await self.http_client.close()
             
             self.logger.info("AdvancedSimulationEngine limpiado correctamente")
             
@@ -612,7 +612,7 @@ class AdvancedSimulationEngine:
                 self.http_session,
                 'POST',
                 url,
-                timeout=30,
+                timeout=REQUEST_TIMEOUT,
                 json=data
             )
             
@@ -1,24 +1,30 @@
 # Simos/V3/ai_model.py
 
+import asyncio
+import json
 import logging
 import numpy as np
-import pandas as pd
-from typing import Dict, Any, List, Optional, Tuple
+from typing import Dict, Any, List, Optional, Tuple, TYPE_CHECKING
 from datetime import datetime, timezone
-import joblib
-from sklearn.ensemble import RandomForestClassifier, GradientBoostingRegressor
-from sklearn.model_selection import train_test_split, cross_val_score
-from sklearn.preprocessing import StandardScaler, LabelEncoder
-from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score, mean_squared_error
 import os
+import time
+
+# pandas, sklearn y joblib se importan al usarlos: el arranque de V3 no espera por ellos
+# y la carga del modelo (que los necesita) corre en un hilo (start_background_load)
+if TYPE_CHECKING:
+    import pandas as pd
 
 from shared.config_v3 import AI_MODEL_PATH, AI_CONFIDENCE_THRESHOLD, MIN_PROFIT_PERCENTAGE, MIN_PROFIT_USDT
 from shared.utils import safe_float, safe_dict_get, get_current_timestamp
+from shared.metrics import registry
+
+PREDICT_SECONDS = registry.histogram("simos_ai_predict_seconds", "Duración de una predicción", ["model"])
+PREDICTIONS = registry.counter("simos_ai_predictions", "Predicciones por decisión", ["model", "decision"])
 
 class ArbitrageAIModel:
     """Modelo de IA para análisis y decisiones de arbitraje."""
     
-    def __init__(self, model_path: str = None):
+    def __init__(self, model_path: str = None, load_in_background: bool = False):
         self.logger = logging.getLogger('V3.ArbitrageAIModel')
         self.model_path = model_path or AI_MODEL_PATH
         
@@ -27,8 +33,8 @@ class ArbitrageAIModel:
         self.profit_regressor = None  # Predice la ganancia exacta
         self.risk_classifier = None  # Evalúa el riesgo de la operación
         
-        # Preprocesadores
-        self.feature_scaler = StandardScaler()
+        # Preprocesadores (el scaler se crea al entrenar o al cargar el modelo)
+        self.feature_scaler = None
         self.label_encoders = {}
         
         # Metadatos del modelo
@@ -39,13 +45,48 @@ class ArbitrageAIModel:
         # Configuración del modelo
         self.confidence_threshold = AI_CONFIDENCE_THRESHOLD
         
+        # Carga en segundo plano (ver start_background_load)
+        self.is_loading = False
+        self.load_seconds: Optional[float] = None
+        self._load_task: Optional[asyncio.Task] = None
+        
         # Intentar cargar modelo existente
-        self._load_model()
+        if not load_in_background:
+            self._load_model()
+    
+    def start_background_load(self) -> asyncio.Task:
+        """
+        Carga el modelo en un hilo sin bloquear el event loop (llamar desde una corrutina).
+        
+        Mientras carga, is_loading es True; TradingLogic no decide con la heurística
+        de respaldo hasta que termina.
+        """
+        if self._load_task is None:
+            self.is_loading = True
+            self._load_task = asyncio.get_running_loop().create_task(self._load_in_thread())
+        return self._load_task
+    
+    async def _load_in_thread(self):
+        start = time.perf_counter()
+        try:
+            await asyncio.to_thread(self._load_model)
+        finally:
+            self.load_seconds = time.perf_counter() - start
+            self.is_loading = False
+            self.logger.info(f"Carga del modelo de IA terminada en {self.load_seconds:.2f}s")
+    
+    async def wait_until_loaded(self):
+        """Espera a que termine la carga en segundo plano, si hay una en curso."""
+        if self._load_task is not None:
+            await asyncio.shield(self._load_task)
     
     def _load_model(self):
         """Carga un modelo previamente entrenado."""
         try:
             if os.path.exists(self.model_path):
+                import joblib
+                from sklearn.preprocessing import StandardScaler
+                
                 model_data = joblib.load(self.model_path)
                 
                 self.profitability_classifier = model_data.get('profitability_classifier')
@@ -76,6 +117,8 @@ class ArbitrageAIModel:
     def save_model(self):
         """Guarda el modelo entrenado."""
         try:
+            import joblib
+            
             # Crear directorio si no existe
             os.makedirs(os.path.dirname(self.model_path), exist_ok=True)
             
@@ -150,6 +193,8 @@ class ArbitrageAIModel:
             sell_exchange = operation_data.get('sell_exchange_id', 'unknown')
             
             # Codificar exchanges (usar label encoding)
+            if 'buy_exchange' not in self.label_encoders or 'sell_exchange' not in self.label_encoders:
+                from sklearn.preprocessing import LabelEncoder
             if 'buy_exchange' not in self.label_encoders:
                 self.label_encoders['buy_exchange'] = LabelEncoder()
             if 'sell_exchange' not in self.label_encoders:
@@ -243,6 +288,165 @@ class ArbitrageAIModel:
             # Retornar vector de ceros como fallback
             return np.zeros((1, len(self.feature_names) if self.feature_names else 20))
     
+    def prepare_features_batch(self, records) -> np.ndarray:
+        """
+        Versión vectorizada de prepare_features para muchos registros a la vez.
+
+        Args:
+            records: DataFrame o lista de diccionarios con el mismo formato que prepare_features
+
+        Returns:
+            Matriz (n_registros, n_características) en el orden de feature_names
+        """
+        import pandas as pd
+        
+        df = records if isinstance(records, pd.DataFrame) else pd.DataFrame(records)
+        n = len(df)
+        features = {}
+        
+        # Características de precios
+        buy_price = self._numeric_column(df, 'current_price_buy')
+        sell_price = self._numeric_column(df, 'current_price_sell')
+        valid_price = buy_price > 0
+        safe_buy = np.where(valid_price, buy_price, 1.0)
+        features['price_difference_percentage'] = np.where(valid_price, (sell_price - buy_price) / safe_buy * 100, 0.0)
+        features['price_ratio'] = np.where(valid_price, sell_price / safe_buy, 1.0)
+        features['buy_price'] = buy_price
+        features['sell_price'] = sell_price
+        
+        # Inversión y fees
+        features['investment_usdt'] = self._numeric_column(df, 'investment_usdt')
+        features['estimated_buy_fee'] = self._numeric_column(df, 'estimated_buy_fee')
+        features['estimated_sell_fee'] = self._numeric_column(df, 'estimated_sell_fee')
+        features['estimated_transfer_fee'] = self._numeric_column(df, 'estimated_transfer_fee')
+        total_fees = self._numeric_column(df, 'total_fees_usdt')
+        features['total_fees_usdt'] = np.where(
+            total_fees == 0,
+            features['estimated_buy_fee'] + features['estimated_sell_fee'] + features['estimated_transfer_fee'],
+            total_fees
+        )
+        
+        # Rentabilidad y tiempo de ejecución
+        features['net_profit_usdt'] = self._numeric_column(df, 'net_profit_usdt')
+        features['profit_percentage'] = self._numeric_column(df, 'profit_percentage')
+        features['profit_to_investment_ratio'] = features['net_profit_usdt'] / np.maximum(features['investment_usdt'], 1)
+        features['execution_time_seconds'] = self._numeric_column(df, 'execution_time_seconds')
+        features['execution_efficiency'] = features['net_profit_usdt'] / np.maximum(features['execution_time_seconds'], 1)
+        
+        # Exchanges (los no vistos en entrenamiento se codifican como -1)
+        buy_exchange = self._text_column(df, 'buy_exchange_id', 'unknown')
+        sell_exchange = self._text_column(df, 'sell_exchange_id', 'unknown')
+        features['buy_exchange_encoded'] = self._encode_labels('buy_exchange', buy_exchange)
+        features['sell_exchange_encoded'] = self._encode_labels('sell_exchange', sell_exchange)
+        same_exchange = (buy_exchange == sell_exchange).astype(float)
+        features['same_exchange'] = same_exchange
+        features['exchange_pair_risk'] = same_exchange
+        
+        # Fees por exchange desde market_data
+        market_data = self._dict_column(df, 'market_data')
+        features['buy_fee_percentage'] = np.array(
+            [safe_float(md.get('buy_fees', {}).get('taker', 0.001)) for md in market_data], dtype=float
+        ) * 100 if market_data is not None else np.full(n, 0.1)
+        features['sell_fee_percentage'] = np.array(
+            [safe_float(md.get('sell_fees', {}).get('taker', 0.001)) for md in market_data], dtype=float
+        ) * 100 if market_data is not None else np.full(n, 0.1)
+        features['total_fee_percentage'] = features['buy_fee_percentage'] + features['sell_fee_percentage']
+        
+        # Características temporales (sin timestamp válido se usa la hora actual)
+        if 'timestamp' in df.columns:
+            timestamps = pd.to_datetime(df['timestamp'], utc=True, errors='coerce')
+        else:
+            timestamps = pd.Series(pd.NaT, index=df.index, dtype='datetime64[ns, UTC]')
+        timestamps = timestamps.fillna(pd.Timestamp(datetime.now(timezone.utc)))
+        hour = timestamps.dt.hour.to_numpy(dtype=float)
+        weekday = timestamps.dt.weekday.to_numpy(dtype=float)
+        features['hour_of_day'] = hour
+        features['day_of_week'] = weekday
+        features['is_weekend'] = (weekday >= 5).astype(float)
+        features['is_business_hours'] = ((hour >= 9) & (hour <= 17)).astype(float)
+        
+        # Características del símbolo
+        symbol = pd.Series(self._text_column(df, 'symbol', 'UNKNOWN/USDT'))
+        base_currency = np.where(symbol.str.contains('/', regex=False), symbol.str.split('/').str[0], 'UNKNOWN')
+        features['is_popular_currency'] = np.isin(base_currency, ['BTC', 'ETH', 'BNB', 'ADA', 'SOL', 'XRP', 'DOT', 'AVAX']).astype(float)
+        features['is_btc'] = (base_currency == 'BTC').astype(float)
+        features['is_eth'] = (base_currency == 'ETH').astype(float)
+        features['is_stablecoin'] = np.isin(base_currency, ['USDT', 'USDC', 'BUSD', 'DAI']).astype(float)
+        
+        # Características de balance
+        balance_config = self._dict_column(df, 'balance_config')
+        current_balance = np.array(
+            [safe_float(bc.get('balance_usdt', 0)) for bc in balance_config], dtype=float
+        ) if balance_config is not None else np.zeros(n)
+        features['current_balance_usdt'] = current_balance
+        features['investment_to_balance_ratio'] = features['investment_usdt'] / np.maximum(current_balance, 1)
+        features['balance_after_investment'] = current_balance - features['investment_usdt']
+        features['balance_utilization'] = features['investment_usdt'] / np.maximum(current_balance, 1)
+        
+        # Características de riesgo (mismas reglas que _calculate_risk_score)
+        features['risk_score'] = np.minimum(
+            0.3 * (features['total_fee_percentage'] > 1.0) +
+            0.2 * (features['same_exchange'] == 1) +
+            0.4 * (features['price_difference_percentage'] < 0.5) +
+            0.3 * (features['balance_utilization'] > 0.8) +
+            0.1 * (features['is_weekend'] == 1),
+            1.0
+        )
+        features['profit_potential'] = np.maximum(0, features['price_difference_percentage'] - features['total_fee_percentage'])
+        features['fee_to_profit_ratio'] = (
+            features['total_fee_percentage'] / np.maximum(np.abs(features['price_difference_percentage']), 0.01)
+        )
+        
+        if not self.feature_names:
+            self.feature_names = sorted(features.keys())
+        
+        return np.column_stack([
+            features.get(feature_name, np.zeros(n)) for feature_name in self.feature_names
+        ]).astype(float) if n else np.zeros((0, len(self.feature_names)))
+    
+    @staticmethod
+    def _numeric_column(df: 'pd.DataFrame', column: str) -> np.ndarray:
+        """Convierte una columna a float como safe_float (quitando '%'); ausente o inválido -> 0."""
+        import pandas as pd
+        
+        if column not in df.columns:
+            return np.zeros(len(df))
+        values = df[column]
+        if values.dtype == object:
+            values = values.astype(str).str.replace('%', '', regex=False).str.strip()
+        return pd.to_numeric(values, errors='coerce').fillna(0.0).to_numpy(dtype=float)
+    
+    @staticmethod
+    def _text_column(df: 'pd.DataFrame', column: str, default: str) -> np.ndarray:
+        """Retorna una columna de texto, con default para valores ausentes."""
+        if column not in df.columns:
+            return np.full(len(df), default, dtype=object)
+        return df[column].fillna(default).astype(str).to_numpy(dtype=object)
+    
+    @staticmethod
+    def _dict_column(df: 'pd.DataFrame', column: str) -> Optional[List[Dict]]:
+        """Retorna una columna de diccionarios (acepta JSON serializado del CSV)."""
+        if column not in df.columns:
+            return None
+        parsed = []
+        for value in df[column]:
+            if isinstance(value, str):
+                try:
+                    value = json.loads(value)
+                except ValueError:
+                    value = {}
+            parsed.append(value if isinstance(value, dict) else {})
+        return parsed
+    
+    def _encode_labels(self, encoder_name: str, values: np.ndarray) -> np.ndarray:
+        """Codifica etiquetas con el LabelEncoder entrenado; valores no vistos -> -1."""
+        encoder = self.label_encoders.get(encoder_name)
+        classes = getattr(encoder, 'classes_', None)
+        if classes is None:
+            return np.full(len(values), -1.0)
+        mapping = {label: index for index, label in enumerate(classes)}
+        return np.array([mapping.get(value, -1) for value in values], dtype=float)
+    
     def _calculate_risk_score(self, features: Dict) -> float:
         """Calcula un score de riesgo basado en múltiples factores."""
         risk_score = 0.0
@@ -275,6 +479,11 @@ class ArbitrageAIModel:
             if len(training_data) < 10:
                 raise ValueError("Se necesitan al menos 10 registros para entrenar")
             
+            from sklearn.ensemble import RandomForestClassifier, GradientBoostingRegressor
+            from sklearn.model_selection import train_test_split, cross_val_score
+            from sklearn.preprocessing import StandardScaler
+            from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score, mean_squared_error
+            
             self.logger.info(f"Iniciando entrenamiento con {len(training_data)} registros")
             
             # Preparar datos
@@ -289,6 +498,7 @@ class ArbitrageAIModel:
             )
             
             # Escalar características
+            self.feature_scaler = StandardScaler()
             X_train_scaled = self.feature_scaler.fit_transform(X_train)
             X_test_scaled = self.feature_scaler.transform(X_test)
             
@@ -371,6 +581,8 @@ class ArbitrageAIModel:
             all_buy_exchanges.append(data.get('buy_exchange_id', 'unknown'))
             all_sell_exchanges.append(data.get('sell_exchange_id', 'unknown'))
         
+        from sklearn.preprocessing import LabelEncoder
+        
         # Ajustar label encoders
         self.label_encoders['buy_exchange'] = LabelEncoder()
         self.label_encoders['sell_exchange'] = LabelEncoder()
@@ -419,6 +631,15 @@ class ArbitrageAIModel:
     
     def predict(self, operation_data: Dict) -> Dict:
         """Realiza una predicción para una operación de arbitraje."""
+        model = "trained" if self.is_trained else "fallback"
+        start = time.perf_counter()
+        prediction = self._predict(operation_data)
+        PREDICT_SECONDS.observe(time.perf_counter() - start, model=model)
+        PREDICTIONS.inc(model=model, decision="execute" if prediction.get("should_execute") else "skip")
+        return prediction
+    
+    def _predict(self, operation_data: Dict) -> Dict:
+        """Predicción con los modelos entrenados (o heurística si no hay modelo)."""
         try:
             if not self.is_trained:
                 return self._fallback_prediction(operation_data)
@@ -476,6 +697,48 @@ class ArbitrageAIModel:
             self.logger.error(f"Error en predicción: {e}")
             return self._fallback_prediction(operation_data)
     
+    def predict_batch(self, records) -> Dict[str, np.ndarray]:
+        """
+        Predice muchas operaciones en una sola pasada por los modelos.
+
+        Returns:
+            Arrays alineados con los registros: success_probability, high_risk_probability,
+            predicted_profit_usdt, confidence y should_execute
+        """
+        if not self.is_trained:
+            raise ValueError("El modelo no está entrenado")
+        
+        X_scaled = self.feature_scaler.transform(self.prepare_features_batch(records))
+        
+        profitability_proba = self.profitability_classifier.predict_proba(X_scaled)
+        risk_proba = self.risk_classifier.predict_proba(X_scaled)
+        profit_prediction = self.profit_regressor.predict(X_scaled)
+        
+        n = X_scaled.shape[0]
+        success_probability = profitability_proba[:, 1] if profitability_proba.shape[1] > 1 else np.full(n, 0.5)
+        high_risk_probability = risk_proba[:, 1] if risk_proba.shape[1] > 1 else np.full(n, 0.5)
+        
+        # Misma ponderación que _calculate_confidence
+        profit_factor = np.minimum(profit_prediction / MIN_PROFIT_USDT, 2.0) / 2.0
+        confidence = np.clip(
+            success_probability * 0.4 + (1 - high_risk_probability) * 0.3 + profit_factor * 0.3, 0.0, 1.0
+        )
+        
+        should_execute = (
+            (success_probability >= self.confidence_threshold) &
+            (high_risk_probability < 0.7) &
+            (profit_prediction >= MIN_PROFIT_USDT) &
+            (confidence >= self.confidence_threshold)
+        )
+        
+        return {
+            'success_probability': success_probability,
+            'high_risk_probability': high_risk_probability,
+            'predicted_profit_usdt': profit_prediction,
+            'confidence': confidence,
+            'should_execute': should_execute
+        }
+    
     def _calculate_confidence(self, success_prob: float, risk_prob: float, predicted_profit: float) -> float:
         """Calcula la confianza general de la predicción."""
         try:
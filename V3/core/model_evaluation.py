@@ -0,0 +1,146 @@
+# Simos/V3/core/model_evaluation.py
+
+import asyncio
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import (
+    confusion_matrix, precision_score, recall_score, f1_score, roc_auc_score, brier_score_loss
+)
+
+from shared.utils import safe_float
+
+MIN_TEST_RECORDS = 5
+CALIBRATION_BINS = 10
+
+def _percent(value: float) -> float:
+    """Convierte una fracción a porcentaje redondeado, como espera la UI."""
+    return round(float(value) * 100, 2)
+
+def calibration_table(y_true: np.ndarray, y_score: np.ndarray, n_bins: int = CALIBRATION_BINS) -> List[Dict]:
+    """Agrupa las probabilidades predichas en bins y compara con la frecuencia observada."""
+    bins = np.clip((y_score * n_bins).astype(int), 0, n_bins - 1)
+    counts = np.bincount(bins, minlength=n_bins)
+    predicted_sum = np.bincount(bins, weights=y_score, minlength=n_bins)
+    observed_sum = np.bincount(bins, weights=y_true, minlength=n_bins)
+
+    table = []
+    for index in range(n_bins):
+        if counts[index] == 0:
+            continue
+        table.append({
+            "bin": f"{index / n_bins:.1f}-{(index + 1) / n_bins:.1f}",
+            "count": int(counts[index]),
+            "meanPredicted": round(float(predicted_sum[index] / counts[index]), 4),
+            "observedRate": round(float(observed_sum[index] / counts[index]), 4)
+        })
+    return table
+
+def evaluate_predictions(y_true: np.ndarray, y_pred: np.ndarray, y_score: np.ndarray,
+                         net_profit: np.ndarray) -> Dict[str, Any]:
+    """
+    Calcula métricas de clasificación, calibración y rentabilidad.
+
+    Args:
+        y_true: 1 si la operación fue realmente exitosa
+        y_pred: 1 si el modelo habría ejecutado la operación
+        y_score: Probabilidad de éxito predicha
+        net_profit: Ganancia neta real de cada operación (USDT)
+    """
+    y_true = np.asarray(y_true, dtype=int)
+    y_pred = np.asarray(y_pred, dtype=int)
+    y_score = np.asarray(y_score, dtype=float)
+    net_profit = np.asarray(net_profit, dtype=float)
+    total = len(y_true)
+
+    tn, fp, fn, tp = confusion_matrix(y_true, y_pred, labels=[0, 1]).ravel()
+    correct = int(tp + tn)
+
+    # ROC-AUC solo está definido si ambas clases están presentes
+    roc_auc = float(roc_auc_score(y_true, y_score)) if len(np.unique(y_true)) > 1 else None
+
+    executed = y_pred == 1
+    executed_profit = float(net_profit[executed].sum())
+    oracle_profit = float(net_profit[net_profit > 0].sum())
+
+    return {
+        # Claves existentes consumidas por la UI (en porcentaje)
+        "accuracy": _percent(correct / total) if total else 0.0,
+        "recall": _percent(recall_score(y_true, y_pred, zero_division=0)),
+        "f1Score": _percent(f1_score(y_true, y_pred, zero_division=0)),
+        "successfulOperations": correct,
+        "totalOperations": total,
+        # Métricas adicionales
+        "precision": _percent(precision_score(y_true, y_pred, zero_division=0)),
+        "confusionMatrix": {
+            "truePositives": int(tp),
+            "falsePositives": int(fp),
+            "trueNegatives": int(tn),
+            "falseNegatives": int(fn)
+        },
+        "rocAuc": round(roc_auc, 4) if roc_auc is not None else None,
+        "brierScore": round(float(brier_score_loss(y_true, y_score)), 4) if total else None,
+        "calibration": calibration_table(y_true, y_score),
+        "profitMetrics": {
+            "executedOperations": int(executed.sum()),
+            "executedProfitUsdt": round(executed_profit, 4),
+            "avgProfitPerExecutionUsdt": round(executed_profit / executed.sum(), 4) if executed.any() else 0.0,
+            "totalProfitAllUsdt": round(float(net_profit.sum()), 4),
+            "oracleProfitUsdt": round(oracle_profit, 4),
+            "profitCapturePercentage": _percent(executed_profit / oracle_profit) if oracle_profit > 0 else 0.0,
+            "missedProfitUsdt": round(float(net_profit[(~executed) & (net_profit > 0)].sum()), 4),
+            "lossesTakenUsdt": round(float(net_profit[executed & (net_profit < 0)].sum()), 4)
+        }
+    }
+
+def evaluate_records(ai_model, df: pd.DataFrame) -> Dict[str, Any]:
+    """Featuriza y predice el set de pruebas en lote y calcula sus métricas."""
+    if len(df) < MIN_TEST_RECORDS:
+        return {"error": f"Datos insuficientes para pruebas: {len(df)} registros (mínimo {MIN_TEST_RECORDS})"}
+
+    predictions = ai_model.predict_batch(df)
+
+    outcome = df["decision_outcome"].fillna("").astype(str) if "decision_outcome" in df.columns \
+        else pd.Series("", index=df.index)
+    y_true = outcome.str.contains("EJECUTADA_EXITOSA", regex=False).to_numpy(dtype=int)
+    net_profit = np.array([safe_float(value) for value in df["net_profit_usdt"]], dtype=float) \
+        if "net_profit_usdt" in df.columns else np.zeros(len(df))
+
+    return evaluate_predictions(
+        y_true, predictions["should_execute"], predictions["success_probability"], net_profit
+    )
+
+def evaluate_test_file(model_path: str, filepath: str) -> Dict[str, Any]:
+    """Carga el modelo y el set de pruebas y lo evalúa. Pensado para correr en un proceso aparte."""
+    # Importación local: el proceso hijo solo necesita el modelo
+    from core.ai_model import ArbitrageAIModel
+
+    logger = logging.getLogger('V3.ModelEvaluation')
+    ai_model = ArbitrageAIModel(model_path)
+    if not ai_model.is_trained:
+        return {"error": "El modelo no está entrenado"}
+
+    if filepath.endswith(".parquet"):
+        df = pd.read_parquet(filepath)
+    else:
+        df = pd.read_csv(filepath, low_memory=False)
+
+    logger.info(f"Evaluando modelo con {len(df)} registros de {filepath}")
+    return evaluate_records(ai_model, df)
+
+async def evaluate_test_file_in_process(model_path: str, filepath: str,
+                                        executor: Optional[ProcessPoolExecutor] = None) -> Dict[str, Any]:
+    """Ejecuta evaluate_test_file en un proceso de trabajo sin bloquear el loop."""
+    loop = asyncio.get_running_loop()
+    if executor is not None:
+        return await loop.run_in_executor(executor, evaluate_test_file, model_path, filepath)
+
+    # Sin executor propio del llamador: no esperar al proceso al salir (p. ej. si se cancela la tarea)
+    own_executor = ProcessPoolExecutor(max_workers=1)
+    try:
+        return await loop.run_in_executor(own_executor, evaluate_test_file, model_path, filepath)
+    finally:
+        own_executor.shutdown(wait=False, cancel_futures=True)
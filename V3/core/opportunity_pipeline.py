@@ -0,0 +1,234 @@
+# Simos/V3/core/opportunity_pipeline.py
+
+import asyncio
+import logging
+from collections import Counter
+from typing import Dict, Any, List, Optional, Tuple
+
+from shared.config_v3 import (
+    OPPORTUNITY_PIPELINE_MAX_CONCURRENT, OPPORTUNITY_PIPELINE_MAX_PENDING,
+    OPPORTUNITY_PIPELINE_MIN_NET_EDGE_PCT, OPPORTUNITY_PIPELINE_DEFAULT_TAKER_FEE,
+    OPPORTUNITY_PIPELINE_REFERENCE_NOTIONAL_USDT
+)
+from shared.utils import create_symbol_dict, safe_float, get_current_timestamp
+from shared.tracing import OpportunityTrace, sebo_received_at
+from shared.metrics import registry
+from core.trading_logic import TradingLogic
+
+PIPELINE_ITEMS = registry.counter(
+    "simos_pipeline_items", "Entradas del Top 20 por resultado en el pipeline de oportunidades", ["result"]
+)
+PIPELINE_PENDING = registry.gauge("simos_pipeline_pending", "Oportunidades en espera de despacho")
+PIPELINE_IN_FLIGHT = registry.gauge("simos_pipeline_in_flight", "Oportunidades en proceso en TradingLogic")
+
+OpportunityKey = Tuple[str, str, str]
+
+def estimate_net_edge_percentage(symbol_dict: Dict, notional_usdt: float = OPPORTUNITY_PIPELINE_REFERENCE_NOTIONAL_USDT) -> float:
+    """
+    Edge esperado (%) de una entrada del Top 20 tras fees: diferencia de precio
+    menos los fees de trading de ambos exchanges y el fee de retiro del activo
+    (si Sebo lo envía), expresado sobre el monto de referencia.
+    """
+    buy_fees = symbol_dict.get('buy_exchange_fees') or {}
+    sell_fees = symbol_dict.get('sell_exchange_fees') or {}
+    buy_taker = safe_float(buy_fees.get('taker_fee'), OPPORTUNITY_PIPELINE_DEFAULT_TAKER_FEE)
+    sell_taker = safe_float(sell_fees.get('taker_fee'), OPPORTUNITY_PIPELINE_DEFAULT_TAKER_FEE)
+
+    withdrawal_pct = 0.0
+    withdrawal_fee_asset = safe_float(buy_fees.get('withdrawal_fee_asset'))
+    if withdrawal_fee_asset > 0 and notional_usdt > 0:
+        withdrawal_pct = withdrawal_fee_asset * symbol_dict.get('buy_price_sebo', 0.0) / notional_usdt * 100
+
+    return symbol_dict.get('percentage_difference', 0.0) - (buy_taker + sell_taker) * 100 - withdrawal_pct
+
+class OpportunityPipeline:
+    """
+    Lleva los snapshots Top 20 de Sebo a TradingLogic.
+
+    Cada snapshot se ordena por edge neto estimado y sus mejores entradas
+    reemplazan la cola de espera: lo que el snapshot nuevo ya no trae (o trae
+    con peor edge) se descarta sin llegar a procesarse. Las entradas que ya
+    están en proceso no se vuelven a encolar. Un número fijo de workers
+    (presupuesto de concurrencia) toma siempre la mejor entrada pendiente.
+
+    Antes de despachar se controla la edad máxima de espera en cola (etapa
+    "queue" de la política de frescura de TradingLogic); lo vencido se descarta.
+    Lo que ya entró en TradingLogic no se cancela: puede tener órdenes en curso.
+    """
+
+    def __init__(self, trading_logic: TradingLogic,
+                 max_concurrent: int = OPPORTUNITY_PIPELINE_MAX_CONCURRENT,
+                 max_pending: int = OPPORTUNITY_PIPELINE_MAX_PENDING,
+                 min_net_edge_pct: float = OPPORTUNITY_PIPELINE_MIN_NET_EDGE_PCT):
+        self.logger = logging.getLogger('V3.OpportunityPipeline')
+        self.trading_logic = trading_logic
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_pending = max(1, max_pending)
+        self.min_net_edge_pct = min_net_edge_pct
+
+        self._pending: Dict[OpportunityKey, Dict[str, Any]] = {}
+        self._in_flight: Dict[OpportunityKey, Dict[str, Any]] = {}
+        self._pending_event = asyncio.Event()
+        self._workers: List[asyncio.Task] = []
+
+        self.snapshots_received = 0
+        self.stats: Counter = Counter()
+        self.outcomes: Counter = Counter()
+        self.last_snapshot_at: Optional[str] = None
+
+        registry.register_collector('opportunity_pipeline', self._collect_metrics)
+
+    @staticmethod
+    def _key(symbol_dict: Dict) -> OpportunityKey:
+        return (symbol_dict.get('symbol'), symbol_dict.get('buy_exchange_id'), symbol_dict.get('sell_exchange_id'))
+
+    def _count(self, result: str, amount: int = 1):
+        if amount:
+            self.stats[result] += amount
+            PIPELINE_ITEMS.inc(amount, result=result)
+
+    async def start(self):
+        """Inicia los workers que despachan oportunidades a TradingLogic."""
+        if self._workers:
+            return
+        self._workers = [
+            asyncio.create_task(self._worker_loop(), name=f"opportunity-pipeline-{index}")
+            for index in range(self.max_concurrent)
+        ]
+        self.logger.info(f"Pipeline de oportunidades iniciado ({self.max_concurrent} en paralelo, "
+                         f"{self.max_pending} en espera por snapshot)")
+
+    async def stop(self):
+        """Detiene los workers; la cola de espera se descarta."""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._count("cancelled", len(self._pending))
+        self._pending.clear()
+        self.logger.info("Pipeline de oportunidades detenido")
+
+    async def wait_until_idle(self, timeout: float = 30.0) -> bool:
+        """Espera a que no quede nada en espera ni en proceso. Retorna False si se agota el tiempo."""
+        deadline = asyncio.get_running_loop().time() + timeout
+        while self._pending or self._in_flight:
+            if asyncio.get_running_loop().time() >= deadline:
+                return False
+            await asyncio.sleep(0.05)
+        return True
+
+    def submit_snapshot(self, data: List[Dict]):
+        """
+        Clasifica un snapshot Top 20 y reemplaza la cola de espera con sus mejores entradas.
+
+        Llamar desde el callback de Sebo: la hora de llegada del evento queda en
+        cada entrada para que la traza de latencia incluya la espera en cola.
+        """
+        self.snapshots_received += 1
+        self.last_snapshot_at = get_current_timestamp()
+        received_at = sebo_received_at.get()
+
+        if not self.trading_logic.is_trading_active:
+            self._count("cancelled", len(self._pending))
+            self._pending.clear()
+            self._count("trading_inactive", len(data or []))
+            return
+
+        candidates: Dict[OpportunityKey, Dict[str, Any]] = {}
+        for item in data or []:
+            try:
+                symbol_dict = create_symbol_dict(item)
+            except Exception as e:
+                self.logger.debug(f"Entrada del Top 20 inválida: {e}")
+                self._count("invalid")
+                continue
+
+            key = self._key(symbol_dict)
+            if not all(key):
+                self._count("invalid")
+                continue
+
+            net_edge = estimate_net_edge_percentage(symbol_dict)
+            if net_edge < self.min_net_edge_pct:
+                self._count("below_min_edge")
+                continue
+
+            if key in self._in_flight:
+                self._count("deduplicated")
+                continue
+
+            # Si el snapshot repite una entrada, gana la de mejor edge
+            if key not in candidates or net_edge > candidates[key]["net_edge_pct"]:
+                candidates[key] = {
+                    "opportunity": item,
+                    "net_edge_pct": net_edge,
+                    "received_at": received_at,
+                    "snapshot": self.snapshots_received
+                }
+
+        ranked = sorted(candidates.items(), key=lambda entry: entry[1]["net_edge_pct"], reverse=True)
+        selected = dict(ranked[:self.max_pending])
+        self._count("not_selected", len(ranked) - len(selected))
+
+        # Lo pendiente que el snapshot nuevo no trae queda obsoleto
+        superseded = sum(1 for key in self._pending if key not in selected)
+        self._count("superseded", superseded)
+        self._count("queued", len(selected))
+
+        self._pending = selected
+        if self._pending:
+            self._pending_event.set()
+
+    def _pop_best(self) -> Optional[Tuple[OpportunityKey, Dict[str, Any]]]:
+        if not self._pending:
+            return None
+        key = max(self._pending, key=lambda pending_key: self._pending[pending_key]["net_edge_pct"])
+        return key, self._pending.pop(key)
+
+    async def _worker_loop(self):
+        while True:
+            entry = self._pop_best()
+            if entry is None:
+                self._pending_event.clear()
+                await self._pending_event.wait()
+                continue
+            key, pending = entry
+            self._in_flight[key] = pending
+            try:
+                await self._dispatch(pending)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.logger.error(f"Error procesando oportunidad {key[0]}: {e}")
+                self._count("error")
+            finally:
+                self._in_flight.pop(key, None)
+
+    async def _dispatch(self, pending: Dict[str, Any]):
+        opportunity = pending["opportunity"]
+        trace = OpportunityTrace(opportunity.get("symbol", "N/A"), received_at=pending["received_at"])
+        freshness = self.trading_logic.freshness
+        age_ms = freshness.opportunity_age_ms(trace, opportunity.get("timestamp"))
+        if freshness.check("queue", age_ms, trace) is not None:
+            self._count("expired")
+            return
+        self._count("dispatched")
+        result = await self.trading_logic.process_arbitrage_opportunity(opportunity, trace)
+        self.outcomes[result.get("decision_outcome", "UNKNOWN")] += 1
+
+    def _collect_metrics(self):
+        """Actualiza las métricas de estado antes de cada exposición."""
+        PIPELINE_PENDING.set(len(self._pending))
+        PIPELINE_IN_FLIGHT.set(len(self._in_flight))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Snapshots recibidos, conteos por resultado, cola y resultados de TradingLogic."""
+        return {
+            "running": bool(self._workers),
+            "snapshots_received": self.snapshots_received,
+            "last_snapshot_at": self.last_snapshot_at,
+            "pending": len(self._pending),
+            "in_flight": len(self._in_flight),
+            "items": dict(self.stats),
+            "outcomes": dict(self.outcomes)
+        }
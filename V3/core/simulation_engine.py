@@ -6,7 +6,6 @@ import random
 import json
 from datetime import datetime, timezone, timedelta
 from typing import Dict, Any, List, Optional, Tuple
-import pandas as pd
 import numpy as np
 
 from shared.config_v3 import SIMULATION_DELAY, MIN_PROFIT_USDT, MIN_PROFIT_PERCENTAGE
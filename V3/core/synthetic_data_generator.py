@@ -0,0 +1,214 @@
+# Simos/V3/core/synthetic_data_generator.py
+
+import logging
+import os
+import threading
+from datetime import datetime
+from typing import Dict, Any, List, Iterator, Optional, Callable
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow es opcional; sin él solo se genera CSV
+    pa = None
+    pq = None
+
+from shared.config_v3 import SYNTHETIC_DATA_CHUNK_ROWS, SYNTHETIC_DATA_FORMATS
+
+DECISION_OUTCOMES = [
+    "EJECUTADA_EXITOSA", "EJECUTADA_PERDIDA", "NO_EJECUTADA_RIESGO",
+    "NO_EJECUTADA_FEES", "NO_EJECUTADA_LIQUIDEZ"
+]
+
+# Perfiles de generación: mismos rangos y distribuciones que usaba TrainingHandler
+GENERATION_PROFILES = {
+    "training": {
+        "step_minutes": 5,
+        "base_investment": 100.0,
+        "exchanges": ["binance", "kucoin", "okx", "bybit"],
+        "price_buy_range": (100, 50000),
+        "price_variation_range": (0.995, 1.005),
+        "fee_range": (0.1, 0.5),
+        "transfer_fee_range": (1, 10),
+        "outcome_probabilities": None,
+        "net_profit_range": (-5, 15),
+        "profit_percentage_range": (-5, 15),
+        "total_fees_range": (0.5, 3),
+        "execution_time_range": (30, 300)
+    },
+    "test": {
+        "step_minutes": 7,
+        "base_investment": 150.0,
+        "exchanges": ["binance", "kucoin", "okx", "bybit", "huobi"],
+        "price_buy_range": (80, 60000),
+        "price_variation_range": (0.99, 1.01),
+        "fee_range": (0.05, 0.8),
+        "transfer_fee_range": (0.5, 15),
+        "outcome_probabilities": [0.3, 0.2, 0.2, 0.15, 0.15],
+        "net_profit_range": (-8, 20),
+        "profit_percentage_range": (-8, 20),
+        "total_fees_range": (0.3, 4),
+        "execution_time_range": (20, 400)
+    }
+}
+
+SUPPORTED_FORMATS = SYNTHETIC_DATA_FORMATS
+
+class SyntheticDataGenerator:
+    """Genera datasets sintéticos de operaciones columna a columna, en bloques y con semilla reproducible."""
+
+    def __init__(self, profile: str = "training", seed: Optional[int] = None,
+                 chunk_rows: int = SYNTHETIC_DATA_CHUNK_ROWS):
+        if profile not in GENERATION_PROFILES:
+            raise ValueError(f"Perfil de generación desconocido: {profile}")
+
+        self.logger = logging.getLogger('V3.SyntheticDataGenerator')
+        self.profile_name = profile
+        self.profile = GENERATION_PROFILES[profile]
+        self.seed = seed
+        self.chunk_rows = max(1, int(chunk_rows))
+        self.rng = np.random.default_rng(seed)
+
+    def generate_chunks(self, fecha: datetime, symbol_names: List[str],
+                        operaciones: int) -> Iterator[pd.DataFrame]:
+        """
+        Genera el dataset en bloques de ~chunk_rows filas.
+
+        El orden de filas es el mismo que el generador original: por cada
+        operación (paso temporal), una fila por símbolo.
+        """
+        n_symbols = len(symbol_names)
+        if n_symbols == 0 or operaciones <= 0:
+            return
+
+        symbols = np.asarray(symbol_names, dtype=object)
+        ops_per_chunk = max(1, self.chunk_rows // n_symbols)
+        start = np.datetime64(fecha.replace(microsecond=0), 's')
+
+        for first_op in range(0, operaciones, ops_per_chunk):
+            chunk_ops = min(ops_per_chunk, operaciones - first_op)
+            op_index = np.repeat(np.arange(first_op, first_op + chunk_ops), n_symbols)
+            yield self._build_chunk(start, op_index, np.tile(symbols, chunk_ops))
+
+    def _build_chunk(self, start: np.datetime64, op_index: np.ndarray,
+                     symbols: np.ndarray) -> pd.DataFrame:
+        """Construye un bloque de filas con operaciones vectorizadas."""
+        profile = self.profile
+        rng = self.rng
+        size = len(op_index)
+
+        offsets = (op_index * profile["step_minutes"]).astype('timedelta64[m]')
+        timestamps = np.datetime_as_string(start + offsets, unit='s')
+
+        exchanges = np.asarray(profile["exchanges"], dtype=object)
+        outcomes = np.asarray(DECISION_OUTCOMES, dtype=object)
+
+        price_buy = np.round(rng.uniform(*profile["price_buy_range"], size), 2)
+        price_sell = np.round(price_buy * rng.uniform(*profile["price_variation_range"], size), 2)
+        low_exec, high_exec = profile["execution_time_range"]
+
+        # Mismo orden de columnas que el CSV original
+        return pd.DataFrame({
+            "timestamp": timestamps,
+            "symbol": symbols,
+            "buy_exchange_id": rng.choice(exchanges, size),
+            "sell_exchange_id": rng.choice(exchanges, size),
+            "current_price_buy": price_buy,
+            "current_price_sell": price_sell,
+            "investment_usdt": np.full(size, profile["base_investment"]),
+            "estimated_buy_fee": np.round(rng.uniform(*profile["fee_range"], size), 3),
+            "estimated_sell_fee": np.round(rng.uniform(*profile["fee_range"], size), 3),
+            "estimated_transfer_fee": np.round(rng.uniform(*profile["transfer_fee_range"], size), 2),
+            "decision_outcome": rng.choice(outcomes, size, p=profile["outcome_probabilities"]),
+            "net_profit_usdt": np.round(rng.uniform(*profile["net_profit_range"], size), 4),
+            "profit_percentage": np.round(rng.uniform(*profile["profit_percentage_range"], size), 2),
+            "total_fees_usdt": np.round(rng.uniform(*profile["total_fees_range"], size), 2),
+            "execution_time_seconds": rng.integers(low_exec, high_exec, size)
+        })
+
+    def write(self, filepath: str, fecha: datetime, symbol_names: List[str], operaciones: int,
+              file_format: str = "csv",
+              progress_callback: Callable[[int, int], None] = None,
+              cancel_event: threading.Event = None) -> Dict[str, Any]:
+        """
+        Genera y escribe el dataset en streaming, sin materializarlo completo en memoria.
+
+        Args:
+            filepath: Ruta de salida
+            fecha: Fecha inicial de la serie
+            symbol_names: Símbolos (ej: "BTC/USDT")
+            operaciones: Pasos temporales a generar por símbolo
+            file_format: "csv" o "parquet" (requiere pyarrow)
+            progress_callback: Llamado con (filas escritas, filas totales) tras cada bloque
+            cancel_event: Si se activa, se detiene entre bloques y se elimina el archivo parcial
+
+        Returns:
+            Resumen con filas escritas, bloques, formato y si fue cancelado
+        """
+        if file_format not in SUPPORTED_FORMATS:
+            raise ValueError(f"Formato no soportado: {file_format}")
+        if file_format == "parquet" and pq is None:
+            raise RuntimeError("pyarrow no está instalado; no se puede escribir Parquet")
+
+        directory = os.path.dirname(filepath)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        total_rows = operaciones * len(symbol_names)
+        rows_written = 0
+        chunks = 0
+        parquet_writer = None
+        cancelled = False
+
+        try:
+            for chunk in self.generate_chunks(fecha, symbol_names, operaciones):
+                if cancel_event is not None and cancel_event.is_set():
+                    cancelled = True
+                    break
+
+                if file_format == "csv":
+                    chunk.to_csv(filepath, mode="w" if chunks == 0 else "a",
+                                 header=chunks == 0, index=False)
+                else:
+                    table = pa.Table.from_pandas(chunk, preserve_index=False)
+                    if parquet_writer is None:
+                        parquet_writer = pq.ParquetWriter(filepath, table.schema)
+                    parquet_writer.write_table(table)
+
+                rows_written += len(chunk)
+                chunks += 1
+                if progress_callback:
+                    progress_callback(rows_written, total_rows)
+        finally:
+            if parquet_writer is not None:
+                parquet_writer.close()
+
+        if cancelled:
+            if os.path.exists(filepath):
+                os.remove(filepath)
+            self.logger.info(
+                f"Generación de dataset sintético cancelada tras {rows_written} de {total_rows} filas"
+            )
+            return {
+                "records": rows_written,
+                "chunks": chunks,
+                "format": file_format,
+                "seed": self.seed,
+                "cancelled": True
+            }
+
+        self.logger.info(
+            f"Dataset sintético ({self.profile_name}) escrito: {rows_written} filas "
+            f"en {chunks} bloques -> {filepath}"
+        )
+
+        return {
+            "records": rows_written,
+            "chunks": chunks,
+            "format": file_format,
+            "seed": self.seed,
+            "cancelled": False
+        }
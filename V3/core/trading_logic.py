@@ -2,6 +2,8 @@
 
 import asyncio
 import logging
+import time
+import numpy as np
 from datetime import datetime, timezone
 from typing import Dict, Any, Optional, List, Callable
 from shared.config_v3 import (
@@ -11,11 +13,25 @@ from shared.config_v3 import (
 )
 from shared.utils import (
     create_symbol_dict, safe_float, safe_dict_get, get_current_timestamp,
-    is_profitable_operation, format_operation_summary, find_cheapest_network
+    is_profitable_operation, format_operation_summary, find_cheapest_network, parse_timestamp
 )
 from adapters.exchanges.exchange_manager import ExchangeManager
 from adapters.persistence.data_persistence import DataPersistence
 from core.ai_model import ArbitrageAIModel
+from shared.tracing import OpportunityTrace, LatencyTracker
+from shared.freshness import FreshnessPolicy
+from shared.metrics import registry
+
+STAGE_SECONDS = registry.histogram(
+    "simos_opportunity_stage_seconds", "Duración de cada etapa del procesamiento de oportunidades", ["stage"]
+)
+DECISION_SECONDS = registry.histogram(
+    "simos_opportunity_decision_seconds", "Tiempo desde el evento de Sebo hasta la decisión completada"
+)
+OPPORTUNITIES = registry.counter("simos_opportunities_processed", "Oportunidades procesadas por resultado", ["outcome"])
+TRADING_ACTIVE = registry.gauge("simos_trading_active", "1 si el trading está activo")
+OPERATION_IN_PROGRESS = registry.gauge("simos_trading_operation_in_progress", "1 si hay una operación en curso")
+TOTAL_PROFIT = registry.gauge("simos_trading_total_profit_usdt", "Ganancia acumulada de la sesión de trading")
 
 class TradingLogic:
     """Maneja la lógica central de trading y arbitraje."""
@@ -39,6 +55,14 @@ class TradingLogic:
         # Configuración de trading
         self.usdt_holder_exchange_id = "binance"  # Exchange principal para USDT
         self.global_sl_active_flag = False
+        self.simulation_mode = SIMULATION_MODE  # El replay lo fuerza a True
+        self.persist_state = True  # False para no pisar el estado guardado (ej: replay)
+        
+        # Trazas de latencia por etapa de cada oportunidad procesada
+        self.latency_tracker = LatencyTracker()
+        # Edad máxima por etapa (también la usa el pipeline para la espera en cola)
+        self.freshness = FreshnessPolicy()
+        registry.register_collector('trading_logic', self._collect_metrics)
         
         # Callbacks
         self.on_operation_complete_callback: Optional[Callable] = None
@@ -76,6 +100,8 @@ class TradingLogic:
     
     async def _save_trading_state(self):
         """Guarda el estado actual del trading."""
+        if not self.persist_state:
+            return
         try:
             state = {
                 "is_trading_active": self.is_trading_active,
@@ -127,16 +153,49 @@ class TradingLogic:
     
     # Procesamiento de oportunidades
     
-    async def process_arbitrage_opportunity(self, opportunity_data: Dict) -> Dict:
-        """Procesa una oportunidad de arbitraje."""
+    async def process_arbitrage_opportunity(self, opportunity_data: Dict, trace: OpportunityTrace = None) -> Dict:
+        """
+        Procesa una oportunidad de arbitraje.
+        
+        Cada etapa queda registrada en una traza de latencia (la recibida o una
+        nueva con origen en la llegada del evento de Sebo).
+        """
         if not self.is_trading_active:
             return self._create_operation_result("TRADING_INACTIVE", "Trading no está activo")
         
         if self.current_operation:
             return self._create_operation_result("OPERATION_IN_PROGRESS", "Operación en progreso")
         
-        operation_start_time = asyncio.get_event_loop().time()
+        # No decidir con la heurística de respaldo mientras el modelo entrenado aún se carga
+        if self.ai_model.is_loading:
+            return self._create_operation_result("MODEL_LOADING", "Modelo de IA cargándose")
+        
         symbol = safe_dict_get(opportunity_data, "symbol", "N/A")
+        trace = trace or OpportunityTrace(symbol)
+        
+        result = await self._process_opportunity_stages(opportunity_data, symbol, trace)
+        
+        trace.finish(result.get("decision_outcome", "UNKNOWN"))
+        self.latency_tracker.record(trace)
+        self._observe_trace(trace)
+        return result
+    
+    def _observe_trace(self, trace: OpportunityTrace):
+        """Pasa la traza cerrada a las métricas de latencia y resultados."""
+        for stage, duration_ms in trace.spans.items():
+            STAGE_SECONDS.observe(duration_ms / 1000, stage=stage)
+        DECISION_SECONDS.observe(trace.total_ms / 1000)
+        OPPORTUNITIES.inc(outcome=trace.outcome)
+    
+    def _collect_metrics(self):
+        """Actualiza las métricas de estado antes de cada exposición."""
+        TRADING_ACTIVE.set(1 if self.is_trading_active else 0)
+        OPERATION_IN_PROGRESS.set(1 if self.current_operation else 0)
+        TOTAL_PROFIT.set(self.trading_stats["total_profit_usdt"])
+    
+    async def _process_opportunity_stages(self, opportunity_data: Dict, symbol: str, trace: OpportunityTrace) -> Dict:
+        """Validación, datos de mercado, IA, ejecución, registro y notificación de una oportunidad."""
+        operation_start_time = asyncio.get_event_loop().time()
         
         try:
             self.current_operation = {
@@ -147,73 +206,98 @@ class TradingLogic:
             
             self.logger.info(f"Procesando oportunidad: {symbol}")
             
-            # Crear diccionario de símbolo
-            symbol_dict = create_symbol_dict(opportunity_data)
-            
-            # Validaciones iniciales
-            validation_result = await self._validate_opportunity(symbol_dict)
-            if not validation_result["valid"]:
-                return self._create_operation_result("VALIDATION_FAILED", validation_result["reason"])
-            
-            # Obtener configuración de balance
-            balance_config = await self._get_balance_config()
-            if not balance_config:
-                return self._create_operation_result("BALANCE_CONFIG_ERROR", "No se pudo obtener configuración de balance")
-            
-            # Verificar stop loss global
-            if await self._check_global_stop_loss(balance_config):
-                return self._create_operation_result("GLOBAL_STOP_LOSS", "Stop loss global activado")
-            
-            # Calcular monto de inversión
-            investment_amount = self._calculate_investment_amount(balance_config)
-            if investment_amount < MIN_OPERATIONAL_USDT:
-                return self._create_operation_result("INSUFFICIENT_BALANCE", f"Balance insuficiente: {investment_amount} USDT")
-            
-            # Obtener precios actuales y tarifas
-            market_data = await self._get_market_data(symbol_dict)
-            if not market_data["valid"]:
-                return self._create_operation_result("MARKET_DATA_ERROR", market_data["reason"])
-            
-            # Preparar datos para la IA
-            ai_input_data = self._prepare_ai_input_data(
-                symbol_dict, balance_config, investment_amount, market_data
-            )
-            
-            # Decisión de la IA
-            ai_decision = self.ai_model.predict(ai_input_data)
-            ai_input_data["ai_decision"] = ai_decision
-            
-            self.logger.info(f"Decisión IA para {symbol}: {ai_decision['should_execute']} (confianza: {ai_decision['confidence']:.3f})")
-            
-            # Ejecutar operación si es rentable
-            if ai_decision.get("should_execute", False):
-                if SIMULATION_MODE:
-                    execution_result = await self._simulate_operation(ai_input_data)
-                else:
-                    execution_result = await self._execute_real_operation(ai_input_data)
-            else:
-                execution_result = self._create_operation_result(
-                    "NOT_PROFITABLE", 
-                    ai_decision.get("reason", "Operación no rentable según IA")
-                )
-            
-            # Retroalimentación al modelo de IA
-            if execution_result.get("success", False) or execution_result.get("decision_outcome") == "NOT_PROFITABLE":
-                self.ai_model.update_with_feedback(ai_input_data, execution_result)
-            
-            # Actualizar estadísticas
-            await self._update_trading_stats(execution_result)
+            with trace.stage("validate"):
+                # Crear diccionario de símbolo
+                symbol_dict = create_symbol_dict(opportunity_data)
+                
+                if self._is_stale("validate", symbol_dict, trace):
+                    return self._create_operation_result("STALE_OPPORTUNITY", "Oportunidad vencida antes de validar")
+                
+                # Validaciones iniciales
+                validation_result = await self._validate_opportunity(symbol_dict)
+                if not validation_result["valid"]:
+                    return self._create_operation_result("VALIDATION_FAILED", validation_result["reason"])
+                
+                # Obtener configuración de balance
+                balance_config = await self._get_balance_config()
+                if not balance_config:
+                    return self._create_operation_result("BALANCE_CONFIG_ERROR", "No se pudo obtener configuración de balance")
+                
+                # Verificar stop loss global
+                if await self._check_global_stop_loss(balance_config):
+                    return self._create_operation_result("GLOBAL_STOP_LOSS", "Stop loss global activado")
+                
+                # Calcular monto de inversión
+                investment_amount = self._calculate_investment_amount(balance_config)
+                if investment_amount < MIN_OPERATIONAL_USDT:
+                    return self._create_operation_result("INSUFFICIENT_BALANCE", f"Balance insuficiente: {investment_amount} USDT")
             
-            # Registrar operación
-            operation_log_data = {**ai_input_data, **execution_result}
-            operation_log_data["execution_time_ms"] = (asyncio.get_event_loop().time() - operation_start_time) * 1000
-            operation_log_data["ai_confidence"] = ai_decision.get("confidence", 0.0)
+            reprices = 0
+            while True:
+                if self._is_stale("market_data", symbol_dict, trace):
+                    return self._create_operation_result("STALE_OPPORTUNITY", "Oportunidad vencida antes de obtener precios")
+                
+                # Obtener precios actuales y tarifas (al re-cotizar, el span se acumula)
+                with trace.stage("market_data"):
+                    market_data = await self._get_market_data(symbol_dict)
+                if not market_data["valid"]:
+                    return self._create_operation_result("MARKET_DATA_ERROR", market_data["reason"])
+                
+                # Preparar datos para la IA
+                with trace.stage("feature_prep"):
+                    ai_input_data = self._prepare_ai_input_data(
+                        symbol_dict, balance_config, investment_amount, market_data
+                    )
+                
+                # Decisión de la IA
+                with trace.stage("predict"):
+                    ai_decision = self.ai_model.predict(ai_input_data)
+                ai_input_data["ai_decision"] = ai_decision
+                
+                self.logger.info(f"Decisión IA para {symbol}: {ai_decision['should_execute']} (confianza: {ai_decision['confidence']:.3f})")
+                
+                # Ejecutar operación si es rentable
+                with trace.stage("execute"):
+                    if not ai_decision.get("should_execute", False):
+                        execution_result = self._create_operation_result(
+                            "NOT_PROFITABLE", 
+                            ai_decision.get("reason", "Operación no rentable según IA")
+                        )
+                        break
+                    
+                    # Justo antes de ejecutar: no operar con precios viejos (re-cotizar y volver a decidir, o descartar)
+                    action = self.freshness.check("execute", self.freshness.quote_age_ms(market_data["quoted_at"]), trace)
+                    if action is None:
+                        if self.simulation_mode:
+                            execution_result = await self._simulate_operation(ai_input_data)
+                        else:
+                            execution_result = await self._execute_real_operation(ai_input_data)
+                        break
+                    if action != "reprice" or reprices >= self.freshness.max_reprices:
+                        return self._create_operation_result("STALE_OPPORTUNITY", "Precios vencidos antes de ejecutar")
+                    reprices += 1
+                    self.logger.info(f"Re-cotizando {symbol} antes de ejecutar ({reprices}/{self.freshness.max_reprices}; "
+                                     f"edad según el exchange: {market_data.get('exchange_quote_age_ms')} ms)")
             
-            await self.data_persistence.log_operation_to_csv(operation_log_data)
+            with trace.stage("persist"):
+                # Retroalimentación al modelo de IA
+                if execution_result.get("success", False) or execution_result.get("decision_outcome") == "NOT_PROFITABLE":
+                    self.ai_model.update_with_feedback(ai_input_data, execution_result)
+                
+                # Actualizar estadísticas
+                await self._update_trading_stats(execution_result)
+                
+                # Registrar operación
+                operation_log_data = {**ai_input_data, **execution_result}
+                operation_log_data["execution_time_ms"] = (asyncio.get_event_loop().time() - operation_start_time) * 1000
+                operation_log_data["ai_confidence"] = ai_decision.get("confidence", 0.0)
+                
+                await self.data_persistence.log_operation_to_csv(operation_log_data)
             
             # Callback de operación completada
             if self.on_operation_complete_callback:
-                await self.on_operation_complete_callback(execution_result)
+                with trace.stage("broadcast"):
+                    await self.on_operation_complete_callback(execution_result)
             
             self.logger.info(f"Operación completada: {format_operation_summary(execution_result)}")
             
@@ -227,6 +311,11 @@ class TradingLogic:
         finally:
             self.current_operation = None
     
+    def _is_stale(self, stage: str, symbol_dict: Dict, trace: OpportunityTrace) -> bool:
+        """True si la oportunidad superó la edad máxima de la etapa (antes de obtener precios solo cabe descartarla)."""
+        age_ms = self.freshness.opportunity_age_ms(trace, symbol_dict.get("timestamp"))
+        return self.freshness.check(stage, age_ms, trace) is not None
+    
     async def _validate_opportunity(self, symbol_dict: Dict) -> Dict:
         """Valida una oportunidad de arbitraje."""
         # Verificar que los exchanges estén soportados
@@ -239,6 +328,11 @@ class TradingLogic:
         if buy_exchange == sell_exchange:
             return {"valid": False, "reason": "Exchanges de compra y venta son iguales"}
         
+        # Solo operar entre exchanges que terminaron de inicializarse
+        for exchange_id in (buy_exchange, sell_exchange):
+            if not self.exchange_manager.is_exchange_ready(exchange_id):
+                return {"valid": False, "reason": f"Exchange aún no listo: {exchange_id}"}
+        
         # Verificar que los exchanges estén disponibles
         if not await self.exchange_manager.test_exchange_connection(buy_exchange):
             return {"valid": False, "reason": f"Exchange de compra no disponible: {buy_exchange}"}
@@ -320,13 +414,23 @@ class TradingLogic:
             buy_exchange = symbol_dict["buy_exchange_id"]
             sell_exchange = symbol_dict["sell_exchange_id"]
             
-            # Obtener precios actuales
-            buy_ask, _ = await self.exchange_manager.get_current_prices(buy_exchange, symbol)
-            _, sell_bid = await self.exchange_manager.get_current_prices(sell_exchange, symbol)
+            # Obtener precios actuales. La cotización vale desde la recepción local del ticker
+            # más antiguo (si vino de la caché, su recepción original): el timestamp del exchange
+            # depende de su reloj y en pares ilíquidos puede ser el del último trade
+            buy_ticker, buy_received_at = await self.exchange_manager.get_ticker_timed(buy_exchange, symbol)
+            sell_ticker, sell_received_at = await self.exchange_manager.get_ticker_timed(sell_exchange, symbol)
             
+            buy_ask = safe_float(buy_ticker.get('ask')) if buy_ticker else None
+            sell_bid = safe_float(sell_ticker.get('bid')) if sell_ticker else None
             if not buy_ask or not sell_bid:
                 return {"valid": False, "reason": "No se pudieron obtener precios actuales"}
             
+            quoted_at = min(buy_received_at, sell_received_at)
+            # Solo diagnóstico: edad según el timestamp reportado por los exchanges
+            exchange_times = [parse_timestamp(ticker.get('timestamp')) for ticker in (buy_ticker, sell_ticker)]
+            exchange_times = [ts for ts in exchange_times if ts is not None]
+            exchange_quote_age_ms = round((time.time() - min(exchange_times)) * 1000, 1) if exchange_times else None
+            
             # Obtener tarifas de trading
             buy_fees = await self.exchange_manager.get_trading_fees(buy_exchange, symbol)
             sell_fees = await self.exchange_manager.get_trading_fees(sell_exchange, symbol)
@@ -339,6 +443,8 @@ class TradingLogic:
                 "valid": True,
                 "buy_price": buy_ask,
                 "sell_price": sell_bid,
+                "quoted_at": quoted_at,
+                "exchange_quote_age_ms": exchange_quote_age_ms,
                 "buy_fees": buy_fees,
                 "sell_fees": sell_fees,
                 "withdrawal_info": withdrawal_info
@@ -365,8 +471,33 @@ class TradingLogic:
             "investment_usdt": investment_amount,
             "estimated_buy_fee": market_data["buy_fees"].get("percentage", 0.001),
             "estimated_sell_fee": market_data["sell_fees"].get("percentage", 0.001),
-            "estimated_transfer_fee": find_cheapest_network(market_data["withdrawal_info"])
+            "estimated_transfer_fee": find_cheapest_network(
+                self._withdrawal_networks(market_data["withdrawal_info"], symbol_dict["symbol"].split("/")[0])
+            )
         }
+    
+    @staticmethod
+    def _withdrawal_networks(withdrawal_info: Any, currency: str) -> List[Dict]:
+        """
+        Convierte las tarifas de retiro de CCXT ({moneda: {"networks": {red: {"withdraw": {"fee": x}}}}})
+        en la lista de redes que espera find_cheapest_network.
+        """
+        if isinstance(withdrawal_info, list):
+            return withdrawal_info
+        if not isinstance(withdrawal_info, dict):
+            return []
+        
+        currency_info = withdrawal_info.get(currency) or {}
+        networks = []
+        for network_id, network_info in (currency_info.get("networks") or {}).items():
+            withdraw = network_info.get("withdraw") or {}
+            networks.append({
+                "network": network_id,
+                "fee": withdraw.get("fee"),
+                "active": network_info.get("active", True) is not False,
+                "withdraw": network_info.get("withdraw_enabled", True) is not False
+            })
+        return networks
 
     def get_current_operation(self) -> Optional[Dict]:
         """Retorna la operación actual en curso."""
@@ -2,16 +2,17 @@
 
 import asyncio
 import logging
-import pandas as pd
-import numpy as np
 from datetime import datetime, timedelta
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 import os
 import json
 import csv
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from io import StringIO
 
-from shared.config_v3 import DATA_DIR
+from shared.config_v3 import DATA_DIR, SYNTHETIC_DATA_FORMATS
 from shared.utils import get_current_timestamp, safe_float
 from core.ai_model import ArbitrageAIModel
 from adapters.persistence.data_persistence import DataPersistence
@@ -28,8 +29,8 @@ class TrainingHandler:
         self.data_persistence = data_persistence
         self.ui_broadcaster = ui_broadcaster
         
-        # Inicializar API de símbolos de Sebo
-        self.sebo_symbols_api = SeboSymbolsAPI()
+        # Inicializar API de símbolos de Sebo (reutiliza el pool HTTP del conector si lo hay)
+        self.sebo_symbols_api = SeboSymbolsAPI(http_client=getattr(sebo_connector, 'http_client', None))
         
         # Estado del entrenamiento
         self.training_in_progress = False
@@ -43,8 +44,32 @@ class TrainingHandler:
         self.testing_progress = 0
         self.testing_filepath = None
         
+        # Estado de la creación de datasets (se genera en un hilo de trabajo)
+        self.dataset_creation_in_progress = False
+        self.dataset_progress = {"rows_written": 0, "total_rows": 0, "filepath": None}
+        self._dataset_cancel_event = threading.Event()
+        
+        # Proceso de trabajo para evaluar el modelo; se crea en la primera prueba y se reutiliza
+        self._evaluation_executor: Optional[ProcessPoolExecutor] = None
+        
+    def _get_evaluation_executor(self) -> ProcessPoolExecutor:
+        """Retorna el executor de evaluación, creándolo si aún no existe."""
+        if self._evaluation_executor is None:
+            self._evaluation_executor = ProcessPoolExecutor(max_workers=1)
+        return self._evaluation_executor
+    
+    async def cleanup(self):
+        """Detiene el proceso de evaluación sin esperar a que termine una prueba en curso."""
+        if self._evaluation_executor is not None:
+            self._evaluation_executor.shutdown(wait=False, cancel_futures=True)
+            self._evaluation_executor = None
+        
     async def create_training_csv(self, request_data: Dict) -> Dict:
         """Crea un CSV de datos para entrenamiento."""
+        if self.dataset_creation_in_progress:
+            return {"status": "error", "message": "Ya hay una creación de dataset en progreso"}
+        
+        self.dataset_creation_in_progress = True
         try:
             self.logger.info("Iniciando creación de CSV de entrenamiento")
             
@@ -59,6 +84,11 @@ class TrainingHandler:
             if not fecha:
                 return {"status": "error", "message": "Fecha es requerida"}
             
+            # Validar formato y semilla antes de generar en el hilo de trabajo
+            seed, formato, options_error = self._parse_generation_options(request_data)
+            if options_error:
+                return {"status": "error", "message": options_error}
+            
             fecha_obj = datetime.strptime(fecha, "%Y-%m-%d")
             if fecha_obj >= datetime.now():
                 return {"status": "error", "message": "La fecha debe ser anterior a la actual"}
@@ -75,16 +105,21 @@ class TrainingHandler:
             if not operaciones:
                 operaciones = self._calculate_possible_operations(fecha_obj, intervalo)
             
-            # Generar datos históricos simulados
-            csv_data = await self._generate_historical_data(
-                fecha_obj, selected_symbols, operaciones, intervalo
-            )
-            
-            # Guardar CSV
-            filename = f"training_data_{fecha}_{intervalo}_{len(selected_symbols)}symbols.csv"
+            # Generar y guardar datos simulados en streaming
+            extension = formato
+            filename = f"training_data_{fecha}_{intervalo}_{len(selected_symbols)}symbols.{extension}"
             filepath = os.path.join(DATA_DIR, filename)
             
-            await self._save_csv_data(csv_data, filepath)
+            summary = await self._write_synthetic_data(
+                "training", fecha_obj, selected_symbols, operaciones, filepath, seed, formato
+            )
+            
+            if summary["cancelled"]:
+                return {
+                    "status": "cancelled",
+                    "message": "Creación de CSV de entrenamiento cancelada",
+                    "data": {"records": summary["records"], "operations": operaciones}
+                }
             
             return {
                 "status": "success",
@@ -92,15 +127,19 @@ class TrainingHandler:
                 "data": {
                     "filename": filename,
                     "filepath": filepath,
-                    "records": len(csv_data),
+                    "records": summary["records"],
                     "symbols": len(selected_symbols),
-                    "operations": operaciones
+                    "operations": operaciones,
+                    "seed": seed
                 }
             }
             
         except Exception as e:
             self.logger.error(f"Error creando CSV de entrenamiento: {e}")
+            self._notify_dataset_progress("training", "FAILED")
             return {"status": "error", "message": f"Error interno: {str(e)}"}
+        finally:
+            self.dataset_creation_in_progress = False
     
     async def start_training(self, request_data: Dict) -> Dict:
         """Inicia el entrenamiento del modelo."""
@@ -208,6 +247,10 @@ class TrainingHandler:
 
     async def create_test_csv(self, request_data: Dict) -> Dict:
         """Crea un CSV de datos para pruebas (similar al de entrenamiento pero con datos diferentes)."""
+        if self.dataset_creation_in_progress:
+            return {"status": "error", "message": "Ya hay una creación de dataset en progreso"}
+        
+        self.dataset_creation_in_progress = True
         try:
             self.logger.info("Iniciando creación de CSV de pruebas")
             
@@ -222,6 +265,11 @@ class TrainingHandler:
             if not fecha:
                 return {"status": "error", "message": "Fecha es requerida"}
             
+            # Validar formato y semilla antes de generar en el hilo de trabajo
+            seed, formato, options_error = self._parse_generation_options(request_data)
+            if options_error:
+                return {"status": "error", "message": options_error}
+            
             fecha_obj = datetime.strptime(fecha, "%Y-%m-%d")
             if fecha_obj >= datetime.now():
                 return {"status": "error", "message": "La fecha debe ser anterior a la actual"}
@@ -238,16 +286,21 @@ class TrainingHandler:
             if not operaciones:
                 operaciones = self._calculate_possible_operations(fecha_obj, intervalo)
             
-            # Generar datos históricos simulados para pruebas (con variaciones)
-            csv_data = await self._generate_test_data(
-                fecha_obj, selected_symbols, operaciones, intervalo
-            )
-            
-            # Guardar CSV
-            filename = f"test_data_{fecha}_{intervalo}_{len(selected_symbols)}symbols.csv"
+            # Generar y guardar datos simulados en streaming
+            extension = formato
+            filename = f"test_data_{fecha}_{intervalo}_{len(selected_symbols)}symbols.{extension}"
             filepath = os.path.join(DATA_DIR, filename)
             
-            await self._save_csv_data(csv_data, filepath)
+            summary = await self._write_synthetic_data(
+                "test", fecha_obj, selected_symbols, operaciones, filepath, seed, formato
+            )
+            
+            if summary["cancelled"]:
+                return {
+                    "status": "cancelled",
+                    "message": "Creación de CSV de pruebas cancelada",
+                    "data": {"records": summary["records"], "operations": operaciones}
+                }
             
             return {
                 "status": "success",
@@ -255,15 +308,19 @@ class TrainingHandler:
                 "data": {
                     "filename": filename,
                     "filepath": filepath,
-                    "records": len(csv_data),
+                    "records": summary["records"],
                     "symbols": len(selected_symbols),
-                    "operations": operaciones
+                    "operations": operaciones,
+                    "seed": seed
                 }
             }
             
         except Exception as e:
             self.logger.error(f"Error creando CSV de pruebas: {e}")
+            self._notify_dataset_progress("test", "FAILED")
             return {"status": "error", "message": f"Error interno: {str(e)}"}
+        finally:
+            self.dataset_creation_in_progress = False
     
     async def _get_symbols_from_sebo(self) -> List[Dict]:
         """Obtiene la lista de símbolos desde Sebo."""
@@ -311,6 +368,23 @@ class TrainingHandler:
                 {"id": "SOLUSDT", "name": "SOL/USDT", "base": "SOL", "quote": "USDT"}
             ]
     
+    def _parse_generation_options(self, request_data: Dict) -> Tuple[Optional[int], str, Optional[str]]:
+        """Extrae seed y formato de la solicitud. Retorna (seed, formato, error); error es None si son válidos."""
+        formato = request_data.get("formato", "csv")
+        if formato not in SYNTHETIC_DATA_FORMATS:
+            return None, formato, f"Formato no soportado: {formato} (usar {', '.join(SYNTHETIC_DATA_FORMATS)})"
+        
+        seed = request_data.get("seed")
+        if seed is None:
+            return None, formato, None
+        try:
+            seed = int(seed)
+        except (ValueError, TypeError):
+            return None, formato, f"Seed inválida: {seed} (entero >= 0)"
+        if seed < 0:
+            return None, formato, f"Seed inválida: {seed} (entero >= 0)"
+        return seed, formato, None
+    
     def _select_symbols(self, symbols_data: List[Dict], cantidad: Optional[int], lista: List[str]) -> List[Dict]:
         """Selecciona símbolos según el criterio especificado."""
         if lista:
@@ -342,60 +416,57 @@ class TrainingHandler:
         
         return max(1, total_operations)
     
-    async def _generate_historical_data(self, fecha: datetime, symbols: List[Dict], 
-                                      operaciones: int, intervalo: str) -> List[Dict]:
-        """Genera datos históricos simulados para entrenamiento."""
-        data = []
+    async def _write_synthetic_data(self, profile: str, fecha: datetime, symbols: List[Dict],
+                                    operaciones: int, filepath: str, seed: Optional[int] = None,
+                                    formato: str = "csv") -> Dict:
+        """Genera datos simulados en un hilo de trabajo, reportando progreso por filas a la UI."""
+        from core.synthetic_data_generator import SyntheticDataGenerator
         
-        # Configuración base
-        base_investment = 100.0  # USDT
-        exchanges = ["binance", "kucoin", "okx", "bybit"]
+        generator = SyntheticDataGenerator(profile, seed=seed)
+        self._dataset_cancel_event.clear()
+        self.dataset_progress = {
+            "rows_written": 0,
+            "total_rows": operaciones * len(symbols),
+            "filepath": filepath
+        }
         
-        for i in range(operaciones):
-            for symbol in symbols:
-                # Simular datos de operación
-                operation_data = {
-                    "timestamp": (fecha + timedelta(minutes=i * 5)).isoformat(),
-                    "symbol": symbol["name"],
-                    "buy_exchange_id": np.random.choice(exchanges),
-                    "sell_exchange_id": np.random.choice(exchanges),
-                    "current_price_buy": round(np.random.uniform(100, 50000), 2),
-                    "current_price_sell": 0,
-                    "investment_usdt": base_investment,
-                    "estimated_buy_fee": round(np.random.uniform(0.1, 0.5), 3),
-                    "estimated_sell_fee": round(np.random.uniform(0.1, 0.5), 3),
-                    "estimated_transfer_fee": round(np.random.uniform(1, 10), 2),
-                    "decision_outcome": np.random.choice([
-                        "EJECUTADA_EXITOSA", "EJECUTADA_PERDIDA", "NO_EJECUTADA_RIESGO",
-                        "NO_EJECUTADA_FEES", "NO_EJECUTADA_LIQUIDEZ"
-                    ]),
-                    "net_profit_usdt": round(np.random.uniform(-5, 15), 4),
-                    "profit_percentage": round(np.random.uniform(-5, 15), 2),
-                    "total_fees_usdt": round(np.random.uniform(0.5, 3), 2),
-                    "execution_time_seconds": np.random.randint(30, 300)
-                }
-                
-                # Ajustar precio de venta basado en el de compra
-                price_variation = np.random.uniform(0.995, 1.005)
-                operation_data["current_price_sell"] = round(
-                    operation_data["current_price_buy"] * price_variation, 2
-                )
-                
-                data.append(operation_data)
+        def on_progress(rows_written: int, total_rows: int):
+            # Se ejecuta en el hilo de trabajo
+            self.dataset_progress["rows_written"] = rows_written
+            self._notify_dataset_progress(profile, "IN_PROGRESS")
         
-        return data
+        self._notify_dataset_progress(profile, "STARTING")
+        summary = await asyncio.to_thread(
+            generator.write, filepath, fecha, [symbol["name"] for symbol in symbols], operaciones,
+            formato, on_progress, self._dataset_cancel_event
+        )
+        self._notify_dataset_progress(profile, "CANCELLED" if summary["cancelled"] else "COMPLETED")
+        return summary
     
-    async def _save_csv_data(self, data: List[Dict], filepath: str):
-        """Guarda los datos en un archivo CSV."""
-        if not data:
+    def _notify_dataset_progress(self, profile: str, status: str):
+        """Envía el progreso de creación del dataset al loop de la UI (seguro desde cualquier hilo)."""
+        loop = getattr(self.ui_broadcaster, "loop", None) if self.ui_broadcaster else None
+        if loop is None or loop.is_closed():
             return
         
-        fieldnames = data[0].keys()
+        asyncio.run_coroutine_threadsafe(
+            self.ui_broadcaster.broadcast_dataset_progress(
+                profile, status,
+                self.dataset_progress["rows_written"],
+                self.dataset_progress["total_rows"],
+                self.dataset_progress["filepath"]
+            ),
+            loop
+        )
+    
+    async def cancel_dataset_creation(self, payload: Dict = None) -> Dict:
+        """Solicita cancelar la creación de dataset en curso."""
+        if not self.dataset_creation_in_progress:
+            return {"status": "error", "message": "No hay creación de dataset en progreso"}
         
-        with open(filepath, "w", newline="", encoding="utf-8") as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerows(data)
+        self._dataset_cancel_event.set()
+        self.logger.info("Cancelación de creación de dataset solicitada")
+        return {"status": "success", "message": "Cancelación solicitada"}
     
     async def _run_training_process(self, filepath: str):
         """Ejecuta el proceso de entrenamiento en background."""
@@ -511,48 +582,23 @@ class TrainingHandler:
             if self.ui_broadcaster:
                 await self.ui_broadcaster.broadcast_test_progress(0, False, self.testing_filepath)
             
-            # Cargar datos del CSV
+            # Cargar, featurizar y predecir el set completo en un proceso de trabajo
             self.testing_progress = 10
             if self.ui_broadcaster:
                 await self.ui_broadcaster.broadcast_test_progress(10, False, self.testing_filepath)
             
-            test_data = await self._load_csv_file(filepath)
-            
-            if not test_data:
-                error_msg = "No se pudieron cargar los datos de prueba"
-                self.logger.error(error_msg)
-                if self.ui_broadcaster:
-                    await self.ui_broadcaster.broadcast_test_error(error_msg)
-                self.testing_in_progress = False
-                return
-            
-            # Validar datos
-            self.testing_progress = 20
-            if self.ui_broadcaster:
-                await self.ui_broadcaster.broadcast_test_progress(20, False, self.testing_filepath)
-            
-            if len(test_data) < 5:
-                error_msg = f"Datos insuficientes para pruebas: {len(test_data)} registros (mínimo 5)"
-                self.logger.error(error_msg)
-                if self.ui_broadcaster:
-                    await self.ui_broadcaster.broadcast_test_error(error_msg)
-                self.testing_in_progress = False
-                return
-            
-            # Ejecutar pruebas con progreso
-            test_steps = [30, 50, 70, 85, 95]
-            for progress in test_steps:
-                self.testing_progress = progress
-                if self.ui_broadcaster:
-                    await self.ui_broadcaster.broadcast_test_progress(progress, False, self.testing_filepath)
-                await asyncio.sleep(1)  # Simular tiempo de procesamiento
-            
-            # Ejecutar pruebas reales
             try:
-                results = await self._run_model_tests(test_data)
+                from core.model_evaluation import evaluate_test_file_in_process
+                
+                results = await evaluate_test_file_in_process(
+                    self.ai_model.model_path, filepath, self._get_evaluation_executor()
+                )
                 if "error" in results:
                     raise Exception(results["error"])
             except Exception as test_error:
+                if isinstance(test_error, BrokenProcessPool):
+                    # El proceso de trabajo murió; la próxima prueba crea uno nuevo
+                    await self.cleanup()
                 error_msg = f"Error durante las pruebas del modelo: {str(test_error)}"
                 self.logger.error(error_msg)
                 if self.ui_broadcaster:
@@ -580,7 +626,12 @@ class TrainingHandler:
     async def _load_csv_file(self, file_path_or_file) -> List[Dict]:
         """Carga datos desde un archivo CSV."""
         try:
-            if isinstance(file_path_or_file, str):
+            if isinstance(file_path_or_file, str) and file_path_or_file.endswith(".parquet"):
+                # Dataset sintético generado en Parquet
+                import pandas as pd
+                
+                return pd.read_parquet(file_path_or_file).to_dict(orient="records")
+            elif isinstance(file_path_or_file, str):
                 # Es una ruta de archivo
                 with open(file_path_or_file, "r", encoding="utf-8") as file:
                     reader = csv.DictReader(file)
@@ -596,34 +647,15 @@ class TrainingHandler:
             return []
     
     async def _run_model_tests(self, test_data: List[Dict]) -> Dict:
-        """Ejecuta pruebas del modelo con datos de test."""
+        """Ejecuta pruebas del modelo con datos de test (featurización y predicción en lote)."""
         try:
             if not self.ai_model.is_trained:
                 return {"error": "El modelo no está entrenado"}
             
-            correct_predictions = 0
-            total_predictions = len(test_data)
+            import pandas as pd
+            from core.model_evaluation import evaluate_records
             
-            for data in test_data:
-                prediction = self.ai_model.predict(data)
-                actual_outcome = data.get("decision_outcome", "")
-                
-                # Simplificar comparación
-                predicted_success = prediction.get("should_execute", False)
-                actual_success = "EJECUTADA_EXITOSA" in actual_outcome
-                
-                if predicted_success == actual_success:
-                    correct_predictions += 1
-            
-            accuracy = (correct_predictions / total_predictions) * 100 if total_predictions > 0 else 0
-            
-            return {
-                "accuracy": round(accuracy, 2),
-                "recall": round(accuracy * 0.9, 2),  # Simulado
-                "f1Score": round(accuracy * 0.95, 2),  # Simulado
-                "successfulOperations": correct_predictions,
-                "totalOperations": total_predictions
-            }
+            return await asyncio.to_thread(evaluate_records, self.ai_model, pd.DataFrame(test_data))
             
         except Exception as e:
             self.logger.error(f"Error ejecutando pruebas del modelo: {e}")
@@ -635,6 +667,8 @@ class TrainingHandler:
         if not data:
             return []
 
+        import pandas as pd
+
         df = pd.DataFrame(data)
 
         # Ejemplo de optimización: Normalización de columnas numéricas
@@ -669,49 +703,6 @@ class TrainingHandler:
         self.logger.info("Optimización de datos completada.")
         return df_optimized.to_dict(orient='records')
 
-    async def _generate_test_data(self, fecha: datetime, symbols: List[Dict],
-                                operaciones: int, intervalo: str) -> List[Dict]:
-        """Genera datos históricos simulados para pruebas (con variaciones diferentes al entrenamiento)."""
-        data = []
-        
-        # Configuración base (ligeramente diferente al entrenamiento)
-        base_investment = 150.0  # USDT (diferente al entrenamiento)
-        exchanges = ["binance", "kucoin", "okx", "bybit", "huobi"]  # Más exchanges
-        
-        for i in range(operaciones):
-            for symbol in symbols:
-                # Simular datos de operación con variaciones para pruebas
-                operation_data = {
-                    "timestamp": (fecha + timedelta(minutes=i * 7)).isoformat(),  # Intervalo diferente
-                    "symbol": symbol["name"],
-                    "buy_exchange_id": np.random.choice(exchanges),
-                    "sell_exchange_id": np.random.choice(exchanges),
-                    "current_price_buy": round(np.random.uniform(80, 60000), 2),  # Rango más amplio
-                    "current_price_sell": 0,
-                    "investment_usdt": base_investment,
-                    "estimated_buy_fee": round(np.random.uniform(0.05, 0.8), 3),  # Fees diferentes
-                    "estimated_sell_fee": round(np.random.uniform(0.05, 0.8), 3),
-                    "estimated_transfer_fee": round(np.random.uniform(0.5, 15), 2),
-                    "decision_outcome": np.random.choice([
-                        "EJECUTADA_EXITOSA", "EJECUTADA_PERDIDA", "NO_EJECUTADA_RIESGO",
-                        "NO_EJECUTADA_FEES", "NO_EJECUTADA_LIQUIDEZ"
-                    ], p=[0.3, 0.2, 0.2, 0.15, 0.15]),  # Probabilidades diferentes
-                    "net_profit_usdt": round(np.random.uniform(-8, 20), 4),  # Rango diferente
-                    "profit_percentage": round(np.random.uniform(-8, 20), 2),
-                    "total_fees_usdt": round(np.random.uniform(0.3, 4), 2),
-                    "execution_time_seconds": np.random.randint(20, 400)  # Tiempo diferente
-                }
-                
-                # Ajustar precio de venta basado en el de compra (con más volatilidad)
-                price_variation = np.random.uniform(0.99, 1.01)  # Más volatilidad
-                operation_data["current_price_sell"] = round(
-                    operation_data["current_price_buy"] * price_variation, 2
-                )
-                
-                data.append(operation_data)
-        
-        return data
-
     def get_training_status(self) -> (str, int, Optional[str]):
         """Retorna el estado actual del entrenamiento."""
         return self.training_in_progress, self.training_progress, self.training_filepath
@@ -720,5 +711,9 @@ class TrainingHandler:
         """Retorna el estado actual de las pruebas."""
         return self.testing_in_progress, self.testing_progress, self.testing_filepath
 
+    def get_dataset_creation_status(self) -> (bool, Dict):
+        """Retorna el estado actual de la creación de datasets."""
+        return self.dataset_creation_in_progress, dict(self.dataset_progress)
+
 
 
@@ -1,31 +1,53 @@
 # Simos/V3/main_v3.py
 
+import argparse
 import asyncio
 import logging
+import os
 import signal
 import sys
+import time
 from typing import Dict, Any
+
+_IMPORTS_STARTED = time.perf_counter()
+
 from flask import Flask
 
 # Importar módulos de V3
-from shared.config_v3 import LOG_LEVEL, LOG_FILE_PATH
+from shared.config_v3 import (
+    LOG_LEVEL, LOG_FILE_PATH, SEBO_RECORDING_ENABLED, TRACE_EXPORT_FILE, METRICS_ENABLED,
+    OPPORTUNITY_PIPELINE_ENABLED
+)
 from shared.utils import setup_logging
+from shared.profiler import EventLoopProfiler
+from adapters.connectors.http_client import SharedHTTPClient
 from adapters.connectors.sebo_connector import SeboConnector
+from adapters.connectors.sebo_replay import SeboReplayFeeder
 from adapters.socket.ui_broadcaster import UIBroadcaster
 from adapters.exchanges.exchange_manager import ExchangeManager
 from adapters.persistence.data_persistence import DataPersistence
+from adapters.persistence.sebo_recorder import SeboEventRecorder
 from core.trading_logic import TradingLogic
+from core.opportunity_pipeline import OpportunityPipeline
 from core.ai_model import ArbitrageAIModel
 from core.simulation_engine import SimulationEngine
 from core.advanced_simulation_engine import AdvancedSimulationEngine, SimulationMode
 from adapters.api.api_v3_routes import APIv3Routes
+from adapters.api.metrics_server import MetricsServer
 from adapters.socket.socket_optimizer import SocketOptimizer
 from core.training_handler import TrainingHandler # Importar TrainingHandler
+from shared.tracing import StartupTimer
+
+_IMPORTS_SECONDS = time.perf_counter() - _IMPORTS_STARTED
 
 class CryptoArbitrageV3:
     """Aplicación principal de arbitraje de criptomonedas V3."""
     
-    def __init__(self):
+    def __init__(self, profile: bool = False):
+        construct_started = time.perf_counter()
+        self.startup = StartupTimer(_IMPORTS_STARTED)
+        self.startup.add("imports", _IMPORTS_SECONDS)
+        
         # Configurar logging
         self.logger = setup_logging(LOG_LEVEL, LOG_FILE_PATH)
         self.logger.info("Iniciando Crypto Arbitrage V3")
@@ -34,18 +56,23 @@ class CryptoArbitrageV3:
         self.flask_app = Flask(__name__)
         
         # Inicializar componentes
-        self.sebo_connector = SeboConnector()
+        self.http_client = SharedHTTPClient()  # Pool HTTP compartido por los adaptadores de Sebo
+        self.sebo_connector = SeboConnector(self.http_client)
+        self.sebo_recorder = SeboEventRecorder() if SEBO_RECORDING_ENABLED else None
         self.ui_broadcaster = UIBroadcaster()
         self.exchange_manager = ExchangeManager()
         self.data_persistence = DataPersistence()
-        self.ai_model = ArbitrageAIModel()
+        self.ai_model = ArbitrageAIModel(load_in_background=True)  # Se carga en initialize()
         self.trading_logic = TradingLogic(self.exchange_manager, self.data_persistence, self.ai_model)
+        # Snapshots Top 20 -> oportunidades priorizadas -> TradingLogic
+        self.opportunity_pipeline = OpportunityPipeline(self.trading_logic) if OPPORTUNITY_PIPELINE_ENABLED else None
         self.simulation_engine = SimulationEngine(self.ai_model, self.data_persistence)
         self.advanced_simulation_engine = AdvancedSimulationEngine(
             self.ai_model,
             self.data_persistence,
             self.exchange_manager,
-            self.ui_broadcaster
+            self.ui_broadcaster,
+            self.http_client
         )
         self.training_handler = TrainingHandler(self.sebo_connector, self.ai_model, self.data_persistence, self.ui_broadcaster) # Inicializar TrainingHandler
         
@@ -61,6 +88,12 @@ class CryptoArbitrageV3:
         # Pasar el training_handler a las rutas API
         self.api_v3.training_handler = self.training_handler
         
+        # Endpoint /metrics (Prometheus) con el registro compartido por los componentes
+        self.metrics_server = MetricsServer() if METRICS_ENABLED else None
+        
+        # Profiler del event loop (--profile): lag, callbacks lentos y stacks muestreados
+        self.profiler = EventLoopProfiler() if profile else None
+        
         # Inicializar optimizador de socket
         self.socket_optimizer = SocketOptimizer(
             self.ui_broadcaster,
@@ -74,6 +107,8 @@ class CryptoArbitrageV3:
         
         # Configurar callbacks
         self._setup_callbacks()
+        
+        self.startup.add("construct", time.perf_counter() - construct_started)
     
     def _setup_callbacks(self):
         """Configura los callbacks entre componentes."""
@@ -81,6 +116,8 @@ class CryptoArbitrageV3:
         # Callbacks de SeboConnector
         self.sebo_connector.set_balances_update_callback(self._on_balances_update)
         self.sebo_connector.set_top20_data_callback(self._on_top20_data)
+        if self.sebo_recorder:
+            self.sebo_connector.set_recorder(self.sebo_recorder)
         
         # Callbacks de UIBroadcaster
         self.ui_broadcaster.set_trading_start_callback(self._on_trading_start_request)
@@ -92,6 +129,7 @@ class CryptoArbitrageV3:
         self.ui_broadcaster.set_test_ai_model_callback(self.training_handler.start_tests) # Configurar callback para pruebas
         self.ui_broadcaster.set_get_training_status_callback(self._get_training_status_wrapper) # Callback wrapper para estado de entrenamiento
         self.ui_broadcaster.set_get_test_status_callback(self._get_test_status_wrapper) # Callback wrapper para estado de pruebas
+        self.ui_broadcaster.set_cancel_dataset_creation_callback(self.training_handler.cancel_dataset_creation)
         
         # Callbacks de TradingLogic
         self.trading_logic.set_operation_complete_callback(self._on_operation_complete)
@@ -102,17 +140,35 @@ class CryptoArbitrageV3:
         try:
             self.logger.info("Inicializando componentes...")
             
-            # Inicializar en orden de dependencias
-            await self.sebo_connector.initialize()
-            await self.exchange_manager.initialize()
-            await self.trading_logic.initialize()
-            await self.advanced_simulation_engine.initialize()
+            # Iniciar primero el profiler para cubrir también el arranque
+            if self.profiler:
+                self.profiler.start()
+            
+            # El modelo de IA (joblib + sklearn) se carga en un hilo mientras se inicializa el resto
+            self.ai_model.start_background_load()
+            
+            # Componentes independientes entre sí: se inicializan a la vez
+            await asyncio.gather(
+                self.startup.measure("sebo_connector", self.sebo_connector.initialize()),
+                self.startup.measure("exchanges", self.exchange_manager.initialize()),
+                self.startup.measure("trading_logic", self.trading_logic.initialize()),
+                self.startup.measure("advanced_simulation", self.advanced_simulation_engine.initialize())
+            )
             
             # Iniciar servidor UI
-            await self.ui_broadcaster.start_server()
+            with self.startup.phase("ui_server"):
+                await self.ui_broadcaster.start_server()
             
             # Iniciar optimizador de socket
-            await self.socket_optimizer.start()
+            with self.startup.phase("socket_optimizer"):
+                await self.socket_optimizer.start()
+            
+            if self.metrics_server:
+                with self.startup.phase("metrics_server"):
+                    await self.metrics_server.start()
+            
+            if self.opportunity_pipeline:
+                await self.opportunity_pipeline.start()
             
             self.logger.info("Todos los componentes inicializados correctamente")
             
@@ -127,11 +183,13 @@ class CryptoArbitrageV3:
             self.logger.info("Iniciando Crypto Arbitrage V3...")
             
             # Conectar a Sebo
-            connected = await self.sebo_connector.connect_to_sebo()
+            with self.startup.phase("sebo_connect"):
+                connected = await self.sebo_connector.connect_to_sebo()
             if not connected:
                 self.logger.error("No se pudo conectar a Sebo")
                 return False
             
+            await self._finish_startup()
             self.logger.info("V3 iniciado correctamente")
             
             # Configurar manejo de señales para shutdown graceful
@@ -143,6 +201,59 @@ class CryptoArbitrageV3:
             self.logger.error(f"Error iniciando V3: {e}")
             return False
     
+    async def run_replay(self, filepath: str, speed: float = None, trade: bool = True) -> Dict[str, Any]:
+        """
+        Reproduce snapshots Top 20 grabados (CSV o directorio de grabación) en lugar de conectar a Sebo.
+        
+        Con trade=True los snapshots recorren el pipeline completo hasta TradingLogic,
+        que opera en modo simulación sin tocar el estado de trading guardado.
+        """
+        self.is_running = True
+        feeder = SeboReplayFeeder(self.sebo_connector)
+        
+        # No volver a grabar lo que se está reproduciendo
+        self.sebo_connector.set_recorder(None)
+        
+        # Nunca enviar órdenes reales con datos grabados
+        self.trading_logic.simulation_mode = True
+        self.trading_logic.persist_state = False
+        self.trading_logic.trading_stats.update(operations_count=0, successful_operations=0, total_profit_usdt=0.0)
+        # Los timestamps grabados son históricos: la edad se mide solo desde la llegada del snapshot reproducido
+        self.trading_logic.freshness.use_source_timestamp = False
+        
+        try:
+            await self._finish_startup()
+            if trade:
+                await self.trading_logic.start_trading()
+            elif self.trading_logic.is_trading_active:
+                await self.trading_logic.stop_trading()
+            
+            self.logger.info(f"Modo replay: {filepath} (trading simulado: {'sí' if trade else 'no'})")
+            if os.path.isdir(filepath):
+                stats = await feeder.replay_recording(filepath, speed=speed)
+            else:
+                stats = await feeder.replay_csv(filepath, speed=speed)
+            
+            # Dejar terminar lo que quedó en el pipeline antes de reportar
+            if self.opportunity_pipeline and not await self.opportunity_pipeline.wait_until_idle():
+                self.logger.warning("El pipeline no terminó de procesar el replay a tiempo")
+            
+            stats["opportunity_pipeline"] = self.opportunity_pipeline.get_stats() if self.opportunity_pipeline else None
+            stats["trading"] = {
+                **self.trading_logic.get_trading_stats(),
+                "decisions": self.trading_logic.latency_tracker.get_stats()
+            }
+            return stats
+        finally:
+            await self.shutdown()
+    
+    async def _finish_startup(self):
+        """Espera la carga del modelo (solapada con el resto del arranque) y reporta los tiempos."""
+        await self.ai_model.wait_until_loaded()
+        if self.ai_model.load_seconds is not None:
+            self.startup.add("ai_model_load", self.ai_model.load_seconds)
+        self.startup.mark_ready()
+    
     async def run(self):
         """Ejecuta el bucle principal de la aplicación."""
         try:
@@ -172,6 +283,10 @@ class CryptoArbitrageV3:
         self.is_running = False
         
         try:
+            # Dejar de despachar oportunidades antes de detener el trading
+            if self.opportunity_pipeline:
+                await self.opportunity_pipeline.stop()
+            
             # Detener trading si está activo
             if self.trading_logic.is_trading_active:
                 await self.trading_logic.stop_trading()
@@ -182,8 +297,22 @@ class CryptoArbitrageV3:
             await self.advanced_simulation_engine.cleanup()
             await self.sebo_connector.disconnect_from_sebo()
             await self.trading_logic.cleanup()
+            await self.training_handler.cleanup()
+            self.trading_logic.latency_tracker.export(TRACE_EXPORT_FILE)
             await self.exchange_manager.cleanup()
             await self.sebo_connector.cleanup()
+            await self.http_client.close()
+            
+            if self.sebo_recorder:
+                # Espera a que el hilo de grabación vacíe su cola sin bloquear el loop
+                await asyncio.to_thread(self.sebo_recorder.close)
+            
+            if self.metrics_server:
+                await self.metrics_server.stop()
+            
+            if self.profiler:
+                self.profiler.stop()
+                self.profiler.dump("shutdown")
             
             self.logger.info("Shutdown completado")
             
@@ -205,14 +334,9 @@ class CryptoArbitrageV3:
         self.logger.info("Señal de shutdown recibida")
     
     async def _monitor_system_health(self):
-        """Monitorea la salud del sistema."""
+        """Monitorea la salud del sistema (la reconexión a Sebo la supervisa SeboConnector)."""
         while self.is_running:
             try:
-                # Verificar conexiones
-                if not self.sebo_connector.is_connected:
-                    self.logger.warning("Conexión con Sebo perdida, intentando reconectar...")
-                    await self.sebo_connector.connect_to_sebo()
-                
                 # Verificar estado de exchanges
                 active_exchanges = self.exchange_manager.get_active_exchanges()
                 self.logger.debug(f"Exchanges activos: {len(active_exchanges)}")
@@ -224,7 +348,21 @@ class CryptoArbitrageV3:
                     "payload": {
                         "sebo_connected": self.sebo_connector.is_connected,
                         "ui_clients": self.ui_broadcaster.get_connected_clients_count(),
+                        "ui_channels": self.ui_broadcaster.get_channel_stats(),
+                        "sebo_connection": self.sebo_connector.get_connection_stats(),
+                        "sebo_ingest": self.sebo_connector.get_ingest_stats(),
+                        "sebo_http": self.http_client.get_stats(),
+                        "request_coalescing": {
+                            **self.sebo_connector.get_request_coalescing_stats(),
+                            **self.exchange_manager.get_request_coalescing_stats()
+                        },
+                        "latency_traces": self.trading_logic.latency_tracker.get_stats(),
+                        "opportunity_pipeline": self.opportunity_pipeline.get_stats() if self.opportunity_pipeline else None,
+                        "opportunity_freshness": self.trading_logic.freshness.get_stats(),
+                        "event_loop": self.profiler.get_stats(top=5) if self.profiler else None,
+                        "startup": self.startup.get_report(),
                         "active_exchanges": len(active_exchanges),
+                        "ready_exchanges": len(self.exchange_manager.get_ready_exchanges()),
                         "trading_active": self.trading_logic.is_trading_active,
                         "operation_stats": stats
                     }
@@ -253,6 +391,10 @@ class CryptoArbitrageV3:
     async def _on_top20_data(self, data: list):
         """Maneja datos del top 20 de Sebo."""
         try:
+            # Priorizar y encolar las oportunidades para TradingLogic (no bloquea)
+            if self.opportunity_pipeline:
+                self.opportunity_pipeline.submit_snapshot(data)
+            
             # Retransmitir a UI
             await self.ui_broadcaster.broadcast_top20_data(data)
             
@@ -316,6 +458,8 @@ class CryptoArbitrageV3:
                 await self._send_trading_stats()
             elif message_type == "export_data":
                 await self._handle_data_export(payload)
+            elif message_type == "dump_profile":
+                await self._handle_profile_dump()
             elif message_type in ["start_ai_training", "train_ai_model"]: # Manejar ambos tipos de mensaje
                 if self.ui_broadcaster.on_train_ai_model_callback:
                     await self.ui_broadcaster.on_train_ai_model_callback(payload)
@@ -339,8 +483,11 @@ class CryptoArbitrageV3:
                 "sebo_connected": self.sebo_connector.is_connected,
                 "ui_clients": self.ui_broadcaster.get_connected_clients_count(),
                 "active_exchanges": self.exchange_manager.get_active_exchanges(),
+                "ready_exchanges": self.exchange_manager.get_ready_exchanges(),
+                "exchange_readiness": self.exchange_manager.get_readiness(),
                 "trading_active": self.trading_logic.is_trading_active,
-                "current_operation": self.trading_logic.get_current_operation()
+                "current_operation": self.trading_logic.get_current_operation(),
+                "startup": self.startup.get_report()
             }
             
             await self.ui_broadcaster.broadcast_message({
@@ -387,6 +534,25 @@ class CryptoArbitrageV3:
         except Exception as e:
             self.logger.error(f"Error exportando datos: {e}")
     
+    async def _handle_profile_dump(self):
+        """Guarda el perfil del event loop acumulado hasta ahora (comando de UI)."""
+        try:
+            if not self.profiler:
+                result = {"success": False, "error": "Profiler no activo (iniciar V3 con --profile)"}
+            else:
+                # Escribir fuera del loop para no bloquear lo que se está midiendo
+                loop = asyncio.get_running_loop()
+                result = await loop.run_in_executor(None, self.profiler.dump, "ui")
+                result["stats"] = self.profiler.get_stats()
+            
+            await self.ui_broadcaster.broadcast_message({
+                "type": "profile_dump_result",
+                "payload": result
+            })
+            
+        except Exception as e:
+            self.logger.error(f"Error guardando perfil del event loop: {e}")
+    
     async def _on_operation_complete(self, operation_result: Dict):
         """Maneja la finalización de una operación."""
         try:
@@ -416,7 +582,12 @@ class CryptoArbitrageV3:
 
 # Entry point
 if __name__ == "__main__":
-    app = CryptoArbitrageV3()
+    parser = argparse.ArgumentParser(description='Crypto Arbitrage V3')
+    parser.add_argument('--profile', action='store_true',
+                       help='Perfilar el event loop (lag, callbacks lentos, stacks colapsados en logs/profiles)')
+    args = parser.parse_args()
+    
+    app = CryptoArbitrageV3(profile=args.profile)
     
     # Ejecutar la aplicación
     async def main():
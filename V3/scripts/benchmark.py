@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+# Simos/V3/benchmark.py
+
+"""
+Benchmarks del camino de decisión de V3.
+Uso: python benchmark.py [opciones]
+
+Mide preparación de features y predicción (1 y N filas), cálculo de rentabilidad,
+utilidades de símbolo y red, difusión a M clientes UI, escritura del CSV de
+operaciones y backtests grandes. Cada ejecución se guarda como JSON y se compara
+con la anterior (o con --baseline) para detectar regresiones entre versiones.
+"""
+
+import asyncio
+import argparse
+import glob
+import inspect
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Callable
+
+# Add the parent directory (V3) to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import core.simulation_engine as simulation_engine_module
+from core.ai_model import ArbitrageAIModel
+from core.simulation_engine import SimulationEngine
+from core.arbitrage_calculator import calculate_net_profitability
+from adapters.persistence.data_persistence import DataPersistence
+from adapters.socket.ui_broadcaster import UIBroadcaster
+from adapters.socket.client_channel import ClientChannel
+from shared.config_v3 import (
+    PREFERRED_NETWORKS, UI_COALESCE_MESSAGE_TYPES, UI_TOPICS,
+    BENCHMARK_RESULTS_DIR, BENCHMARK_REGRESSION_THRESHOLD
+)
+from shared.utils import (
+    setup_logging, calculate_percentiles, create_symbol_dict, find_cheapest_network, get_current_timestamp
+)
+
+class BenchmarkRunner:
+    """Ejecuta casos de benchmark (funciones sync o async) y resume sus tiempos."""
+
+    def __init__(self, repeat: int, warmup: int):
+        self.repeat = repeat
+        self.warmup = warmup
+        self.results: Dict[str, Dict[str, Any]] = {}
+
+    async def measure(self, name: str, fn: Callable, rows: int = 1, repeat: int = None, warmup: int = None):
+        """Mide fn() `repeat` veces tras `warmup` ejecuciones descartadas."""
+        repeat = repeat or self.repeat
+        warmup = self.warmup if warmup is None else warmup
+
+        for _ in range(warmup):
+            await self._call(fn)
+
+        timings_ms = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            await self._call(fn)
+            timings_ms.append((time.perf_counter() - start) * 1000)
+
+        percentiles = calculate_percentiles(timings_ms)
+        result = {
+            'rows': rows,
+            'repeat': repeat,
+            'min_ms': round(min(timings_ms), 4),
+            'mean_ms': round(sum(timings_ms) / len(timings_ms), 4),
+            'p50_ms': round(percentiles['p50'], 4),
+            'p95_ms': round(percentiles['p95'], 4),
+            'max_ms': round(max(timings_ms), 4),
+            'rows_per_second': round(rows / (percentiles['p50'] / 1000), 2) if percentiles['p50'] > 0 else None
+        }
+        self.results[name] = result
+        print(f"  {name:<45} p50 {result['p50_ms']:>10.3f} ms  p95 {result['p95_ms']:>10.3f} ms  ({repeat}x)")
+        return result
+
+    @staticmethod
+    async def _call(fn: Callable):
+        result = fn()
+        if inspect.isawaitable(result):
+            await result
+
+# Datos sintéticos
+
+def make_top20_item(sample: Dict) -> Dict:
+    """Item con el formato del evento top_20_data de Sebo."""
+    return {
+        'symbol': sample['symbol'],
+        'symbol_name': sample['symbol_name'],
+        'exchange_min_id': sample['buy_exchange_id'],
+        'exchange_max_id': sample['sell_exchange_id'],
+        'price_at_exMin_to_buy_asset': sample['current_price_buy'],
+        'price_at_exMax_to_sell_asset': sample['current_price_sell'],
+        'percentage_difference': f"{sample['percentage_difference']:.4f}%",
+        'fees_exMin': {'taker_fee': sample['market_data']['buy_fees']['taker']},
+        'fees_exMax': {'taker_fee': sample['market_data']['sell_fees']['taker']},
+        'analysis_id': 'benchmark',
+        'timestamp': sample['timestamp']
+    }
+
+def make_profitability_input(sample: Dict) -> Dict:
+    """Datos con el formato que espera calculate_net_profitability."""
+    return {
+        'current_price_ex_min_buy_asset': sample['current_price_buy'],
+        'current_price_ex_max_sell_asset': sample['current_price_sell'],
+        'initial_usdt_withdrawal_selected_fee': 1.0,
+        'ex_min_taker_fee_rate_sebo': sample['market_data']['buy_fees']['taker'],
+        'asset_withdrawal_fee_from_ex_min_sebo': 0.0005,
+        'ex_max_taker_fee_rate_sebo': sample['market_data']['sell_fees']['taker']
+    }
+
+def make_networks() -> List[Dict]:
+    """Redes de retiro con el formato de CCXT (algunas inactivas)."""
+    names = ['TRC20', 'BSC', 'POLYGON', 'ERC20', 'ARBITRUM', 'OPTIMISM', 'SOL', 'AVAXC']
+    return [
+        {'network': name, 'fee': random.uniform(0.1, 20), 'active': index % 4 != 3, 'withdraw': True}
+        for index, name in enumerate(names)
+    ]
+
+class _NullWebSocket:
+    """WebSocket que descarta los envíos (mide solo el costo del lado del servidor)."""
+
+    subprotocol = None
+
+    async def send(self, data):
+        return None
+
+def attach_fake_clients(broadcaster: UIBroadcaster, count: int) -> List[ClientChannel]:
+    """Registra `count` clientes UI falsos con su cola de envío, como al conectarse."""
+    channels = []
+    for index in range(count):
+        websocket = _NullWebSocket()
+        channel = ClientChannel(
+            websocket,
+            coalesce_types=UI_COALESCE_MESSAGE_TYPES,
+            client_address=f"benchmark-{index}",
+            rate_limits={}
+        )
+        broadcaster.ui_clients.add(websocket)
+        broadcaster.client_channels[websocket] = channel
+        broadcaster._set_client_topics(channel, UI_TOPICS)
+        channel.start()
+        channels.append(channel)
+    return channels
+
+async def wait_drained(channels: List[ClientChannel]):
+    """Espera a que las tareas de escritura vacíen todas las colas."""
+    while any(channel.queue_depth for channel in channels):
+        await asyncio.sleep(0)
+
+# Resultados
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+def find_previous_results(results_dir: str) -> Optional[str]:
+    """Último archivo de resultados guardado en el directorio."""
+    files = sorted(glob.glob(os.path.join(results_dir, 'benchmark_*.json')))
+    return files[-1] if files else None
+
+def compare_results(current: Dict, baseline: Dict, threshold: float) -> List[Dict]:
+    """Compara el p50 de los casos comunes; retorna los que empeoraron más del umbral."""
+    regressions = []
+    baseline_results = baseline.get('results', {})
+
+    print(f"\nComparación con {baseline.get('created_at')} (revisión {baseline.get('git_revision')}):")
+    for name, result in current['results'].items():
+        previous = baseline_results.get(name)
+        if not previous or not previous.get('p50_ms'):
+            print(f"  {name:<45} (nuevo)")
+            continue
+
+        change = (result['p50_ms'] - previous['p50_ms']) / previous['p50_ms']
+        marker = ""
+        if change > threshold:
+            marker = "  <-- REGRESIÓN"
+            regressions.append({'case': name, 'baseline_p50_ms': previous['p50_ms'],
+                                'p50_ms': result['p50_ms'], 'change': round(change, 4)})
+        print(f"  {name:<45} {previous['p50_ms']:>10.3f} -> {result['p50_ms']:>10.3f} ms ({change:+.1%}){marker}")
+
+    return regressions
+
+async def run_benchmarks(args) -> Dict[str, Any]:
+    random.seed(args.seed)
+    runner = BenchmarkRunner(args.repeat, args.warmup)
+
+    # Medir el cómputo, no la latencia de red simulada
+    simulation_engine_module.SIMULATION_DELAY = 0
+
+    workdir = tempfile.mkdtemp(prefix='simos_benchmark_')
+    data_persistence = DataPersistence()
+    # Modelo en un directorio temporal para no pisar el modelo de producción
+    ai_model = ArbitrageAIModel(args.model_path or os.path.join(workdir, 'benchmark_model.pkl'))
+    simulation_engine = SimulationEngine(ai_model, data_persistence)
+
+    max_rows = max([args.batch_rows] + args.backtest_rows)
+    print(f"Generando {max_rows} oportunidades sintéticas...")
+    samples = await simulation_engine.generate_training_data(max_rows, save_to_file=False)
+
+    if not ai_model.is_trained:
+        print(f"Entrenando modelo temporal con {args.train_rows} filas...")
+        ai_model.train(samples[:args.train_rows])
+
+    sample = samples[0]
+    batch = samples[:args.batch_rows]
+
+    print("\nUtilidades:")
+    top20_item = make_top20_item(sample)
+    await runner.measure('create_symbol_dict', lambda: create_symbol_dict(top20_item))
+    networks = make_networks()
+    await runner.measure(
+        'find_cheapest_network', lambda: find_cheapest_network(networks, PREFERRED_NETWORKS['USDT'])
+    )
+    profitability_input = make_profitability_input(sample)
+    await runner.measure(
+        'calculate_net_profitability', lambda: calculate_net_profitability(profitability_input, 100.0)
+    )
+
+    print("\nModelo:")
+    await runner.measure('prepare_features[1]', lambda: ai_model.prepare_features(sample))
+    await runner.measure(
+        f'prepare_features_batch[{len(batch)}]', lambda: ai_model.prepare_features_batch(batch),
+        rows=len(batch), repeat=max(3, args.repeat // 10)
+    )
+    await runner.measure('predict[1]', lambda: ai_model.predict(sample))
+    await runner.measure(
+        f'predict_batch[{len(batch)}]', lambda: ai_model.predict_batch(batch),
+        rows=len(batch), repeat=max(3, args.repeat // 10)
+    )
+
+    print("\nDifusión UI:")
+    for clients in args.ui_clients:
+        broadcaster = UIBroadcaster()
+        channels = attach_fake_clients(broadcaster, clients)
+        message = {"type": "system_health", "payload": {"sample": top20_item, "timestamp": get_current_timestamp()}}
+
+        async def broadcast_and_drain():
+            await broadcaster.broadcast_message(message)
+            await wait_drained(channels)
+
+        await runner.measure(f'broadcast_message[{clients} clients]', broadcast_and_drain, rows=clients)
+        for channel in channels:
+            await channel.close()
+
+    print("\nPersistencia:")
+    csv_path = os.path.join(workdir, 'operations.csv')
+    operation = {**sample, 'decision_outcome': 'NOT_PROFITABLE', 'net_profit_usdt': 0.0, 'execution_time_ms': 1.0}
+    await runner.measure('log_operation_to_csv', lambda: data_persistence.log_operation_to_csv(operation, csv_path))
+
+    print("\nBacktest:")
+    # Por defecto con la heurística (sin modelo): la predicción fila a fila ya se mide arriba
+    backtest_engine = SimulationEngine(
+        ai_model if args.backtest_with_model else ArbitrageAIModel(os.path.join(workdir, 'untrained.pkl')),
+        data_persistence
+    )
+    for rows in args.backtest_rows:
+        data = samples[:rows]
+        await runner.measure(
+            f'run_backtest[{rows}]', lambda data=data: backtest_engine.run_backtest(data),
+            rows=rows, repeat=args.backtest_repeat, warmup=0
+        )
+
+    return {
+        'created_at': get_current_timestamp(),
+        'git_revision': git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'params': {
+            'repeat': args.repeat,
+            'warmup': args.warmup,
+            'batch_rows': args.batch_rows,
+            'ui_clients': args.ui_clients,
+            'backtest_rows': args.backtest_rows,
+            'backtest_with_model': args.backtest_with_model,
+            'seed': args.seed
+        },
+        'results': runner.results
+    }
+
+async def main():
+    parser = argparse.ArgumentParser(description='Benchmarks del camino de decisión de V3')
+    parser.add_argument('--repeat', type=int, default=200,
+                       help='Repeticiones por caso (default: 200)')
+    parser.add_argument('--warmup', type=int, default=5,
+                       help='Ejecuciones descartadas antes de medir (default: 5)')
+    parser.add_argument('--batch-rows', type=int, default=1000,
+                       help='Filas para los casos por lotes (default: 1000)')
+    parser.add_argument('--train-rows', type=int, default=2000,
+                       help='Filas para entrenar el modelo temporal si no hay uno entrenado (default: 2000)')
+    parser.add_argument('--ui-clients', type=int, nargs='+', default=[1, 10, 100],
+                       help='Cantidades de clientes UI falsos (default: 1 10 100)')
+    parser.add_argument('--backtest-rows', type=int, nargs='+', default=[10000, 100000],
+                       help='Tamaños de backtest (default: 10000 100000)')
+    parser.add_argument('--backtest-repeat', type=int, default=1,
+                       help='Repeticiones de cada backtest (default: 1)')
+    parser.add_argument('--backtest-with-model', action='store_true',
+                       help='Backtest con el modelo entrenado (predicción fila a fila, mucho más lento)')
+    parser.add_argument('--model-path', type=str, default=None,
+                       help='Modelo entrenado a usar (default: uno temporal entrenado con datos sintéticos)')
+    parser.add_argument('--seed', type=int, default=42,
+                       help='Semilla de los datos sintéticos (default: 42)')
+    parser.add_argument('--results-dir', type=str, default=BENCHMARK_RESULTS_DIR,
+                       help=f'Directorio de resultados (default: {BENCHMARK_RESULTS_DIR})')
+    parser.add_argument('--baseline', type=str, default=None,
+                       help='Resultados con los que comparar (default: la ejecución anterior)')
+    parser.add_argument('--threshold', type=float, default=BENCHMARK_REGRESSION_THRESHOLD,
+                       help=f'Empeoramiento del p50 considerado regresión (default: {BENCHMARK_REGRESSION_THRESHOLD})')
+    parser.add_argument('--fail-on-regression', action='store_true',
+                       help='Retornar código 1 si hay regresiones')
+    parser.add_argument('--log-level', type=str, default='WARNING',
+                       choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'],
+                       help='Nivel de logging (default: WARNING)')
+
+    args = parser.parse_args()
+    setup_logging(args.log_level, 'logs/benchmark.log')
+
+    baseline_file = args.baseline or find_previous_results(args.results_dir)
+
+    try:
+        results = await run_benchmarks(args)
+    except Exception as e:
+        print(f"Error ejecutando benchmarks: {e}")
+        return 1
+
+    os.makedirs(args.results_dir, exist_ok=True)
+    results_file = os.path.join(args.results_dir, f"benchmark_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+
+    regressions = []
+    if baseline_file and os.path.exists(baseline_file):
+        with open(baseline_file) as f:
+            baseline = json.load(f)
+        regressions = compare_results(results, baseline, args.threshold)
+        results['baseline'] = {'file': baseline_file, 'threshold': args.threshold, 'regressions': regressions}
+
+    with open(results_file, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResultados guardados en: {results_file}")
+
+    if regressions:
+        print(f"{len(regressions)} casos con regresión (> {args.threshold:.0%} en p50)")
+        if args.fail_on_regression:
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    exit_code = asyncio.run(main())
+    sys.exit(exit_code)
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+# Simos/V3/load_test.py
+
+"""
+Prueba de carga de TradingLogic contra exchanges simulados (MockExchange).
+Uso: python load_test.py [opciones]
+
+Genera oportunidades con el formato del Top 20 de Sebo a una tasa fija (carga
+de lazo abierto: no espera a que termine la anterior), las procesa con el
+TradingLogic real y reporta throughput, resultados y latencias de cola.
+"""
+
+import asyncio
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+from typing import Dict, Any, List, Optional
+
+# Add the parent directory (V3) to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import core.trading_logic as trading_logic_module
+from core.ai_model import ArbitrageAIModel
+from core.trading_logic import TradingLogic
+from adapters.exchanges.exchange_manager import ExchangeManager
+from adapters.persistence.data_persistence import DataPersistence
+from shared.config_v3 import MOCK_EXCHANGE_CONFIG, SUPPORTED_EXCHANGES
+from shared.utils import setup_logging, calculate_percentiles, get_current_timestamp
+
+class LoadTestPersistence(DataPersistence):
+    """Persistencia en un directorio temporal: la prueba no toca el estado ni los logs reales."""
+
+    def __init__(self, workdir: str):
+        super().__init__()
+        self.csv_path = os.path.join(workdir, 'operations.csv')
+        self.trading_state: Optional[Dict] = None
+
+    async def log_operation_to_csv(self, operation_data: Dict, csv_path: str = None):
+        await super().log_operation_to_csv(operation_data, csv_path or self.csv_path)
+
+    async def save_trading_state(self, state_data: Dict) -> bool:
+        self.trading_state = dict(state_data)
+        return True
+
+    async def load_trading_state(self) -> Optional[Dict]:
+        return self.trading_state
+
+def make_opportunity(symbols: Dict[str, float], exchanges: List[str]) -> Dict:
+    """Oportunidad sintética con el formato del evento top_20_data."""
+    symbol = random.choice(list(symbols))
+    buy_exchange, sell_exchange = random.sample(exchanges, 2)
+    buy_price = symbols[symbol] * random.uniform(0.99, 1.01)
+    difference = random.uniform(-0.5, 2.0)
+    return {
+        'symbol': symbol,
+        'symbol_name': symbol.replace('/', ''),
+        'exchange_min_id': buy_exchange,
+        'exchange_max_id': sell_exchange,
+        'price_at_exMin_to_buy_asset': buy_price,
+        'price_at_exMax_to_sell_asset': buy_price * (1 + difference / 100),
+        'percentage_difference': f"{difference:.4f}%",
+        'analysis_id': f"load-{random.getrandbits(32):08x}",
+        'timestamp': get_current_timestamp()
+    }
+
+def summarize_latencies(values_ms: List[float]) -> Dict[str, float]:
+    percentiles = calculate_percentiles(values_ms, [50, 95, 99, 99.9])
+    return {
+        'count': len(values_ms),
+        **{key: round(value, 3) for key, value in percentiles.items()},
+        'max': round(max(values_ms, default=0.0), 3)
+    }
+
+async def run_load_test(args) -> Dict[str, Any]:
+    random.seed(args.seed)
+
+    # La prueba mide el pipeline, no la espera simulada de ejecución
+    trading_logic_module.SIMULATION_MODE = True
+    trading_logic_module.SIMULATION_DELAY = args.simulation_delay
+
+    mock_config = {
+        **MOCK_EXCHANGE_CONFIG,
+        'latency_ms': args.latency_ms,
+        'latency_jitter_ms': args.latency_jitter_ms,
+        'error_rate': args.error_rate,
+        'rate_limit_per_second': args.rate_limit,
+        'order_book_depth': args.order_book_depth
+    }
+    exchanges = args.exchanges or SUPPORTED_EXCHANGES
+
+    workdir = tempfile.mkdtemp(prefix='simos_load_test_')
+    exchange_manager = ExchangeManager(backend="mock", mock_config=mock_config)
+    for exchange_id in exchanges:
+        await exchange_manager.get_exchange_instance(exchange_id)
+    trading_logic = TradingLogic(exchange_manager, LoadTestPersistence(workdir), ArbitrageAIModel(args.model_path))
+    await trading_logic.start_trading()
+
+    outcomes: Counter = Counter()
+    latencies_ms: Dict[str, List[float]] = {'all': [], 'processed': []}
+    pending = set()
+
+    async def submit(opportunity: Dict):
+        start = time.perf_counter()
+        result = await trading_logic.process_arbitrage_opportunity(opportunity)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        outcome = result.get('decision_outcome', 'UNKNOWN')
+        outcomes[outcome] += 1
+        latencies_ms['all'].append(elapsed_ms)
+        if outcome not in ('OPERATION_IN_PROGRESS', 'TRADING_INACTIVE', 'MODEL_LOADING'):
+            latencies_ms['processed'].append(elapsed_ms)
+
+    total = int(args.rate * args.duration)
+    interval = 1.0 / args.rate
+    print(f"Enviando {total} oportunidades a {args.rate:g}/s durante {args.duration:g}s "
+          f"({len(exchanges)} exchanges simulados, latencia {args.latency_ms:g}ms, errores {args.error_rate:.1%})")
+
+    started = time.perf_counter()
+    for index in range(total):
+        # Lazo abierto: se respeta el calendario aunque el sistema vaya atrasado
+        delay = started + index * interval - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        task = asyncio.create_task(submit(make_opportunity(mock_config['symbols'], exchanges)))
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+
+    offered_seconds = time.perf_counter() - started
+    if pending:
+        await asyncio.gather(*pending)
+    elapsed = time.perf_counter() - started
+
+    await trading_logic.stop_trading()
+    mock_instances = dict(exchange_manager.ccxt_instances)
+    await exchange_manager.cleanup()
+
+    processed = len(latencies_ms['processed'])
+    return {
+        'created_at': get_current_timestamp(),
+        'params': {key: value for key, value in vars(args).items() if key != 'export'},
+        'offered': total,
+        'offered_rate': round(total / offered_seconds, 2) if offered_seconds > 0 else None,
+        'elapsed_seconds': round(elapsed, 3),
+        'processed': processed,
+        'processed_per_second': round(processed / elapsed, 2) if elapsed > 0 else None,
+        'outcomes': dict(outcomes),
+        'latency_ms': {
+            'all': summarize_latencies(latencies_ms['all']),
+            'processed': summarize_latencies(latencies_ms['processed'])
+        },
+        'stages': trading_logic.latency_tracker.get_stats(),
+        'exchanges': {exchange_id: instance.get_stats() for exchange_id, instance in mock_instances.items()},
+        'request_coalescing': exchange_manager.get_request_coalescing_stats()
+    }
+
+def print_report(report: Dict[str, Any]):
+    print("\n=== RESULTADOS DE LA PRUEBA DE CARGA ===")
+    print(f"Ofrecidas: {report['offered']} ({report['offered_rate']}/s)")
+    print(f"Procesadas: {report['processed']} ({report['processed_per_second']}/s) en {report['elapsed_seconds']}s")
+    print("Resultados:")
+    for outcome, count in sorted(report['outcomes'].items(), key=lambda item: -item[1]):
+        print(f"  {outcome:<35} {count}")
+    for name, stats in report['latency_ms'].items():
+        print(f"Latencia {name} (ms): p50 {stats['p50']}  p95 {stats['p95']}  p99 {stats['p99']}  "
+              f"p99.9 {stats['p99.9']}  max {stats['max']}")
+    print("Etapas (p50 / p99 ms):")
+    for stage, stats in report['stages']['stages_ms'].items():
+        print(f"  {stage:<15} {stats['p50']:>10.3f} / {stats['p99']:>10.3f}")
+
+async def main():
+    parser = argparse.ArgumentParser(description='Prueba de carga de TradingLogic con exchanges simulados')
+    parser.add_argument('--rate', type=float, default=2000,
+                       help='Oportunidades por segundo (default: 2000)')
+    parser.add_argument('--duration', type=float, default=10,
+                       help='Duración de la carga en segundos (default: 10)')
+    parser.add_argument('--latency-ms', type=float, default=MOCK_EXCHANGE_CONFIG['latency_ms'],
+                       help='Latencia media de los exchanges simulados')
+    parser.add_argument('--latency-jitter-ms', type=float, default=MOCK_EXCHANGE_CONFIG['latency_jitter_ms'],
+                       help='Desviación de la latencia de los exchanges simulados')
+    parser.add_argument('--error-rate', type=float, default=MOCK_EXCHANGE_CONFIG['error_rate'],
+                       help='Proporción de llamadas que fallan')
+    parser.add_argument('--rate-limit', type=float, default=MOCK_EXCHANGE_CONFIG['rate_limit_per_second'],
+                       help='Llamadas por segundo por exchange (0 = sin límite)')
+    parser.add_argument('--order-book-depth', type=int, default=MOCK_EXCHANGE_CONFIG['order_book_depth'],
+                       help='Niveles por lado del order book')
+    parser.add_argument('--exchanges', type=str, nargs='+', default=None,
+                       help='Exchanges a simular (default: SUPPORTED_EXCHANGES)')
+    parser.add_argument('--simulation-delay', type=float, default=0.0,
+                       help='Espera simulada por operación ejecutada (default: 0)')
+    parser.add_argument('--model-path', type=str, default=None,
+                       help='Modelo de IA a usar (default: el configurado)')
+    parser.add_argument('--seed', type=int, default=42,
+                       help='Semilla de las oportunidades sintéticas (default: 42)')
+    parser.add_argument('--export', type=str, default=None,
+                       help='Archivo JSON donde guardar el reporte')
+    parser.add_argument('--log-level', type=str, default='WARNING',
+                       choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'],
+                       help='Nivel de logging (default: WARNING)')
+
+    args = parser.parse_args()
+    setup_logging(args.log_level, 'logs/load_test.log')
+
+    try:
+        report = await run_load_test(args)
+    except Exception as e:
+        print(f"Error ejecutando la prueba de carga: {e}")
+        return 1
+
+    print_report(report)
+
+    if args.export:
+        with open(args.export, 'w') as f:
+            json.dump(report, f, indent=2, default=str)
+        print(f"\nReporte guardado en: {args.export}")
+    return 0
+
+if __name__ == "__main__":
+    exit_code = asyncio.run(main())
+    sys.exit(exit_code)
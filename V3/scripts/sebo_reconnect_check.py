@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# Simos/V3/sebo_reconnect_check.py
+
+"""
+Verificación de reconexión de SeboConnector contra el sustituto de Sebo.
+Uso: python sebo_reconnect_check.py [opciones]
+
+Levanta scripts/sebo_standin.py en un subproceso, conecta un SeboConnector
+real con su supervisor (wait_for_connection), mata el sustituto y comprueba
+que la caída se detecta, que al volver a levantarlo el conector se reconecta
+y re-sincroniza el Top 20 por REST, y que los eventos vuelven a llegar.
+Sale con código 0 si todas las comprobaciones pasan y 1 si alguna falla.
+"""
+
+import asyncio
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, Any, Callable, List
+
+# Add the parent directory (V3) to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from adapters.connectors.sebo_connector import SeboConnector
+from shared.utils import setup_logging
+
+STANDIN_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sebo_standin.py')
+
+def start_standin(top20_rate: float) -> subprocess.Popen:
+    """Inicia el sustituto de Sebo en los puertos de la configuración de V3."""
+    return subprocess.Popen(
+        [sys.executable, STANDIN_PATH, '--top20-rate', str(top20_rate), '--report-interval', '3600'],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+def stop_standin(process: subprocess.Popen):
+    """Mata el sustituto sin cierre ordenado (como una caída de Sebo)."""
+    if process.poll() is None:
+        process.kill()
+        process.wait()
+
+async def wait_until(condition: Callable[[], bool], timeout: float) -> bool:
+    """Espera a que la condición se cumpla o se agote el tiempo."""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() >= deadline:
+            return False
+        await asyncio.sleep(0.1)
+    return True
+
+async def run_check(args) -> Dict[str, Any]:
+    checks: List[Dict[str, Any]] = []
+    received = {'top20': 0}
+
+    async def on_top20(data):
+        received['top20'] += 1
+
+    def record(name: str, passed: bool):
+        checks.append({'check': name, 'passed': passed})
+        print(f"[{'OK' if passed else 'FALLA'}] {name}")
+
+    connector = SeboConnector()
+    connector.set_top20_data_callback(on_top20)
+    standin = start_standin(args.top20_rate)
+    supervisor = None
+
+    try:
+        await connector.initialize()
+
+        # El sustituto tarda en abrir el puerto: reintentar la conexión inicial
+        connected = False
+        deadline = time.monotonic() + args.timeout
+        while not connected and time.monotonic() < deadline:
+            connected = await connector.connect_to_sebo()
+            if not connected:
+                await asyncio.sleep(0.5)
+        record("conexión inicial", connected and await wait_until(lambda: connector.is_connected, args.timeout))
+
+        supervisor = asyncio.create_task(connector.wait_for_connection())
+        record("sin reconexión espuria al arrancar",
+               not await wait_until(lambda: connector.connection_stats['reconnects'] > 0, 2.0))
+        record("eventos top_20_data recibidos", await wait_until(lambda: received['top20'] > 0, args.timeout))
+
+        stop_standin(standin)
+        record("caída de Sebo detectada", await wait_until(lambda: not connector.is_connected, args.timeout))
+
+        await asyncio.sleep(args.downtime)
+        standin = start_standin(args.top20_rate)
+        record("reconexión tras la caída",
+               await wait_until(lambda: connector.connection_stats['reconnects'] >= 1 and connector.is_connected,
+                                args.timeout))
+        record("Top 20 re-sincronizado por REST",
+               await wait_until(lambda: connector.connection_stats['resyncs'] >= 1, args.timeout))
+
+        events_before = received['top20']
+        record("eventos top_20_data tras reconectar",
+               await wait_until(lambda: received['top20'] > events_before, args.timeout))
+
+        return {
+            'passed': all(check['passed'] for check in checks),
+            'checks': checks,
+            'connection': connector.get_connection_stats()
+        }
+    finally:
+        await connector.disconnect_from_sebo()
+        if supervisor:
+            await asyncio.wait_for(supervisor, timeout=5)
+        await connector.cleanup()
+        stop_standin(standin)
+
+def main():
+    parser = argparse.ArgumentParser(description='Verifica la reconexión y re-sincronización de SeboConnector')
+    parser.add_argument('--top20-rate', type=float, default=2.0,
+                       help='Emisiones de top_20_data por segundo del sustituto (default: 2)')
+    parser.add_argument('--downtime', type=float, default=2.0,
+                       help='Segundos que Sebo permanece caído (default: 2)')
+    parser.add_argument('--timeout', type=float, default=15.0,
+                       help='Segundos máximos de espera por comprobación (default: 15)')
+    parser.add_argument('--log-level', type=str, default='WARNING',
+                       help='Nivel de log de V3 (default: WARNING)')
+
+    args = parser.parse_args()
+    setup_logging(args.log_level)
+
+    result = asyncio.run(run_check(args))
+    print(json.dumps(result['connection'], indent=2, default=str))
+    print("RECONEXIÓN OK" if result['passed'] else "RECONEXIÓN FALLIDA")
+    return 0 if result['passed'] else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
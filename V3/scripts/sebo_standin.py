@@ -0,0 +1,381 @@
+#!/usr/bin/env python3
+# Simos/V3/sebo_standin.py
+
+"""
+Servidor sustituto de Sebo para pruebas de carga de V3 (sin Node ni MongoDB).
+Uso: python sebo_standin.py [opciones]
+
+Emite top_20_data y balances-update en el namespace Socket.IO de Sebo
+(/api/spot/arb) a la frecuencia y tamaño configurados, y responde las rutas
+REST que usan SeboConnector, SeboSymbolsAPI y AdvancedSimulationEngine.
+Por defecto escucha en los puertos de WEBSOCKET_URL y SEBO_API_BASE_URL, así
+V3 se conecta sin cambiar su configuración.
+"""
+
+import asyncio
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import urllib.parse
+from collections import Counter
+from typing import Dict, Any, List, Optional
+
+import socketio
+from aiohttp import web
+
+# Add the parent directory (V3) to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shared.config_v3 import WEBSOCKET_URL, SEBO_API_BASE_URL, SUPPORTED_EXCHANGES, MOCK_EXCHANGE_CONFIG
+from shared.utils import get_current_timestamp
+
+class SeboStandIn:
+    """Socket.IO + REST con el contrato que V3 espera de Sebo, con datos sintéticos."""
+
+    def __init__(self, args):
+        self.args = args
+        self.namespace = urllib.parse.urlparse(WEBSOCKET_URL).path or '/'
+        self.symbols: Dict[str, float] = dict(MOCK_EXCHANGE_CONFIG['symbols'])
+        self.exchanges: List[str] = list(SUPPORTED_EXCHANGES)
+        self.padding = 'x' * args.padding_bytes if args.padding_bytes else None
+
+        self.sio = socketio.AsyncServer(async_mode='aiohttp', cors_allowed_origins='*', logger=False, engineio_logger=False)
+        self.sio.on('connect', self._on_connect, namespace=self.namespace)
+        self.sio.on('disconnect', self._on_disconnect, namespace=self.namespace)
+
+        self.balances: Dict[str, Dict] = {
+            exchange_id: self._default_balance(exchange_id) for exchange_id in self.exchanges
+        }
+        self.latest_top20: List[Dict] = self._make_top20()
+        self.sandbox_transactions: Dict[str, Dict] = {}
+
+        self.clients = 0
+        self.stats = {
+            'events': Counter(),
+            'event_bytes': Counter(),
+            'rest_requests': Counter(),
+            'rest_errors': Counter(),
+            'started_at': get_current_timestamp()
+        }
+
+    # Datos sintéticos
+
+    def _default_balance(self, exchange_id: str) -> Dict:
+        return {
+            'id_exchange': exchange_id,
+            'balance_usdt': 1000.0,
+            'investment_mode': 'FIXED',
+            'investment_percentage': 10.0,
+            'fixed_investment_usdt': 100.0,
+            'stop_loss_percentage_global': 50.0,
+            'initial_capital_for_global_sl': 1000.0,
+            'timestamp': get_current_timestamp()
+        }
+
+    def _make_opportunity(self) -> Dict:
+        """Item con el formato que consumen create_symbol_dict y Top20DeltaTracker."""
+        symbol = random.choice(list(self.symbols))
+        buy_exchange, sell_exchange = random.sample(self.exchanges, 2)
+        buy_price = self.symbols[symbol] * random.uniform(0.995, 1.005)
+        difference = random.uniform(0.05, 3.0)
+        item = {
+            'analysis_id': f"standin-{random.getrandbits(40):010x}",
+            'symbol': symbol,
+            'symbol_name': symbol.split('/')[0],
+            'exchange_min_id': buy_exchange,
+            'exchange_min_name': buy_exchange.capitalize(),
+            'exchange_max_id': sell_exchange,
+            'exchange_max_name': sell_exchange.capitalize(),
+            'price_at_exMin_to_buy_asset': buy_price,
+            'price_at_exMax_to_sell_asset': buy_price * (1 + difference / 100),
+            'percentage_difference': f"{difference:.2f}%",
+            'fees_exMin': {'taker_fee': MOCK_EXCHANGE_CONFIG['taker_fee'], 'maker_fee': MOCK_EXCHANGE_CONFIG['maker_fee']},
+            'fees_exMax': {'taker_fee': MOCK_EXCHANGE_CONFIG['taker_fee'], 'maker_fee': MOCK_EXCHANGE_CONFIG['maker_fee']},
+            'timestamp': get_current_timestamp()
+        }
+        if self.padding:
+            item['padding'] = self.padding
+        return item
+
+    def _make_top20(self) -> List[Dict]:
+        return sorted(
+            (self._make_opportunity() for _ in range(self.args.top20_size)),
+            key=lambda item: -float(item['percentage_difference'].rstrip('%'))
+        )
+
+    def _next_top20(self) -> List[Dict]:
+        """Renueva una parte del Top 20 (como Sebo, la mayoría de filas se repite entre emisiones)."""
+        if random.random() < self.args.top20_churn:
+            index = random.randrange(len(self.latest_top20)) if self.latest_top20 else 0
+            self.latest_top20[index:index + 1] = [self._make_opportunity()]
+        for item in self.latest_top20:
+            if random.random() < self.args.top20_churn:
+                factor = 1 + random.gauss(0, 0.0005)
+                item['price_at_exMin_to_buy_asset'] *= factor
+                item['price_at_exMax_to_sell_asset'] *= factor
+                item['timestamp'] = get_current_timestamp()
+        return [dict(item) for item in self.latest_top20]
+
+    # Socket.IO
+
+    async def _on_connect(self, sid, environ, auth=None):
+        self.clients += 1
+        # Igual que Sebo: estado inicial al conectar
+        await self._emit('balances-update', self.balances[self.exchanges[0]], to=sid)
+        await self._emit('top_20_data', self.latest_top20, to=sid)
+
+    async def _on_disconnect(self, sid, *args):
+        self.clients -= 1
+
+    async def _emit(self, event: str, data: Any, to: Optional[str] = None):
+        self.stats['events'][event] += 1
+        if self.args.measure_bytes:
+            self.stats['event_bytes'][event] += len(json.dumps(data, separators=(',', ':')))
+        await self.sio.emit(event, data, namespace=self.namespace, to=to)
+
+    async def _emit_loop(self, event: str, rate: float, make_payload):
+        """Emite `burst` eventos por tick a `rate` ticks por segundo (calendario fijo)."""
+        if rate <= 0:
+            return
+        interval = 1.0 / rate
+        next_tick = time.perf_counter()
+        while True:
+            for _ in range(self.args.burst):
+                await self._emit(event, make_payload())
+            next_tick += interval
+            delay = next_tick - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            else:
+                next_tick = time.perf_counter()  # Atrasado: no intentar recuperar ticks perdidos
+                await asyncio.sleep(0)
+
+    def _next_balance(self) -> Dict:
+        exchange_id = random.choice(self.exchanges)
+        balance = self.balances[exchange_id]
+        balance['balance_usdt'] = round(max(0.0, balance['balance_usdt'] + random.uniform(-5, 5)), 4)
+        balance['timestamp'] = get_current_timestamp()
+        return dict(balance)
+
+    # REST
+
+    @web.middleware
+    async def _rest_middleware(self, request: web.Request, handler):
+        route = request.match_info.route.resource.canonical if request.match_info.route.resource else request.path
+        self.stats['rest_requests'][f"{request.method} {route}"] += 1
+        if self.args.rest_latency_ms:
+            await asyncio.sleep(max(0.0, random.gauss(self.args.rest_latency_ms, self.args.rest_latency_ms / 4)) / 1000)
+        if self.args.rest_error_rate and random.random() < self.args.rest_error_rate:
+            self.stats['rest_errors'][route] += 1
+            return web.json_response({'message': 'Error simulado del sustituto de Sebo'}, status=500)
+        return await handler(request)
+
+    async def get_balance(self, request: web.Request) -> web.Response:
+        exchange_id = request.match_info['exchange_id']
+        balance = self.balances.get(exchange_id)
+        if not balance:
+            return web.json_response({'message': 'Balance record not found for this exchange.'}, status=404)
+        return web.json_response(balance)
+
+    async def put_balance(self, request: web.Request) -> web.Response:
+        exchange_id = request.match_info['exchange_id']
+        payload = await request.json()
+        balance = {**self.balances.get(exchange_id, self._default_balance(exchange_id)), **payload}
+        balance['id_exchange'] = exchange_id
+        balance['timestamp'] = get_current_timestamp()
+        self.balances[exchange_id] = balance
+        await self._emit('balances-update', balance)
+        return web.json_response(balance)
+
+    async def get_withdrawal_fees(self, request: web.Request) -> web.Response:
+        currency = request.match_info['currency'].split('/')[0].upper()
+        price = self.symbols.get(f"{currency}/USDT", 1.0)
+        base_fee = MOCK_EXCHANGE_CONFIG['withdrawal_fee_usdt'] / price
+        return web.json_response({
+            'exchange': request.match_info['exchange_id'],
+            'currency': currency,
+            'networks': [
+                {'network': network, 'currency': currency, 'fee': base_fee * factor, 'precision': 8,
+                 'active': True, 'deposit': True, 'withdraw': True}
+                for network, factor in MOCK_EXCHANGE_CONFIG['withdrawal_networks'].items()
+            ]
+        })
+
+    async def get_top_opportunities(self, request: web.Request) -> web.Response:
+        limit = int(request.query.get('limit', self.args.top20_size))
+        return web.json_response(self.latest_top20[:limit])
+
+    async def get_last_spot_arb(self, request: web.Request) -> web.Response:
+        return web.json_response(self.latest_top20)
+
+    async def get_symbols(self, request: web.Request) -> web.Response:
+        return web.json_response([{'id_sy': symbol, 'name': symbol.split('/')[0]} for symbol in self.symbols])
+
+    async def get_symbol(self, request: web.Request) -> web.Response:
+        symbol_id = urllib.parse.unquote(request.match_info['symbol_id'])
+        if symbol_id not in self.symbols:
+            return web.json_response({'message': 'Symbol not found'}, status=404)
+        return web.json_response({'id_sy': symbol_id, 'name': symbol_id.split('/')[0]})
+
+    async def add_symbols_for_exchanges(self, request: web.Request) -> web.Response:
+        return web.json_response({'success': True, 'message': f"{len(self.symbols)} símbolos ya presentes (sustituto)"})
+
+    async def sandbox(self, request: web.Request) -> web.Response:
+        """Operaciones sandbox usadas por AdvancedSimulationEngine (withdraw/buy/transfer/sell)."""
+        endpoint = request.match_info['endpoint']
+        data = await request.json()
+        taker_fee = MOCK_EXCHANGE_CONFIG['taker_fee']
+
+        if endpoint == 'withdraw_usdt':
+            result = {'amount_received': max(0.0, data.get('amount', 0) - 1.0)}
+        elif endpoint == 'buy_asset':
+            price = self.symbols.get(data.get('symbol'), 1.0) * random.uniform(0.998, 1.002)
+            result = {'asset_amount': data.get('amount_usdt', 0) / price * (1 - taker_fee), 'price': price}
+        elif endpoint == 'transfer_asset':
+            result = {'received_amount': data.get('amount', 0) * 0.999}
+        elif endpoint == 'sell_asset':
+            price = self.symbols.get(data.get('symbol'), 1.0) * random.uniform(0.995, 1.015)
+            result = {'final_usdt': data.get('amount', 0) * price * (1 - taker_fee), 'price': price}
+        else:
+            return web.json_response({'success': False, 'message': f"Endpoint sandbox desconocido: {endpoint}"}, status=404)
+
+        self.sandbox_transactions[data.get('transaction_id', endpoint)] = {'endpoint': endpoint, **result}
+        return web.json_response({'success': True, 'transaction_id': data.get('transaction_id'), **result})
+
+    async def get_stats(self, request: web.Request) -> web.Response:
+        return web.json_response(self.get_stats_dict())
+
+    def get_stats_dict(self) -> Dict[str, Any]:
+        return {
+            'clients': self.clients,
+            'started_at': self.stats['started_at'],
+            'events': dict(self.stats['events']),
+            'event_bytes': dict(self.stats['event_bytes']),
+            'rest_requests': dict(self.stats['rest_requests']),
+            'rest_errors': dict(self.stats['rest_errors'])
+        }
+
+    def build_rest_app(self) -> web.Application:
+        api_prefix = urllib.parse.urlparse(SEBO_API_BASE_URL).path.rstrip('/')  # "/api"
+        app = web.Application(middlewares=[self._rest_middleware])
+        routes = [
+            web.get(f'{api_prefix}/balances/exchange/{{exchange_id}}', self.get_balance),
+            web.put(f'{api_prefix}/balances/exchange/{{exchange_id}}', self.put_balance),
+            web.get(f'{api_prefix}/exchanges/{{exchange_id}}/withdrawal-fees/{{currency:.+}}', self.get_withdrawal_fees),
+            web.get(f'{api_prefix}/spot/top-opportunities', self.get_top_opportunities),
+            web.get(f'{api_prefix}/spot/arb', self.get_last_spot_arb),
+            web.post(f'{api_prefix}/sandbox/{{endpoint}}', self.sandbox),
+            web.get('/standin/stats', self.get_stats)
+        ]
+        # SeboSymbolsAPI arma sus URLs como SEBO_API_BASE_URL + "/api/symbols": se atienden ambas rutas
+        for prefix in (api_prefix, f'{api_prefix}/api'):
+            routes += [
+                web.get(f'{prefix}/symbols', self.get_symbols),
+                web.post(f'{prefix}/symbols/add-for-exchanges', self.add_symbols_for_exchanges),
+                web.get(f'{prefix}/symbols/{{symbol_id:.+}}', self.get_symbol)
+            ]
+        app.add_routes(routes)
+        return app
+
+    def build_socket_app(self) -> web.Application:
+        app = web.Application()
+        self.sio.attach(app)
+        return app
+
+    async def run(self):
+        runners = []
+        socket_runner = web.AppRunner(self.build_socket_app(), access_log=None)
+        await socket_runner.setup()
+        await web.TCPSite(socket_runner, self.args.host, self.args.socket_port).start()
+        runners.append(socket_runner)
+
+        rest_runner = web.AppRunner(self.build_rest_app(), access_log=None)
+        await rest_runner.setup()
+        await web.TCPSite(rest_runner, self.args.host, self.args.rest_port).start()
+        runners.append(rest_runner)
+
+        print(f"Socket.IO: http://{self.args.host}:{self.args.socket_port} (namespace {self.namespace})")
+        print(f"REST:      http://{self.args.host}:{self.args.rest_port}{urllib.parse.urlparse(SEBO_API_BASE_URL).path}")
+        print(f"top_20_data: {self.args.top20_rate:g}/s x{self.args.burst}, {self.args.top20_size} items"
+              f"{f', +{self.args.padding_bytes} bytes por item' if self.args.padding_bytes else ''}; "
+              f"balances-update: {self.args.balance_rate:g}/s")
+
+        tasks = [
+            asyncio.create_task(self._emit_loop('top_20_data', self.args.top20_rate, self._next_top20)),
+            asyncio.create_task(self._emit_loop('balances-update', self.args.balance_rate, self._next_balance)),
+            asyncio.create_task(self._report_loop())
+        ]
+        try:
+            if self.args.duration:
+                await asyncio.sleep(self.args.duration)
+            else:
+                await asyncio.Event().wait()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            for runner in runners:
+                await runner.cleanup()
+            print(json.dumps(self.get_stats_dict(), indent=2))
+
+    async def _report_loop(self):
+        previous = Counter()
+        while True:
+            await asyncio.sleep(self.args.report_interval)
+            events = self.stats['events']
+            rates = {event: (count - previous[event]) / self.args.report_interval for event, count in events.items()}
+            previous = Counter(events)
+            print(f"[{get_current_timestamp()}] clientes {self.clients} | "
+                  + " | ".join(f"{event} {rate:.1f}/s" for event, rate in sorted(rates.items())))
+
+def main():
+    socket_url = urllib.parse.urlparse(WEBSOCKET_URL)
+    rest_url = urllib.parse.urlparse(SEBO_API_BASE_URL)
+
+    parser = argparse.ArgumentParser(description='Servidor sustituto de Sebo (Socket.IO + REST) para pruebas de carga')
+    parser.add_argument('--host', type=str, default='127.0.0.1',
+                       help='Interfaz de escucha (default: 127.0.0.1)')
+    parser.add_argument('--socket-port', type=int, default=socket_url.port or 3031,
+                       help=f'Puerto Socket.IO (default: el de WEBSOCKET_URL, {socket_url.port})')
+    parser.add_argument('--rest-port', type=int, default=rest_url.port or 3000,
+                       help=f'Puerto REST (default: el de SEBO_API_BASE_URL, {rest_url.port})')
+    parser.add_argument('--top20-rate', type=float, default=0.2,
+                       help='Emisiones de top_20_data por segundo (default: 0.2, como Sebo cada 5s)')
+    parser.add_argument('--top20-size', type=int, default=20,
+                       help='Items por emisión de top_20_data (default: 20)')
+    parser.add_argument('--top20-churn', type=float, default=0.3,
+                       help='Probabilidad de cambio por fila entre emisiones (default: 0.3)')
+    parser.add_argument('--balance-rate', type=float, default=0.1,
+                       help='Emisiones de balances-update por segundo (default: 0.1)')
+    parser.add_argument('--burst', type=int, default=1,
+                       help='Eventos emitidos juntos en cada tick (default: 1)')
+    parser.add_argument('--padding-bytes', type=int, default=0,
+                       help='Bytes de relleno por item para probar payloads grandes (default: 0)')
+    parser.add_argument('--rest-latency-ms', type=float, default=0.0,
+                       help='Latencia media añadida a cada respuesta REST (default: 0)')
+    parser.add_argument('--rest-error-rate', type=float, default=0.0,
+                       help='Proporción de respuestas REST con error 500 (default: 0)')
+    parser.add_argument('--measure-bytes', action='store_true',
+                       help='Contar el tamaño JSON de cada evento emitido')
+    parser.add_argument('--duration', type=float, default=0,
+                       help='Segundos antes de detenerse (default: 0 = hasta Ctrl+C)')
+    parser.add_argument('--report-interval', type=float, default=5.0,
+                       help='Segundos entre reportes de tasa (default: 5)')
+    parser.add_argument('--seed', type=int, default=None,
+                       help='Semilla de los datos sintéticos')
+
+    args = parser.parse_args()
+    if args.seed is not None:
+        random.seed(args.seed)
+
+    try:
+        asyncio.run(SeboStandIn(args).run())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,7 +2,6 @@
 
 import asyncio
 import logging
-import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 from typing import Dict, Any, List, Optional
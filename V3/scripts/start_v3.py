@@ -17,7 +17,7 @@ from pathlib import Path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from main_v3 import CryptoArbitrageV3
-from shared.config_v3 import SIMULATION_MODE
+from shared.config_v3 import SIMULATION_MODE, REPLAY_DEFAULT_SPEED
 
 def setup_signal_handlers(app):
     """Configura manejadores de señales para shutdown graceful."""
@@ -43,6 +43,14 @@ async def main():
                        help='Entrenar modelo automáticamente si no existe')
     parser.add_argument('--training-samples', type=int, default=1000,
                        help='Número de muestras para entrenamiento automático')
+    parser.add_argument('--replay', type=str, default=None,
+                       help='CSV grabado (ej: sebo/src/data/realData_*.csv) o directorio de grabación de Sebo a reproducir en lugar de conectar a Sebo')
+    parser.add_argument('--replay-speed', type=float, default=REPLAY_DEFAULT_SPEED,
+                       help='Factor de velocidad del replay (0 = tan rápido como sea posible)')
+    parser.add_argument('--replay-no-trading', action='store_true',
+                       help='En replay, no activar el trading simulado (solo mide la cadena de callbacks)')
+    parser.add_argument('--profile', action='store_true',
+                       help='Perfilar el event loop: lag, callbacks lentos y stacks colapsados (logs/profiles)')
     
     args = parser.parse_args()
     
@@ -52,6 +60,8 @@ async def main():
     print(f"Modo: {'SIMULACIÓN' if args.simulation or SIMULATION_MODE else 'REAL'}")
     print(f"Puerto WebSocket: {args.port}")
     print(f"Nivel de log: {args.log_level}")
+    if args.profile:
+        print("Profiler del event loop: ACTIVO")
     
     # Crear directorios necesarios
     directories = ['logs', 'data', 'models']
@@ -61,7 +71,7 @@ async def main():
     
     try:
         # Crear aplicación
-        app = CryptoArbitrageV3()
+        app = CryptoArbitrageV3(profile=args.profile)
         
         # Configurar manejadores de señales
         setup_signal_handlers(app)
@@ -69,6 +79,8 @@ async def main():
         # Entrenamiento automático si se solicita
         if args.auto_train:
             print("\nVerificando modelo de IA...")
+            app.ai_model.start_background_load()
+            await app.ai_model.wait_until_loaded()
             if not app.ai_model.is_trained:
                 print("Modelo no entrenado. Iniciando entrenamiento automático...")
                 
@@ -90,6 +102,26 @@ async def main():
         print("\nInicializando componentes...")
         await app.initialize()
         
+        # Modo replay: alimentar el pipeline con snapshots grabados
+        if args.replay:
+            print(f"Reproduciendo {args.replay} (velocidad: {args.replay_speed or 'máxima'})...")
+            stats = await app.run_replay(args.replay, speed=args.replay_speed, trade=not args.replay_no_trading)
+            print("\n" + "="*60)
+            print("REPLAY COMPLETADO")
+            print("="*60)
+            print(f"Snapshots enviados: {stats['snapshots_sent']} ({stats['items_sent']} items)")
+            print(f"Duración: {stats['duration_seconds']:.2f}s ({stats['snapshots_per_second']:.1f} snapshots/s)")
+            latency = stats['latency_ms']
+            print(f"Latencia end-to-end (ms): p50={latency['p50']:.2f} p95={latency['p95']:.2f} "
+                  f"p99={latency['p99']:.2f} max={stats['max_latency_ms']:.2f}")
+            if stats.get('opportunity_pipeline'):
+                print(f"Pipeline: {stats['opportunity_pipeline']['items']}")
+            trading = stats['trading']
+            print(f"Decisiones de TradingLogic: {trading['decisions']['outcomes']}")
+            print(f"Operaciones simuladas: {trading['operations_count']} "
+                  f"(exitosas: {trading['successful_operations']}, ganancia: {trading['total_profit_usdt']:.2f} USDT)")
+            return 0
+        
         # Iniciar aplicación
         print("Iniciando V3...")
         started = await app.start()
@@ -101,6 +133,10 @@ async def main():
         print("\n" + "="*60)
         print("V3 INICIADO CORRECTAMENTE")
         print("="*60)
+        startup = app.startup.get_report()
+        print(f"Listo en {startup['ready_ms']:.0f} ms")
+        for phase, ms in startup['phases_ms'].items():
+            print(f"  {phase:<20} {ms:>8.0f} ms")
         print("Presiona Ctrl+C para detener")
         print("="*60)
         
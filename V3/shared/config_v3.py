@@ -17,6 +17,7 @@ API_KEYS = {
 # Poner a True para operar contra los testnets/sandboxes de los exchanges.
 # Se deben configurar las SANDBOX_API_KEYS correspondientes.
 EXCHANGE_SANDBOX_MODE = False # O True para pruebas en sandbox
+EXCHANGE_BACKEND = "ccxt"  # "mock" para usar MockExchange (pruebas de carga sin exchanges reales)
 DATA_DIR ='./data'
 SANDBOX_API_KEYS = {
     "BINANCE_API_KEY": "your_binance_testnet_api_key", # Binance Testnet
@@ -47,6 +48,8 @@ MIN_OPERATIONAL_USDT = 10.0  # Balance mínimo para operar
 AI_MODEL_PATH = "models/arbitrage_model.pkl"
 AI_TRAINING_DATA_PATH = "data/training_data.csv"
 AI_CONFIDENCE_THRESHOLD = 0.7  # Umbral de confianza para ejecutar operaciones
+SYNTHETIC_DATA_CHUNK_ROWS = 100000  # Filas por bloque al generar datasets sintéticos
+SYNTHETIC_DATA_FORMATS = ("csv", "parquet")  # Formatos de dataset soportados (parquet requiere pyarrow)
 
 # Parámetros de trading
 DEFAULT_INVESTMENT_MODE = "PERCENTAGE"  # "FIXED" o "PERCENTAGE"
@@ -109,14 +112,192 @@ ADVANCED_SIMULATION_CONFIG = {
     }
 }
 
+# Configuración de replay de snapshots Top 20 grabados
+REPLAY_DEFAULT_SPEED = 1.0  # Factor de velocidad (0 = tan rápido como sea posible)
+REPLAY_DEFAULT_INTERVAL_SECONDS = 5.0  # Intervalo entre snapshots cuando el archivo no trae timestamps (Sebo emite cada 5s)
+REPLAY_SNAPSHOT_SIZE = 20  # Elementos por snapshot reproducido
+
+# Grabación de eventos Socket.IO de Sebo (para replay y backtests)
+SEBO_RECORDING_ENABLED = False  # True para grabar todos los eventos entrantes de Sebo
+SEBO_RECORDING_DIR = "data/recordings"
+SEBO_RECORDING_MAX_SEGMENT_MB = 64  # Rotar el segmento al superar este tamaño
+SEBO_RECORDING_MAX_SEGMENT_SECONDS = 3600  # Rotar el segmento cada hora
+SEBO_RECORDING_MAX_SEGMENTS = 168  # Segmentos a conservar (0 = sin límite)
+SEBO_RECORDING_QUEUE_SIZE = 10000  # Eventos pendientes de escribir antes de descartar nuevos
+SEBO_RECORDING_MAX_BATCH = 256  # Eventos escritos por flush del hilo de grabación
+
+# Ingesta de eventos Sebo: cola acotada entre Socket.IO y los consumidores
+SEBO_INGEST_QUEUE_SIZE = 1000  # Eventos pendientes antes de descartar el más antiguo
+SEBO_INGEST_LATEST_WINS_EVENTS = ["top_20_data", "balances-update"]  # Snapshots: solo importa el último
+SEBO_INGEST_LATENCY_SAMPLES = 1000  # Muestras recientes para percentiles de espera/proceso
+
+# Trazas de latencia por oportunidad (evento Sebo -> decisión -> notificación UI)
+TRACE_SAMPLE_SIZE = 1000  # Muestras recientes por etapa para calcular percentiles
+TRACE_RECENT_TRACES = 200  # Trazas completas que se conservan para exportar
+TRACE_EXPORT_FILE = "logs/latency_traces.json"  # Se escribe al detener V3
+
+# Métricas del runtime expuestas en formato Prometheus (GET /metrics)
+METRICS_ENABLED = True
+METRICS_HOST = "127.0.0.1"  # Solo local; exponer detrás de un proxy si se scrapea desde fuera
+METRICS_PORT = 9108
+METRICS_LATENCY_BUCKETS_SECONDS = [0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30]
+
+# Pipeline Top 20 -> TradingLogic (core/opportunity_pipeline.py)
+OPPORTUNITY_PIPELINE_ENABLED = True
+OPPORTUNITY_PIPELINE_MAX_CONCURRENT = 1  # TradingLogic ejecuta una operación a la vez
+OPPORTUNITY_PIPELINE_MAX_PENDING = 5  # Mejores entradas de cada snapshot que quedan en espera
+OPPORTUNITY_PIPELINE_MIN_NET_EDGE_PCT = 0.0  # Edge neto mínimo (% tras fees) para entrar a la cola
+OPPORTUNITY_PIPELINE_DEFAULT_TAKER_FEE = 0.001  # Fee de trading supuesto si Sebo no lo envía
+OPPORTUNITY_PIPELINE_REFERENCE_NOTIONAL_USDT = 50.0  # Monto para pasar el fee de retiro a porcentaje
+
+# Frescura de oportunidades: edad máxima al entrar a cada etapa y acción si se supera
+# ("drop" descarta; "reprice" vuelve a pedir precios a los exchanges y a consultar la IA).
+# queue/validate/market_data miden la edad de la oportunidad desde la llegada del evento de
+# Sebo; execute mide la edad de los precios desde que V3 recibió los tickers en market_data.
+# El "timestamp" de cada item del Top 20 es la hora del registro Analysis en Sebo, no la de
+# la emisión (cada 5s): un par no re-analizado justo antes de emitir llega con varios segundos
+# y se descartaría en queue. Activar USE_SOURCE_TIMESTAMP solo si Sebo re-analiza en cada
+# emisión; el replay de datos grabados lo ignora siempre (sus timestamps son históricos).
+OPPORTUNITY_FRESHNESS_ENABLED = True
+OPPORTUNITY_FRESHNESS_USE_SOURCE_TIMESTAMP = False  # True: la edad es también now - timestamp del item (la mayor)
+OPPORTUNITY_FRESHNESS_MAX_REPRICES = 1  # Re-cotizaciones por oportunidad antes de descartarla
+OPPORTUNITY_FRESHNESS_POLICY = {
+    "queue": {"max_age_ms": 6000, "action": "drop"},
+    "validate": {"max_age_ms": 8000, "action": "drop"},
+    "market_data": {"max_age_ms": 10000, "action": "drop"},
+    "execute": {"max_age_ms": 2000, "action": "reprice"},
+}
+
+# Profiler del event loop (--profile en main_v3.py / scripts/start_v3.py)
+PROFILER_SAMPLE_INTERVAL = 0.01  # Segundos entre muestras de stacks (hilo de muestreo)
+PROFILER_LAG_INTERVAL = 0.1  # Segundos entre mediciones de lag del event loop
+PROFILER_LAG_SAMPLES = 3000  # Mediciones de lag recientes para percentiles (~5 min)
+PROFILER_SLOW_CALLBACK_MS = 50  # Callbacks que bloquean el loop más que esto se registran
+PROFILER_MAX_SLOW_CALLBACKS = 500  # Callbacks lentos recientes que se conservan
+PROFILER_MAX_STACK_DEPTH = 64  # Frames por stack muestreado
+PROFILER_OUTPUT_DIR = "logs/profiles"  # Stacks colapsados (flamegraph.pl / speedscope) y resumen JSON
+
+# Exchange simulado (EXCHANGE_BACKEND = "mock", scripts/load_test.py)
+MOCK_EXCHANGE_CONFIG = {
+    "latency_ms": 20,                   # Latencia media por llamada
+    "latency_jitter_ms": 8,             # Desviación estándar de la latencia
+    "tail_latency_ms": 250,             # Latencia extra de las llamadas lentas
+    "tail_probability": 0.01,           # Proporción de llamadas lentas
+    "error_rate": 0.01,                 # Proporción de llamadas que fallan con error de red
+    "rate_limit_per_second": 50,        # Llamadas por segundo por exchange (0 = sin límite)
+    "rate_limit_burst": 100,            # Ráfaga máxima antes de aplicar el límite
+    "order_book_depth": 50,             # Niveles por lado del order book
+    "order_book_level_usdt": 5000,      # Liquidez aproximada por nivel
+    "spread_bps": 4,                    # Spread bid/ask
+    "price_volatility_bps": 2,          # Paso del paseo aleatorio de precios por lectura
+    "exchange_price_dispersion_bps": 60,  # Desvío máximo de precio entre exchanges
+    "taker_fee": 0.001,
+    "maker_fee": 0.001,
+    "withdrawal_fee_usdt": 1.0,         # Tarifa de retiro equivalente en USDT (red más cara)
+    "withdrawal_networks": {"TRC20": 1.0, "BSC": 0.3, "ERC20": 5.0},  # Factor sobre la tarifa base
+    "initial_balances": {"USDT": 100000.0},
+    "symbols": {
+        "BTC/USDT": 45000, "ETH/USDT": 3000, "BNB/USDT": 300, "ADA/USDT": 0.5, "SOL/USDT": 100,
+        "XRP/USDT": 0.6, "DOT/USDT": 7, "AVAX/USDT": 40, "MATIC/USDT": 1.2, "LINK/USDT": 15
+    }
+}
+
+# Benchmarks del camino de decisión (scripts/benchmark.py)
+BENCHMARK_RESULTS_DIR = "data/benchmarks"  # Un JSON por ejecución, comparado con la anterior
+BENCHMARK_REGRESSION_THRESHOLD = 0.20  # Un caso es regresión si su p50 empeora más de un 20%
+
 # Configuración de persistencia
 TRADING_STATE_FILE = "data/trading_state.json"
 BALANCE_CACHE_FILE = "data/balance_cache.json"
 
 # Configuración de red y timeouts
 REQUEST_TIMEOUT = 30  # Timeout para requests HTTP en segundos
-WEBSOCKET_RECONNECT_DELAY = 5  # Delay para reconexión de WebSocket
-MAX_RECONNECT_ATTEMPTS = 10  # Máximo número de intentos de reconexión
+HTTP_POOL_LIMIT = 100  # Conexiones simultáneas totales del cliente HTTP compartido
+HTTP_POOL_LIMIT_PER_HOST = 20  # Conexiones simultáneas por host (Sebo es un único host)
+HTTP_DNS_CACHE_TTL = 300  # Segundos que se cachea la resolución DNS
+HTTP_KEEPALIVE_TIMEOUT = 60  # Segundos que una conexión ociosa se mantiene abierta para reutilizarla
+HTTP_LATENCY_BUCKETS_MS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000]  # Histograma de latencia
+WEBSOCKET_RECONNECT_DELAY = 1  # Delay base (s) del backoff exponencial de reconexión a Sebo
+WEBSOCKET_RECONNECT_MAX_DELAY = 30  # Tope (s) del backoff de reconexión
+MAX_RECONNECT_ATTEMPTS = 10  # Intentos con backoff creciente; luego se sigue reintentando en el tope
+SEBO_RESYNC_TOP_OPPORTUNITIES = 20  # Oportunidades pedidas por REST al reconectar para rellenar el cache
+EXCHANGE_INIT_TIMEOUT = 15  # Segundos por exchange para crear la instancia y cargar markets al arrancar
+EXCHANGE_INIT_LOAD_MARKETS = True  # Un exchange está listo cuando sus markets están cargados
+EXCHANGE_INIT_RETRY_DELAY = 5  # Delay base (s) del backoff de reintento de exchanges no listos
+EXCHANGE_INIT_RETRY_MAX_DELAY = 120  # Tope (s) del backoff de reintento
+
+# Coalescencia de peticiones idénticas concurrentes (single-flight): TTL en segundos del
+# resultado cacheado (0 = solo se comparten las peticiones que coinciden en el tiempo)
+SINGLE_FLIGHT_TTLS = {
+    "withdrawal_fees": 300,  # Las tarifas de retiro cambian muy poco
+    "balance_config": 0,     # Se invalida además al actualizarla
+    "ticker": 1.0            # Precios: solo se reutilizan durante un segundo
+}
+
+# Envío a clientes UI (una cola acotada por cliente)
+UI_CLIENT_QUEUE_SIZE = 256  # Mensajes pendientes por cliente antes de descartar el más antiguo
+UI_CLIENT_MAX_DROPS_BEFORE_EVICT = 512  # Descartes sin un envío exitoso antes de desalojar al cliente
+UI_COALESCE_MESSAGE_TYPES = ["top20_data", "balance_update"]  # Solo importa el último valor pendiente
+
+# Frecuencia máxima de difusión por tipo de mensaje (se envía el último valor de cada ventana).
+# max_hz None = sin límite; on_change = omitir valores iguales al último enviado
+UI_MESSAGE_RATE_POLICIES = {
+    "top20_data": {"max_hz": 4},
+    "balance_update": {"max_hz": None, "on_change": True},
+    "ai_training_update": {"max_hz": 2},
+    "ai_test_update": {"max_hz": 2},
+    "dataset_creation_update": {"max_hz": 2}
+}
+# Frecuencia máxima por cliente (Hz) para tipos que ocupan un único lugar en su cola
+UI_CLIENT_RATE_LIMITS = {
+    "top20_data": 4,
+    "top20_delta": 4,
+    "balance_update": 2
+}
+
+# Transporte WebSocket UI. permessage-deflate se negocia con todo cliente que lo ofrezca
+# (los navegadores siempre lo ofrecen); la codificación MessagePack es opt-in por subprotocolo.
+UI_WEBSOCKET_COMPRESSION_ENABLED = True
+UI_WEBSOCKET_DEFLATE_OPTIONS = {
+    "server_max_window_bits": 12,  # Ventana de 4 KiB: buena relación memoria/compresión por conexión
+    "compress_settings": {"memLevel": 5, "level": 6}
+}
+# Subprotocolo -> codificación de los frames enviados al cliente (en orden de preferencia)
+UI_WEBSOCKET_SUBPROTOCOLS = {
+    "simos.msgpack.v1": "msgpack",
+    "simos.json.v1": "json"
+}
+UI_COMPRESSION_SAMPLE_EVERY = 20  # Cada cuántos frames se estima la relación de deflate por conexión
+
+# Tópicos de suscripción de la UI: tipo de mensaje -> tópico. Los tipos sin tópico
+# (initial_state, heartbeat, pong, subscriptions...) se envían siempre a todos.
+# Al conectar, cada cliente queda suscrito a todos los tópicos.
+UI_MESSAGE_TOPICS = {
+    "top20_data": "top20",
+    "top20_delta": "top20",
+    "balance_update": "balances",
+    "operation_result": "trading",
+    "trading_status_change": "trading",
+    "trading_stats": "trading",
+    "ai_training_update": "training",
+    "ai_test_update": "training",
+    "dataset_creation_update": "training",
+    "ai_model_details": "training",
+    "training_result": "training",
+    "csv_creation_result": "training",
+    "simulation_started": "simulation",
+    "simulation_stopped": "simulation",
+    "simulation_progress": "simulation",
+    "simulation_complete": "simulation",
+    "simulation_error": "simulation",
+    "simulation_result": "simulation",
+    "transaction_update": "simulation",
+    "system_health": "system",
+    "system_status": "system",
+    "log_message": "system",
+    "data_export_result": "system"
+}
+UI_TOPICS = sorted(set(UI_MESSAGE_TOPICS.values()))
 
 # Configuración de exchanges soportados
 SUPPORTED_EXCHANGES = [
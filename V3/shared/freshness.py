@@ -0,0 +1,105 @@
+# Simos/V3/shared/freshness.py
+
+import logging
+import time
+from collections import Counter
+from typing import Dict, Any, Optional
+
+from shared.config_v3 import (
+    OPPORTUNITY_FRESHNESS_ENABLED, OPPORTUNITY_FRESHNESS_USE_SOURCE_TIMESTAMP,
+    OPPORTUNITY_FRESHNESS_MAX_REPRICES, OPPORTUNITY_FRESHNESS_POLICY
+)
+from shared.utils import parse_timestamp
+from shared.tracing import OpportunityTrace
+from shared.metrics import registry
+
+OPPORTUNITIES_EXPIRED = registry.counter(
+    "simos_opportunities_expired", "Oportunidades que superaron la edad máxima de una etapa", ["stage", "action"]
+)
+OPPORTUNITY_AGE_SECONDS = registry.histogram(
+    "simos_opportunity_age_seconds", "Edad de la oportunidad (o de sus precios) al entrar a cada etapa", ["stage"]
+)
+
+ACTIONS = ("drop", "reprice")
+
+class FreshnessPolicy:
+    """
+    Edad máxima por etapa de una oportunidad y qué hacer cuando se supera.
+
+    La edad de la oportunidad es el tiempo desde la llegada del evento de Sebo
+    (origen de la traza); con use_source_timestamp, la mayor entre esa y el
+    tiempo desde el timestamp que trae la propia entrada del Top 20. La etapa
+    "execute" controla en cambio la edad de los precios desde que V3 recibió
+    los tickers en market_data.
+    """
+
+    def __init__(self, policy: Dict[str, Dict[str, Any]] = None,
+                 enabled: bool = OPPORTUNITY_FRESHNESS_ENABLED,
+                 use_source_timestamp: bool = OPPORTUNITY_FRESHNESS_USE_SOURCE_TIMESTAMP,
+                 max_reprices: int = OPPORTUNITY_FRESHNESS_MAX_REPRICES):
+        self.logger = logging.getLogger('V3.FreshnessPolicy')
+        self.enabled = enabled
+        self.use_source_timestamp = use_source_timestamp
+        self.max_reprices = max(0, max_reprices)
+        self.limits: Dict[str, Dict[str, Any]] = {}
+
+        for stage, limit in (policy if policy is not None else OPPORTUNITY_FRESHNESS_POLICY).items():
+            action = limit.get("action", "drop")
+            if action not in ACTIONS:
+                self.logger.warning(f"Acción de frescura desconocida para {stage}: {action}; se usa 'drop'")
+                action = "drop"
+            self.limits[stage] = {"max_age_ms": float(limit["max_age_ms"]), "action": action}
+
+        self.expired: Counter = Counter()  # (etapa, acción) -> oportunidades vencidas
+        self.checked: Counter = Counter()  # etapa -> controles realizados
+
+    def opportunity_age_ms(self, trace: OpportunityTrace, source_timestamp: Any = None) -> float:
+        """Edad (ms) de la oportunidad: desde la llegada del evento o desde su timestamp de origen."""
+        age_ms = (time.perf_counter() - trace.origin) * 1000
+        if self.use_source_timestamp:
+            source_ts = parse_timestamp(source_timestamp)
+            if source_ts is not None:
+                age_ms = max(age_ms, (time.time() - source_ts) * 1000)
+        return max(0.0, age_ms)
+
+    @staticmethod
+    def quote_age_ms(quoted_at: float) -> float:
+        """Edad (ms) de una cotización a partir de su momento (epoch en segundos)."""
+        return max(0.0, (time.time() - quoted_at) * 1000)
+
+    def check(self, stage: str, age_ms: float, trace: OpportunityTrace = None) -> Optional[str]:
+        """
+        Controla la edad al entrar a una etapa.
+
+        Retorna None si el dato sigue fresco (o la etapa no tiene límite) y la
+        acción configurada ("drop" o "reprice") si está vencido.
+        """
+        limit = self.limits.get(stage)
+        if not self.enabled or limit is None:
+            return None
+
+        self.checked[stage] += 1
+        OPPORTUNITY_AGE_SECONDS.observe(age_ms / 1000, stage=stage)
+        if trace is not None:
+            trace.ages[stage] = age_ms
+
+        if age_ms <= limit["max_age_ms"]:
+            return None
+
+        action = limit["action"]
+        self.expired[(stage, action)] += 1
+        OPPORTUNITIES_EXPIRED.inc(stage=stage, action=action)
+        symbol = trace.symbol if trace is not None else "N/A"
+        self.logger.info(f"Oportunidad {symbol} vencida en {stage}: {age_ms:.0f}ms > "
+                         f"{limit['max_age_ms']:.0f}ms ({action})")
+        return action
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Límites configurados, controles y vencimientos por etapa y acción."""
+        return {
+            "enabled": self.enabled,
+            "limits": self.limits,
+            "max_reprices": self.max_reprices,
+            "checked": dict(self.checked),
+            "expired": {f"{stage}:{action}": count for (stage, action), count in self.expired.items()}
+        }
@@ -0,0 +1,275 @@
+# Simos/V3/shared/profiler.py
+
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+from collections import deque, Counter
+from typing import Dict, Any, Optional
+
+from shared.config_v3 import (
+    PROFILER_SAMPLE_INTERVAL, PROFILER_LAG_INTERVAL, PROFILER_LAG_SAMPLES, PROFILER_SLOW_CALLBACK_MS,
+    PROFILER_MAX_SLOW_CALLBACKS, PROFILER_MAX_STACK_DEPTH, PROFILER_OUTPUT_DIR
+)
+from shared.metrics import registry
+from shared.utils import calculate_percentiles, get_current_timestamp, save_json_file
+
+LOOP_LAG_SECONDS = registry.histogram(
+    "simos_event_loop_lag_seconds", "Retraso entre la ejecución programada y la real de un callback del loop"
+)
+SLOW_CALLBACKS = registry.counter(
+    "simos_event_loop_slow_callbacks", "Callbacks que bloquearon el event loop más que el umbral del profiler"
+)
+
+_V3_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Handle._run original; mientras un profiler está activo se reemplaza por una versión cronometrada
+_original_handle_run = asyncio.events.Handle._run
+_active_profiler: Optional['EventLoopProfiler'] = None
+
+def _timed_handle_run(handle):
+    profiler = _active_profiler
+    if profiler is None:
+        return _original_handle_run(handle)
+    current = [handle, time.perf_counter(), None]  # handle, inicio, stacks muestreados mientras bloquea
+    profiler._current = current
+    try:
+        return _original_handle_run(handle)
+    finally:
+        profiler._current = None
+        elapsed = time.perf_counter() - current[1]
+        if elapsed * 1000 >= profiler.slow_callback_ms:
+            profiler._record_slow_callback(handle, elapsed, current[2])
+
+def _frame_label(code) -> str:
+    filename = code.co_filename
+    if filename.startswith(_V3_ROOT):
+        filename = os.path.relpath(filename, _V3_ROOT)
+    else:
+        filename = os.path.basename(filename)
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+def _describe_callback(handle) -> Dict[str, Any]:
+    """Nombre legible del callback: la corrutina (y a qué espera) si es un paso de una Task."""
+    callback = getattr(handle, '_callback', None)
+    task = getattr(callback, '__self__', None)
+    if isinstance(task, asyncio.Task):
+        coro = task.get_coro()
+        chain = []
+        while coro is not None and len(chain) < 8:
+            chain.append(getattr(coro, '__qualname__', type(coro).__name__))
+            coro = getattr(coro, 'cr_await', None) or getattr(coro, 'gi_yieldfrom', None)
+        return {'callback': chain[0] if chain else repr(task), 'task': task.get_name(), 'awaiting': chain[1:]}
+    name = getattr(callback, '__qualname__', None) or repr(callback)
+    return {'callback': name, 'task': None, 'awaiting': []}
+
+class EventLoopProfiler:
+    """
+    Profiler de muestreo del event loop para producción (modo --profile).
+
+    - Lag del loop: una tarea duerme PROFILER_LAG_INTERVAL y mide cuánto tarde despierta.
+    - Callbacks lentos: cada callback del loop se cronometra; los que superan el umbral
+      se guardan con el nombre de su corrutina y el stack donde estaba bloqueado.
+    - Stacks: un hilo toma sys._current_frames() cada PROFILER_SAMPLE_INTERVAL y acumula
+      stacks colapsados (formato de flamegraph.pl / speedscope) de todos los hilos.
+    """
+
+    def __init__(self, sample_interval: float = PROFILER_SAMPLE_INTERVAL,
+                 lag_interval: float = PROFILER_LAG_INTERVAL,
+                 slow_callback_ms: float = PROFILER_SLOW_CALLBACK_MS,
+                 output_dir: str = PROFILER_OUTPUT_DIR):
+        self.logger = logging.getLogger('V3.EventLoopProfiler')
+        self.sample_interval = sample_interval
+        self.lag_interval = lag_interval
+        self.slow_callback_ms = slow_callback_ms
+        self.output_dir = output_dir
+
+        self._lock = threading.Lock()
+        self._stacks: Counter = Counter()  # Todas las muestras, por hilo
+        self._blocking_stacks: Counter = Counter()  # Muestras del loop dentro de un callback lento
+        self._lag_ms: deque = deque(maxlen=PROFILER_LAG_SAMPLES)
+        self._max_lag_ms = 0.0
+        self._slow_callbacks: deque = deque(maxlen=PROFILER_MAX_SLOW_CALLBACKS)
+        self._slow_by_callback: Dict[str, Dict[str, float]] = {}
+        self._samples = 0
+        self._current: Optional[list] = None
+
+        self._loop_thread_id: Optional[int] = None
+        self._stop_event = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+        self._lag_task: Optional[asyncio.Task] = None
+        self.started_at: Optional[str] = None
+
+    @property
+    def is_running(self) -> bool:
+        return self._sampler is not None
+
+    def start(self):
+        """Inicia el profiler sobre el loop en ejecución (llamar desde una corrutina)."""
+        global _active_profiler
+        if self.is_running:
+            return
+        if _active_profiler is not None:
+            self.logger.warning("Ya hay un profiler del event loop activo")
+            return
+
+        self._loop_thread_id = threading.get_ident()
+        _active_profiler = self
+        asyncio.events.Handle._run = _timed_handle_run
+
+        self._stop_event.clear()
+        self._sampler = threading.Thread(target=self._sample_loop, name='v3-profiler-sampler', daemon=True)
+        self._sampler.start()
+        self._lag_task = asyncio.get_running_loop().create_task(self._measure_lag())
+        self.started_at = get_current_timestamp()
+        self.logger.info(f"Profiler del event loop activo (muestreo cada {self.sample_interval * 1000:g}ms, "
+                         f"callbacks lentos >= {self.slow_callback_ms:g}ms)")
+
+    def stop(self):
+        """Detiene el muestreo y restaura Handle._run; los datos acumulados se conservan."""
+        global _active_profiler
+        if not self.is_running:
+            return
+        if _active_profiler is self:
+            asyncio.events.Handle._run = _original_handle_run
+            _active_profiler = None
+        if self._lag_task:
+            self._lag_task.cancel()
+            self._lag_task = None
+        self._stop_event.set()
+        self._sampler.join(timeout=1)
+        self._sampler = None
+        self.logger.info("Profiler del event loop detenido")
+
+    # Medición
+
+    async def _measure_lag(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.lag_interval
+            await asyncio.sleep(self.lag_interval)
+            lag = max(0.0, loop.time() - expected)
+            self._lag_ms.append(lag * 1000)
+            self._max_lag_ms = max(self._max_lag_ms, lag * 1000)
+            LOOP_LAG_SECONDS.observe(lag)
+
+    def _sample_loop(self):
+        own_id = threading.get_ident()
+        while not self._stop_event.wait(self.sample_interval):
+            try:
+                self._take_sample(own_id)
+            except Exception as e:
+                self.logger.error(f"Error muestreando stacks: {e}")
+
+    def _take_sample(self, own_id: int):
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        current = self._current
+        blocking = (current is not None
+                    and (time.perf_counter() - current[1]) * 1000 >= self.slow_callback_ms)
+
+        with self._lock:
+            self._samples += 1
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                labels = []
+                while frame is not None and len(labels) < PROFILER_MAX_STACK_DEPTH:
+                    labels.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                labels.append(names.get(thread_id, f"thread-{thread_id}"))
+                stack = ';'.join(reversed(labels))
+                self._stacks[stack] += 1
+
+                if blocking and thread_id == self._loop_thread_id:
+                    self._blocking_stacks[stack] += 1
+                    if current[2] is None:
+                        current[2] = Counter()
+                    current[2][stack] += 1
+
+    def _record_slow_callback(self, handle, elapsed: float, stacks: Optional[Counter]):
+        try:
+            description = _describe_callback(handle)
+        except Exception:
+            description = {'callback': repr(handle), 'task': None, 'awaiting': []}
+
+        elapsed_ms = elapsed * 1000
+        blocked_at = stacks.most_common(1)[0][0] if stacks else None
+        self._slow_callbacks.append({
+            **description,
+            'duration_ms': round(elapsed_ms, 3),
+            'blocked_at': blocked_at,
+            'timestamp': get_current_timestamp()
+        })
+        summary = self._slow_by_callback.setdefault(
+            description['callback'], {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0}
+        )
+        summary['count'] += 1
+        summary['total_ms'] += elapsed_ms
+        summary['max_ms'] = max(summary['max_ms'], elapsed_ms)
+        SLOW_CALLBACKS.inc()
+        self.logger.warning(f"Callback lento en el event loop: {description['callback']} ({elapsed_ms:.1f}ms)")
+
+    # Resultados
+
+    def get_stats(self, top: int = 10) -> Dict[str, Any]:
+        """Lag del loop, callbacks lentos más costosos y stacks más bloqueantes."""
+        lag = list(self._lag_ms)
+        with self._lock:
+            top_blocking = self._blocking_stacks.most_common(top)
+            samples = self._samples
+        slowest = sorted(self._slow_by_callback.items(), key=lambda item: -item[1]['total_ms'])[:top]
+        return {
+            'running': self.is_running,
+            'started_at': self.started_at,
+            'samples': samples,
+            'loop_lag_ms': {
+                **{key: round(value, 3) for key, value in calculate_percentiles(lag).items()},
+                'max': round(self._max_lag_ms, 3)
+            },
+            'slow_callbacks': sum(summary['count'] for summary in self._slow_by_callback.values()),
+            'slowest_callbacks': [
+                {'callback': name, 'count': summary['count'], 'total_ms': round(summary['total_ms'], 3),
+                 'max_ms': round(summary['max_ms'], 3)}
+                for name, summary in slowest
+            ],
+            'top_blocking_stacks': [{'stack': stack, 'samples': count} for stack, count in top_blocking]
+        }
+
+    def dump(self, reason: str = "manual") -> Dict[str, Any]:
+        """
+        Escribe los stacks colapsados y un resumen JSON en PROFILER_OUTPUT_DIR.
+
+        <prefijo>.collapsed contiene todas las muestras y <prefijo>.blocking.collapsed solo las
+        tomadas mientras un callback bloqueaba el loop; ambos se abren con flamegraph.pl o speedscope.
+        """
+        try:
+            os.makedirs(self.output_dir, exist_ok=True)
+            prefix = os.path.join(self.output_dir, f"profile_{time.strftime('%Y%m%d_%H%M%S')}_{reason}")
+            with self._lock:
+                stacks = dict(self._stacks)
+                blocking = dict(self._blocking_stacks)
+
+            files = {'stacks': f"{prefix}.collapsed", 'blocking_stacks': f"{prefix}.blocking.collapsed",
+                     'summary': f"{prefix}.json"}
+            self._write_collapsed(files['stacks'], stacks)
+            self._write_collapsed(files['blocking_stacks'], blocking)
+            save_json_file({
+                **self.get_stats(top=50),
+                'reason': reason,
+                'dumped_at': get_current_timestamp(),
+                'recent_slow_callbacks': list(self._slow_callbacks)
+            }, files['summary'])
+
+            self.logger.info(f"Perfil del event loop guardado en {prefix}.*")
+            return {'success': True, 'files': files}
+        except Exception as e:
+            self.logger.error(f"Error guardando perfil del event loop: {e}")
+            return {'success': False, 'error': str(e)}
+
+    @staticmethod
+    def _write_collapsed(filepath: str, stacks: Dict[str, int]):
+        with open(filepath, 'w') as f:
+            for stack, count in sorted(stacks.items()):
+                f.write(f"{stack} {count}\n")
@@ -0,0 +1,116 @@
+# Simos/V3/shared/single_flight.py
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Awaitable, Callable, Hashable, Optional, Tuple
+
+from shared.metrics import registry
+
+REQUESTS = registry.counter(
+    "simos_request_coalescing_calls", "Llamadas a peticiones coalescidas por resultado", ["flight", "result"]
+)
+
+class SingleFlight:
+    """
+    Coalescencia de peticiones concurrentes idénticas (single-flight) con cache TTL opcional.
+
+    Mientras una petición con la misma clave está en curso, los demás llamadores
+    esperan su mismo resultado en lugar de repetirla. Con ttl > 0 el resultado
+    (si no es None) se reutiliza durante ese tiempo; con ttl = 0 solo se
+    deduplican las peticiones simultáneas. do_timed() retorna además el momento
+    en que se obtuvo el valor, que para un resultado cacheado es el original.
+    """
+
+    def __init__(self, name: str, ttl: float = 0.0, max_entries: int = 1024):
+        self.logger = logging.getLogger('V3.SingleFlight')
+        self.name = name
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+        self._in_flight: Dict[Hashable, asyncio.Task] = {}
+        self._cache: "OrderedDict[Hashable, Tuple[float, float, Any]]" = OrderedDict()  # vence, obtenido (epoch), valor
+        self.stats = {
+            'calls': 0,
+            'executions': 0,
+            'shared': 0,  # Llamadas que esperaron una petición ya en curso
+            'cache_hits': 0,
+            'errors': 0
+        }
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Ejecuta fn() una sola vez por clave entre llamadores concurrentes."""
+        value, _ = await self.do_timed(key, fn)
+        return value
+
+    async def do_timed(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, float]:
+        """Como do(), pero retorna (valor, momento epoch en que se obtuvo el valor)."""
+        self.stats['calls'] += 1
+
+        if self.ttl > 0:
+            cached = self._cache.get(key)
+            if cached is not None:
+                expires_at, obtained_at, value = cached
+                if time.monotonic() < expires_at:
+                    self.stats['cache_hits'] += 1
+                    REQUESTS.inc(flight=self.name, result="cache_hit")
+                    return value, obtained_at
+                del self._cache[key]
+
+        task = self._in_flight.get(key)
+        if task is not None:
+            self.stats['shared'] += 1
+            REQUESTS.inc(flight=self.name, result="shared")
+        else:
+            # Tarea propia: si el primer llamador se cancela, los demás siguen esperando el resultado
+            self.stats['executions'] += 1
+            REQUESTS.inc(flight=self.name, result="executed")
+            task = asyncio.ensure_future(self._run(fn))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done, key=key: self._on_done(key, done))
+
+        return await asyncio.shield(task)
+
+    @staticmethod
+    async def _run(fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, float]:
+        value = await fn()
+        return value, time.time()
+
+    def _on_done(self, key: Hashable, task: asyncio.Task):
+        """Libera la clave y guarda el resultado en cache si corresponde."""
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+
+        if task.cancelled():
+            return
+        if task.exception() is not None:
+            self.stats['errors'] += 1
+            return
+
+        value, obtained_at = task.result()
+        if self.ttl > 0 and value is not None:
+            self._cache[key] = (time.monotonic() + self.ttl, obtained_at, value)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+
+    def invalidate(self, key: Optional[Hashable] = None):
+        """Descarta el resultado cacheado de una clave (o todos)."""
+        if key is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(key, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Retorna contadores y la proporción de llamadas que no generaron una petición nueva."""
+        calls = self.stats['calls']
+        saved = self.stats['shared'] + self.stats['cache_hits']
+        return {
+            'name': self.name,
+            'ttl': self.ttl,
+            **self.stats,
+            'in_flight': len(self._in_flight),
+            'cached_entries': len(self._cache),
+            'dedup_ratio': round(saved / calls, 4) if calls else 0.0
+        }
@@ -0,0 +1,191 @@
+# Simos/V3/shared/tracing.py
+
+import itertools
+import logging
+import os
+import time
+from collections import deque, Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Any, List, Optional
+
+from shared.config_v3 import TRACE_SAMPLE_SIZE, TRACE_RECENT_TRACES
+from shared.utils import calculate_percentiles, get_current_timestamp, save_json_file
+from shared.metrics import registry
+
+STARTUP_PHASE_SECONDS = registry.gauge("simos_startup_phase_seconds", "Duración de cada fase del arranque", ["phase"])
+STARTUP_READY_SECONDS = registry.gauge("simos_startup_ready_seconds", "Tiempo desde el inicio del proceso hasta quedar listo")
+
+# Etapas de una oportunidad, en orden, desde el evento de Sebo hasta la notificación
+STAGES = (
+    "ingest", "validate", "market_data", "feature_prep",
+    "predict", "execute", "persist", "broadcast"
+)
+
+# Momento (perf_counter) en que llegó de Sebo el evento que se está procesando.
+# Lo fija SeboConnector al entregar el evento y lo heredan las tareas creadas desde ahí.
+sebo_received_at: ContextVar[Optional[float]] = ContextVar('sebo_received_at', default=None)
+
+_trace_ids = itertools.count(1)
+
+class OpportunityTrace:
+    """
+    Tiempos por etapa de una oportunidad (span ligero, sin dependencias externas).
+
+    El origen es la llegada del evento de Sebo si se conoce; la etapa "ingest"
+    cubre desde ahí hasta que empieza el procesamiento.
+    """
+
+    __slots__ = ('trace_id', 'symbol', 'origin', 'started_at', 'spans', 'ages', 'outcome', 'finished_at')
+
+    def __init__(self, symbol: str, received_at: Optional[float] = None):
+        now = time.perf_counter()
+        self.trace_id = next(_trace_ids)
+        self.symbol = symbol
+        self.origin = received_at if received_at is not None else sebo_received_at.get()
+        if self.origin is None or self.origin > now:
+            self.origin = now
+        self.started_at = get_current_timestamp()
+        self.spans: Dict[str, float] = {}  # etapa -> duración en ms
+        self.ages: Dict[str, float] = {}  # etapa -> edad (ms) del dato al controlar su frescura
+        self.outcome: Optional[str] = None
+        self.finished_at: Optional[float] = None
+        self.spans["ingest"] = (now - self.origin) * 1000
+
+    @contextmanager
+    def stage(self, name: str):
+        """Mide la duración de una etapa (se acumula si la etapa se repite)."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.spans[name] = self.spans.get(name, 0.0) + (time.perf_counter() - start) * 1000
+
+    def finish(self, outcome: str):
+        """Cierra la traza con el resultado de la oportunidad."""
+        self.outcome = outcome
+        self.finished_at = time.perf_counter()
+
+    @property
+    def total_ms(self) -> float:
+        """Tiempo desde el evento de Sebo hasta el cierre (o hasta ahora)."""
+        end = self.finished_at if self.finished_at is not None else time.perf_counter()
+        return (end - self.origin) * 1000
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Representación serializable de la traza."""
+        return {
+            "trace_id": self.trace_id,
+            "symbol": self.symbol,
+            "started_at": self.started_at,
+            "outcome": self.outcome,
+            "total_ms": round(self.total_ms, 3),
+            "stages_ms": {stage: round(ms, 3) for stage, ms in self.spans.items()},
+            "ages_ms": {stage: round(ms, 3) for stage, ms in self.ages.items()}
+        }
+
+class LatencyTracker:
+    """Acumula trazas cerradas y calcula percentiles por etapa sobre las muestras recientes."""
+
+    def __init__(self, sample_size: int = TRACE_SAMPLE_SIZE, recent_traces: int = TRACE_RECENT_TRACES):
+        self.logger = logging.getLogger('V3.LatencyTracker')
+        self._samples: Dict[str, deque] = {
+            stage: deque(maxlen=sample_size) for stage in STAGES + ("total",)
+        }
+        self._recent: deque = deque(maxlen=recent_traces)
+        self._outcomes: Counter = Counter()
+        self.traces_recorded = 0
+
+    def record(self, trace: OpportunityTrace):
+        """Registra una traza cerrada."""
+        for stage, duration_ms in trace.spans.items():
+            self._samples.setdefault(stage, deque(maxlen=self._samples["total"].maxlen)).append(duration_ms)
+        self._samples["total"].append(trace.total_ms)
+        self._outcomes[trace.outcome or "UNKNOWN"] += 1
+        self._recent.append(trace.to_dict())
+        self.traces_recorded += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Percentiles (ms) por etapa de las muestras recientes."""
+        stages = {}
+        for stage, samples in self._samples.items():
+            if not samples:
+                continue
+            values = list(samples)
+            stages[stage] = {
+                "count": len(values),
+                **{key: round(value, 3) for key, value in calculate_percentiles(values).items()},
+                "max": round(max(values), 3)
+            }
+        return {
+            "traces_recorded": self.traces_recorded,
+            "outcomes": dict(self._outcomes),
+            "stages_ms": stages
+        }
+
+    def get_recent_traces(self) -> List[Dict[str, Any]]:
+        """Últimas trazas cerradas."""
+        return list(self._recent)
+
+    def export(self, filepath: str) -> bool:
+        """Escribe percentiles y trazas recientes a un archivo JSON."""
+        directory = os.path.dirname(filepath)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        exported = save_json_file({
+            "exported_at": get_current_timestamp(),
+            "stages": list(STAGES),
+            "summary": self.get_stats(),
+            "recent_traces": self.get_recent_traces()
+        }, filepath)
+
+        if exported:
+            self.logger.info(f"Trazas de latencia exportadas a {filepath} ({self.traces_recorded} registradas)")
+        return exported
+
+class StartupTimer:
+    """
+    Duración de cada fase del arranque de V3 hasta quedar listo para operar.
+
+    Las fases pueden solaparse (inicializaciones concurrentes, carga del modelo en
+    segundo plano): cada una mide su propio tiempo de pared y "ready" el total.
+    """
+
+    def __init__(self, started_at: Optional[float] = None):
+        self.logger = logging.getLogger('V3.StartupTimer')
+        self.started_at = started_at if started_at is not None else time.perf_counter()
+        self.phases: Dict[str, float] = {}  # fase -> duración en ms
+        self.ready_ms: Optional[float] = None
+
+    def add(self, name: str, seconds: float):
+        self.phases[name] = seconds * 1000
+        STARTUP_PHASE_SECONDS.set(seconds, phase=name)
+
+    @contextmanager
+    def phase(self, name: str):
+        """Mide una fase síncrona o un bloque con await."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    async def measure(self, name: str, awaitable):
+        """Espera un awaitable midiendo su duración (útil con asyncio.gather)."""
+        with self.phase(name):
+            return await awaitable
+
+    def mark_ready(self):
+        """Marca el fin del arranque y registra el reporte."""
+        elapsed = time.perf_counter() - self.started_at
+        self.ready_ms = elapsed * 1000
+        STARTUP_READY_SECONDS.set(elapsed)
+        phases = ", ".join(f"{name} {ms:.0f} ms" for name, ms in self.phases.items())
+        self.logger.info(f"Arranque completado en {self.ready_ms:.0f} ms ({phases})")
+
+    def get_report(self) -> Dict[str, Any]:
+        return {
+            "ready_ms": round(self.ready_ms, 1) if self.ready_ms is not None else None,
+            "phases_ms": {name: round(ms, 1) for name, ms in self.phases.items()}
+        }
@@ -3,6 +3,7 @@
 import json
 import logging
 import asyncio
+import functools
 from datetime import datetime, timezone
 from typing import Dict, Any, Optional, List
 import aiohttp
@@ -37,6 +38,23 @@ def get_current_timestamp() -> str:
     """Retorna el timestamp actual en formato ISO."""
     return datetime.now(timezone.utc).isoformat()
 
+def parse_timestamp(value: Any) -> Optional[float]:
+    """Convierte un timestamp ISO (o epoch en s/ms) a segundos epoch; ISO sin zona se toma como UTC."""
+    if value in (None, ''):
+        return None
+    try:
+        epoch = float(value)
+        return epoch / 1000 if epoch > 1e11 else epoch  # Date.now() de Sebo viene en ms
+    except (ValueError, TypeError):
+        pass
+    try:
+        parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
 def safe_float(value: Any, default: float = 0.0) -> float:
     """Convierte un valor a float de forma segura."""
     try:
@@ -97,6 +115,27 @@ def find_cheapest_network(networks: List[Dict], preferred_networks: List[str] =
     
     return cheapest
 
+def calculate_percentiles(values: List[float], percentiles: List[float] = None) -> Dict[str, float]:
+    """Calcula percentiles (interpolación lineal) de una lista de valores."""
+    if percentiles is None:
+        percentiles = [50, 95, 99]
+
+    if not values:
+        return {f"p{p:g}": 0.0 for p in percentiles}
+
+    ordered = sorted(values)
+    last_index = len(ordered) - 1
+    result = {}
+
+    for p in percentiles:
+        position = (p / 100.0) * last_index
+        lower = int(position)
+        upper = min(lower + 1, last_index)
+        fraction = position - lower
+        result[f"p{p:g}"] = ordered[lower] + (ordered[upper] - ordered[lower]) * fraction
+
+    return result
+
 def validate_exchange_id(exchange_id: str, supported_exchanges: List[str]) -> bool:
     """Valida si un exchange ID está soportado."""
     return exchange_id.lower() in [ex.lower() for ex in supported_exchanges]
@@ -117,6 +156,11 @@ def create_symbol_dict(top20_item: Dict) -> Dict[str, Any]:
         'timestamp': safe_dict_get(top20_item, 'timestamp')
     }
 
+@functools.lru_cache(maxsize=32)
+def _client_timeout(total: float) -> aiohttp.ClientTimeout:
+    """ClientTimeout inmutable reutilizado entre peticiones con el mismo timeout."""
+    return aiohttp.ClientTimeout(total=total)
+
 async def make_http_request(
     session: aiohttp.ClientSession,
     method: str,
@@ -127,7 +171,7 @@ async def make_http_request(
     """Realiza una petición HTTP de forma segura."""
     try:
         async with session.request(
-            method, url, timeout=aiohttp.ClientTimeout(total=timeout), **kwargs
+            method, url, timeout=_client_timeout(timeout), **kwargs
         ) as response:
             if response.status == 200:
                 return await response.json()